@@ -1,26 +1,83 @@
+import io
+from collections import Counter
 from abc import ABC, abstractmethod
-from pathlib import Path
-from typing import Iterator
+from contextlib import contextmanager
+from pathlib import Path, PurePath
+from typing import BinaryIO, Iterator, Optional, TextIO, TypeAlias
 
 from .errors import UnsupportedFileType
-from database.models.transaction import Transaction
+from database.models.transaction import ParsedTransaction
+
+# Statement can be stored on a disk or be fully loaded into memory
+DocumentSource: TypeAlias = Path | bytes | BinaryIO
 
 
 class BankProvider(ABC):
     name: str = None
     supported_extensions: tuple[str] = None
 
-    def __init__(self, user_id: int, document_path: Path):
+    def __init__(
+        self,
+        user_id: int,
+        document: DocumentSource,
+        file_name: Optional[str] = None,
+    ):
         self.user_id = user_id
-        self.document = document_path
+        self.document = document
+        self.file_name = file_name or getattr(document, "name", None)
+
+    @property
+    def suffix(self) -> str:
+        return PurePath(self.file_name or "").suffix
 
-    def parse(self) -> Iterator[Transaction]:
-        if self.document.suffix not in self.supported_extensions:
+    def parse(self) -> Iterator[ParsedTransaction]:
+        if self.suffix not in self.supported_extensions:
             raise UnsupportedFileType(
-                f"{self.name} doesn't support {self.document.suffix} files"
+                f"{self.name} doesn't support {self.suffix} files"
+            )
+
+        return self._assign_fingerprints(self.parse_transactions())
+
+    @staticmethod
+    def _assign_fingerprints(
+        transactions: Iterator[ParsedTransaction],
+    ) -> Iterator[ParsedTransaction]:
+        occurrences = Counter()
+
+        for transaction in transactions:
+            # Equal transactions are numbered in the order of the statement
+            identity = transaction.identity()
+            occurrences[identity] += 1
+            transaction.fingerprint = transaction.calculate_fingerprint(
+                identity, occurrences[identity]
             )
 
-        return self.parse_transactions()
+            yield transaction
+
+    @contextmanager
+    def open_document(self) -> Iterator[BinaryIO]:
+        """Open the document as a binary stream regardless of its source."""
+
+        match self.document:
+            case Path():
+                with self.document.open("rb") as file:
+                    yield file
+            case bytes() | bytearray() | memoryview():
+                yield io.BytesIO(self.document)
+            case _:
+                self.document.seek(0)
+                yield self.document
+
+    @contextmanager
+    def open_text_document(self, encoding: str = "utf-8") -> Iterator[TextIO]:
+        with self.open_document() as stream:
+            file = io.TextIOWrapper(stream, encoding=encoding)
+
+            try:
+                yield file
+            finally:
+                # The underlying stream is closed by the document owner
+                file.detach()
 
     @abstractmethod
-    def parse_transactions(self) -> Iterator[Transaction]: ...
+    def parse_transactions(self) -> Iterator[ParsedTransaction]: ...
@@ -2,3 +2,6 @@ class BankProviderException(Exception): ...
 
 
 class UnsupportedFileType(BankProviderException): ...
+
+
+class InvalidDocument(BankProviderException): ...
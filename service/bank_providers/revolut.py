@@ -6,9 +6,9 @@ from typing import Iterator, Optional
 
 import openpyxl
 
-from database.models import Transaction
+from database.models.transaction import ParsedTransaction, Transaction
 from .base import BankProvider
-from .errors import UnsupportedFileType
+from .errors import InvalidDocument, UnsupportedFileType
 
 logger = logging.getLogger(__name__)
 
@@ -27,39 +27,80 @@ class Revolut(BankProvider):
     name: str = "Revolut"
     supported_extensions: tuple[str] = (".xlsx",)
 
-    def parse_transactions(self) -> Iterator[Transaction]:
-        if self.document.suffix == ".xlsx":
-            return self._parse_transactions_from_csv()
+    # Statement columns required to build a transaction
+    columns: tuple[str] = ("Started Date", "Amount", "Currency", "Description")
+
+    def parse_transactions(self) -> Iterator[ParsedTransaction]:
+        if self.suffix == ".xlsx":
+            return self._parse_transactions_from_xlsx()
         else:
             raise UnsupportedFileType()
 
-    def _parse_transactions_from_csv(self) -> Iterator[Transaction]:
-        workbook = openpyxl.load_workbook(self.document)
-        rows = workbook.active.rows
-        headers = [str(cell.value) for cell in next(rows)]
-
-        for row in rows:
-            data = dict(zip(headers, (cell.value for cell in row)))
-
+    def _parse_transactions_from_xlsx(self) -> Iterator[ParsedTransaction]:
+        for timestamp, amount, currency, description in self._read_rows():
             if transaction := self._build_transaction_instance(
                 TransactionData(
                     user_id=self.user_id,
                     name=self.name,
-                    timestamp=data["Started Date"],
-                    amount=data["Amount"],
-                    currency=data["Currency"],
-                    description=data["Description"],
+                    timestamp=timestamp,
+                    amount=amount,
+                    currency=currency,
+                    description=description,
                 )
             ):
                 yield transaction
 
+    def _read_rows(self) -> Iterator[tuple]:
+        """Stream values of the required columns row by row.
+
+        The workbook is opened in read-only mode, so rows are read lazily
+        from the archive and only plain values are produced instead of
+        cell objects, which keeps memory flat regardless of the file size.
+        """
+
+        with self.open_document() as file:
+            workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+
+            try:
+                worksheet = workbook.active
+                # Exported files can contain wrong dimensions, which makes
+                # the read-only worksheet stop earlier than the last row
+                worksheet.reset_dimensions()
+
+                rows = worksheet.iter_rows(values_only=True)
+                headers = [str(value) for value in next(rows, ())]
+
+                try:
+                    positions = [headers.index(column) for column in self.columns]
+                except ValueError as error:
+                    raise InvalidDocument(
+                        f"{self.name} statement must contain columns: "
+                        f"{', '.join(self.columns)}"
+                    ) from error
+
+                last_position = max(positions)
+
+                for row in rows:
+                    if len(row) <= last_position:
+                        row = row + (None,) * (last_position - len(row) + 1)
+
+                    yield tuple(row[position] for position in positions)
+            finally:
+                workbook.close()
+
     @staticmethod
-    def _build_transaction_instance(data: TransactionData) -> Optional[Transaction]:
+    def _build_transaction_instance(
+        data: TransactionData,
+    ) -> Optional[ParsedTransaction]:
         try:
-            return Transaction(
+            return ParsedTransaction(
                 tg_id=data.user_id,
                 bank=data.name,
-                timestamp=data.timestamp,
+                timestamp=(
+                    data.timestamp
+                    if isinstance(data.timestamp, datetime)
+                    else datetime.fromisoformat(str(data.timestamp))
+                ),
                 amount=math.fabs(data.amount),
                 type=(
                     Transaction.Type.debit
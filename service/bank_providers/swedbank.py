@@ -5,7 +5,7 @@ from dataclasses import dataclass
 
 from .base import BankProvider
 from .errors import UnsupportedFileType
-from database.models.transaction import Transaction
+from database.models.transaction import ParsedTransaction, Transaction
 
 logger = logging.getLogger(__name__)
 
@@ -26,14 +26,14 @@ class Swedbank(BankProvider):
     name: str = "Swedbank"
     supported_extensions: tuple[str] = (".csv",)
 
-    def parse_transactions(self) -> Iterator[Transaction]:
-        if self.document.suffix == ".csv":
+    def parse_transactions(self) -> Iterator[ParsedTransaction]:
+        if self.suffix == ".csv":
             return self._parse_transactions_from_csv()
         else:
             raise UnsupportedFileType()
 
-    def _parse_transactions_from_csv(self) -> Iterator[Transaction]:
-        with open(self.document) as file:
+    def _parse_transactions_from_csv(self) -> Iterator[ParsedTransaction]:
+        with self.open_text_document() as file:
             # Skip line with headers
             _ = file.readline()
 
@@ -79,9 +79,11 @@ class Swedbank(BankProvider):
                     yield transaction
 
     @staticmethod
-    def _build_transaction_instance(data: TransactionData) -> Optional[Transaction]:
+    def _build_transaction_instance(
+        data: TransactionData,
+    ) -> Optional[ParsedTransaction]:
         try:
-            return Transaction(
+            return ParsedTransaction(
                 tg_id=data.user_id,
                 bank=data.name,
                 timestamp=datetime.strptime(data.timestamp, "%Y-%m-%d"),
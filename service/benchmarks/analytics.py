@@ -0,0 +1,134 @@
+"""Compare reports of several periods aggregated one by one and together.
+
+Requires a running MongoDB from the MONGODB_URI setting, the
+transactions created by the benchmark are removed afterwards:
+
+    python -m benchmarks.analytics --rows 100000 --periods 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from database.core import init as database_init
+from database.models import Transaction
+from database.models.transaction import ParsedTransaction
+
+USER_ID = -1
+
+
+def generate_rows(rows: int) -> list[ParsedTransaction]:
+    started = datetime(2022, 1, 1)
+    step = timedelta(days=2 * 365) / rows
+
+    return [
+        ParsedTransaction(
+            tg_id=USER_ID,
+            bank="Swedbank",
+            timestamp=started + step * index,
+            amount=index % 1000 / 10,
+            type=Transaction.Type.debit if index % 10 else Transaction.Type.credit,
+            currency=Transaction.Currency.eur,
+            category=list(Transaction.Category)[index % len(Transaction.Category)],
+            description=f"Merchant {index % 500}",
+            fingerprint=f"benchmark-{index}",
+        )
+        for index in range(rows)
+    ]
+
+
+def generate_periods(periods: int) -> list[tuple[datetime, datetime]]:
+    """Consecutive periods of 90 days, which don't start on month boundaries."""
+
+    end_date = datetime(2023, 12, 20)
+    result = []
+
+    for _ in range(periods):
+        start_date = end_date - timedelta(days=90)
+        result.append((start_date, end_date))
+        end_date = start_date
+
+    return result
+
+
+def find_keys_examined(explain: dict | list) -> Optional[int]:
+    if isinstance(explain, dict):
+        if "totalKeysExamined" in explain:
+            return explain["totalKeysExamined"]
+
+        explain = list(explain.values())
+
+    if isinstance(explain, list):
+        for value in explain:
+            if (keys := find_keys_examined(value)) is not None:
+                return keys
+
+
+async def count_keys_examined(edges: list[list[dict]]) -> int:
+    collection = Transaction.get_motor_collection()
+    explain = await collection.database.command(
+        "explain",
+        {
+            "aggregate": collection.name,
+            "pipeline": Transaction._get_report_pipeline(USER_ID, edges),
+            "cursor": {},
+        },
+        verbosity="executionStats",
+    )
+
+    return find_keys_examined(explain) or 0
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--periods", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    arguments = parser.parse_args()
+
+    await database_init()
+
+    periods = generate_periods(arguments.periods)
+    edges = [Transaction._split_period(*period)[1] for period in periods]
+
+    async def separately():
+        await asyncio.gather(
+            *(Transaction._aggregate_reports(USER_ID, [period]) for period in periods)
+        )
+
+    async def together():
+        await Transaction._aggregate_reports(USER_ID, periods)
+
+    try:
+        await Transaction.delete_transactions({Transaction.tg_id: USER_ID})
+        await Transaction.insert_parsed(generate_rows(arguments.rows))
+
+        keys_examined = {
+            "separately": sum(
+                [await count_keys_examined([ranges]) for ranges in edges]
+            ),
+            "together": await count_keys_examined(edges),
+        }
+
+        for name, aggregate in (("separately", separately), ("together", together)):
+            latencies = []
+
+            for _ in range(arguments.repeat):
+                started = time.perf_counter()
+                await aggregate()
+                latencies.append(time.perf_counter() - started)
+
+            print(
+                f"{name:>10}: {len(periods)} periods, "
+                f"median {statistics.median(latencies) * 1000:.1f} ms, "
+                f"{keys_examined[name]} keys examined"
+            )
+    finally:
+        await Transaction.delete_transactions({Transaction.tg_id: USER_ID})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
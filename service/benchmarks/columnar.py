@@ -0,0 +1,106 @@
+"""Compare reading transactions into DataFrames by models and by columns.
+
+The first path is the one the category model used to train on: every
+document is validated as a projection model and batches are built from
+model_dump() of each row. The second one is database.columnar. Requires
+a running MongoDB from the MONGODB_URI setting and the classifier extras,
+the transactions created by the benchmark are removed afterwards:
+
+    python -m benchmarks.columnar --rows 200000 --batch-size 1024
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field, model_validator
+
+from benchmarks.analytics import USER_ID, generate_rows
+from database.columnar import FEATURE_COLUMNS, read_frames
+from database.core import init as database_init
+from database.models import Transaction
+from database.models.transaction import decode_compact_document, stored_name
+
+
+class TransactionProjection(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    amount: float = Field(alias=stored_name("amount"))
+    timestamp: datetime = Field(alias=stored_name("timestamp"))
+    type: str = Field(alias=stored_name("type"))
+    category: Optional[str] = Field(None, alias=stored_name("category"))
+    description: Optional[str] = Field(None, alias=stored_name("description"))
+
+    @model_validator(mode="before")
+    @classmethod
+    def decode_compact_storage(cls, data):
+        return decode_compact_document(data)
+
+
+async def read_models(filters: dict, batch_size: int) -> int:
+    rows = 0
+    batch = []
+
+    async for transaction in Transaction.find(filters, batch_size=batch_size).project(
+        TransactionProjection
+    ):
+        batch.append(transaction)
+
+        if len(batch) == batch_size:
+            rows += len(pd.DataFrame(item.model_dump() for item in batch))
+            batch = []
+
+    if batch:
+        rows += len(pd.DataFrame(item.model_dump() for item in batch))
+
+    return rows
+
+
+async def read_columns(filters: dict, batch_size: int) -> int:
+    rows = 0
+
+    async for df in read_frames(
+        filters, {**FEATURE_COLUMNS, "category": object}, batch_size=batch_size
+    ):
+        rows += len(df)
+
+    return rows
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+
+    await database_init()
+
+    filters = {stored_name("tg_id"): USER_ID}
+
+    try:
+        await Transaction.delete_transactions({Transaction.tg_id: USER_ID})
+        await Transaction.insert_parsed(generate_rows(arguments.rows))
+
+        for name, read in (("models", read_models), ("columns", read_columns)):
+            rates = []
+
+            for _ in range(arguments.repeat):
+                started = time.perf_counter()
+                rows = await read(filters, arguments.batch_size)
+                rates.append(rows / (time.perf_counter() - started))
+
+            print(
+                f"{name:>7}: {rows} rows by {arguments.batch_size}, "
+                f"median {statistics.median(rates):.0f} rows/sec"
+            )
+    finally:
+        await Transaction.delete_transactions({Transaction.tg_id: USER_ID})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
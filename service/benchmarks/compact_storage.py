@@ -0,0 +1,114 @@
+"""Compare the default and the compact storage format of transactions.
+
+Each format is measured in a fresh process with its own TRANSACTION_STORAGE
+and a separate database, which is removed afterwards. Requires a running
+MongoDB from the MONGODB_URI setting:
+
+    python -m benchmarks.compact_storage --rows 200000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from decimal import Decimal
+
+from benchmarks.analytics import USER_ID, generate_periods, generate_rows
+from config import settings
+
+
+async def measure(rows: int, repeat: int) -> dict:
+    from database import core
+    from database.models import Transaction
+    from database.models.transaction import stored_name
+
+    await core.init()
+    await core.drop()
+    await core.init()
+
+    try:
+        parsed = generate_rows(rows)
+        await Transaction.insert_parsed(parsed)
+        await core.index_build
+
+        collection = Transaction.get_motor_collection()
+        stats = await collection.database.command("collStats", collection.name)
+
+        periods = generate_periods(4)
+        latencies = []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await Transaction._aggregate_reports(USER_ID, periods)
+            latencies.append(time.perf_counter() - started)
+
+        totals, _ = await Transaction._aggregate_daily_totals(
+            {stored_name("tg_id"): USER_ID}
+        )
+        exact = sum(Decimal(str(row.amount)) for row in parsed)
+
+        return {
+            "size": stats["size"],
+            "avg_document_size": stats["avgObjSize"],
+            "storage_size": stats["storageSize"],
+            "index_size": stats["totalIndexSize"],
+            "latency": statistics.median(latencies),
+            "sum_error": abs(float(exact) - sum(total["amount"] for total in totals)),
+        }
+    finally:
+        await core.drop()
+        await core.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.measure:
+        print(json.dumps(asyncio.run(measure(arguments.rows, arguments.repeat))))
+        return
+
+    for storage in ("default", "compact"):
+        environment = {
+            **os.environ,
+            "TRANSACTION_STORAGE": storage,
+            "MONGODB_URI": re.sub(
+                r"/\w*$", f"/benchmark_{storage}", settings.MONGODB_URI
+            ),
+        }
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.compact_storage",
+                "--measure",
+                f"--rows={arguments.rows}",
+                f"--repeat={arguments.repeat}",
+            ],
+            env=environment,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+
+        print(
+            f"{storage:>8}: {result['size'] / 2**20:.1f} MiB of documents "
+            f"({result['avg_document_size']} bytes each), "
+            f"{result['storage_size'] / 2**20:.1f} MiB on disk, "
+            f"{result['index_size'] / 2**20:.1f} MiB of indexes, "
+            f"report median {result['latency'] * 1000:.1f} ms, "
+            f"sum error {result['sum_error']:.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
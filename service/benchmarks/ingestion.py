@@ -0,0 +1,69 @@
+"""Compare the sequential parse/insert loop with the ingestion pipeline.
+
+Requires a running MongoDB from the MONGODB_URI setting, the
+transactions created by the benchmark are removed afterwards:
+
+    python -m benchmarks.ingestion --rows 200000
+"""
+
+import argparse
+import asyncio
+import time
+from itertools import batched
+
+from bank_providers import Swedbank
+from benchmarks.parsing_latency import generate_statement
+from config import settings
+from database.core import init as database_init
+from database.models import Transaction
+from ingestion import IngestionPipeline, ParserPool
+
+USER_ID = -1
+
+
+async def insert_sequentially(document: bytes) -> int:
+    """The upload loop used before the pipeline, with the raw inserts."""
+
+    amount = 0
+
+    for batch in batched(Swedbank(USER_ID, document, "statement.csv").parse(), 256):
+        amount += len(batch)
+        await Transaction.insert_parsed(batch)
+
+    return amount
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    arguments = parser.parse_args()
+
+    await database_init()
+
+    document = generate_statement(arguments.rows)
+    pool = ParserPool(executor=settings.PARSER_EXECUTOR, max_workers=2, queue_size=4)
+
+    try:
+        await Transaction.delete_transactions({Transaction.tg_id: USER_ID})
+
+        started = time.perf_counter()
+        amount = await insert_sequentially(document)
+        elapsed = time.perf_counter() - started
+        print(
+            f"sequential: {amount} rows in {elapsed:.2f} s "
+            f"({amount / elapsed:.0f} rows/sec)"
+        )
+
+        await Transaction.delete_transactions({Transaction.tg_id: USER_ID})
+
+        metrics = await IngestionPipeline(pool).run(
+            Swedbank, USER_ID, document, "statement.csv", len(document)
+        )
+        print(f"  pipeline: {metrics}")
+    finally:
+        await Transaction.delete_transactions({Transaction.tg_id: USER_ID})
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
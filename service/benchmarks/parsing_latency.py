@@ -0,0 +1,112 @@
+"""Measure the event loop latency while a large statement is parsed.
+
+The latency of other handlers is approximated by a ticker, which
+sleeps for a short interval and records how late it was woken up:
+
+    python -m benchmarks.parsing_latency --rows 200000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from contextlib import aclosing
+from itertools import batched
+
+from bank_providers import Swedbank
+from config import settings
+from database.core import init as database_init
+from ingestion import ParserPool
+
+TICK = 0.005
+
+
+def generate_statement(rows: int) -> bytes:
+    lines = [
+        '"Account","Code","Date","Beneficiary","Details","Amount","Currency","D/K"'
+    ]
+
+    for index in range(rows):
+        lines.append(
+            f'"LT000000000000000000","20","2024-{index % 12 + 1:02}-{index % 28 + 1:02}",'
+            f'"","Merchant {index % 500}","{index % 1000 / 10}","EUR","D"'
+        )
+
+    return "\n".join(lines).encode()
+
+
+async def ticker(stop: asyncio.Event) -> list[float]:
+    delays = []
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        delays.append(time.perf_counter() - started - TICK)
+
+    return delays
+
+
+async def parse_inline(document: bytes) -> int:
+    """Parsing inside the event loop as the upload handler did before."""
+
+    amount = 0
+
+    for batch in batched(Swedbank(0, document, "statement.csv").parse(), 256):
+        amount += len(batch)
+        await asyncio.sleep(0)
+
+    return amount
+
+
+async def parse_in_pool(pool: ParserPool, document: bytes) -> int:
+    amount = 0
+
+    async with aclosing(pool.parse(Swedbank, 0, document, "statement.csv")) as batches:
+        async for batch in batches:
+            amount += len(batch)
+
+    return amount
+
+
+async def measure(name: str, parse) -> None:
+    stop = asyncio.Event()
+    delays = asyncio.create_task(ticker(stop))
+
+    started = time.perf_counter()
+    amount = await parse
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    delays = sorted(await delays)
+    p99 = delays[int(len(delays) * 0.99) - 1] if delays else 0
+
+    print(
+        f"{name:>8}: {amount} rows in {elapsed:.2f} s, loop delay "
+        f"p50 {statistics.median(delays or [0]) * 1000:.2f} ms, "
+        f"p99 {p99 * 1000:.2f} ms, max {(delays or [0])[-1] * 1000:.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument(
+        "--executor", choices=("thread", "process"), default=settings.PARSER_EXECUTOR
+    )
+    arguments = parser.parse_args()
+
+    await database_init()
+
+    document = generate_statement(arguments.rows)
+    pool = ParserPool(executor=arguments.executor, max_workers=2, queue_size=4)
+
+    try:
+        await measure("idle", asyncio.sleep(1, result=0))
+        await measure("inline", parse_inline(document))
+        await measure(arguments.executor, parse_in_pool(pool, document))
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
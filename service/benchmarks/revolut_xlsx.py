@@ -0,0 +1,120 @@
+"""Compare the full-mode and the streaming loader of Revolut statements.
+
+Each loader runs in a fresh process, so the peak RSS of one loader
+does not affect the other one:
+
+    python -m benchmarks.revolut_xlsx --rows 100000
+"""
+
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import openpyxl
+
+from bank_providers import Revolut
+
+HEADERS = (
+    "Type",
+    "Product",
+    "Started Date",
+    "Completed Date",
+    "Description",
+    "Amount",
+    "Fee",
+    "Currency",
+    "State",
+    "Balance",
+)
+
+
+def generate_statement(path: Path, rows: int):
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(HEADERS)
+    started = datetime(2020, 1, 1)
+
+    for index in range(rows):
+        timestamp = started + timedelta(minutes=index)
+        worksheet.append(
+            (
+                "CARD_PAYMENT",
+                "Current",
+                timestamp,
+                timestamp,
+                f"Merchant {index % 500}",
+                -(index % 1000) / 10,
+                0,
+                "EUR",
+                "COMPLETED",
+                1000,
+            )
+        )
+
+    workbook.save(path)
+
+
+def load_full(path: Path) -> int:
+    """The loader used before the streaming one."""
+
+    workbook = openpyxl.load_workbook(path)
+    rows = workbook.active.rows
+    headers = [str(cell.value) for cell in next(rows)]
+    amount = 0
+
+    for row in rows:
+        data = dict(zip(headers, (cell.value for cell in row)))
+        amount += data["Amount"] is not None
+
+    return amount
+
+
+def load_streaming(path: Path) -> int:
+    amount = 0
+
+    for _, value, *_ in Revolut(0, path)._read_rows():
+        amount += value is not None
+
+    return amount
+
+
+def measure(loader, path: Path, results: multiprocessing.Queue):
+    started = time.perf_counter()
+    rows = loader(path)
+    elapsed = time.perf_counter() - started
+    # On Linux the maximum resident set size is reported in kilobytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    results.put((rows, elapsed, peak_rss))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "statement.xlsx"
+        generate_statement(path, arguments.rows)
+
+        for name, loader in (("full", load_full), ("streaming", load_streaming)):
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=measure, args=(loader, path, results)
+            )
+            process.start()
+            rows, elapsed, peak_rss = results.get()
+            process.join()
+
+            print(
+                f"{name:>10}: {rows} rows, {elapsed:.2f} s, "
+                f"{rows / elapsed:,.0f} rows/sec, peak RSS {peak_rss:.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Compare the regular and the time-series collection of transactions.
+
+Each collection type is measured in a fresh process with its own
+TRANSACTION_COLLECTION and a separate database, which is removed afterwards.
+Reports are measured both as get_report does them, with whole months
+taken from rollups, and aggregated from transactions only. The
+reclassification is measured as well. Requires a running MongoDB 7.0+ from
+the MONGODB_URI setting:
+
+    python -m benchmarks.timeseries --rows 200000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.analytics import USER_ID, generate_periods, generate_rows
+from config import settings
+
+
+async def measure(rows: int, repeat: int) -> dict:
+    from database import core
+    from database.models import Transaction
+    from database.models.transaction import stored_name
+
+    await core.init()
+    await core.drop()
+    await core.init()
+
+    try:
+        started = time.perf_counter()
+        await Transaction.insert_parsed(generate_rows(rows))
+        insert_time = time.perf_counter() - started
+        await core.index_build
+
+        collection = Transaction.get_motor_collection()
+        stats = await collection.database.command("collStats", collection.name)
+
+        periods = generate_periods(4)
+        pipeline = Transaction._get_report_pipeline(
+            USER_ID,
+            [
+                [{"$gte": start_date, "$lte": end_date}]
+                for start_date, end_date in periods
+            ],
+        )
+        latencies, scan_latencies = [], []
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await Transaction._aggregate_reports(USER_ID, periods)
+            latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await collection.aggregate(pipeline).to_list(None)
+            scan_latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await Transaction.set_category(
+            {
+                stored_name("tg_id"): USER_ID,
+                stored_name("category"): Transaction.encode_category(
+                    Transaction.Category.UNKNOWN
+                ),
+            },
+            Transaction.Category.MISC,
+        )
+        reclassification_time = time.perf_counter() - started
+
+        return {
+            "storage_size": stats["storageSize"],
+            "index_size": stats["totalIndexSize"],
+            "insert_time": insert_time,
+            "latency": statistics.median(latencies),
+            "scan_latency": statistics.median(scan_latencies),
+            "reclassification_time": reclassification_time,
+        }
+    finally:
+        await core.drop()
+        await core.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.measure:
+        print(json.dumps(asyncio.run(measure(arguments.rows, arguments.repeat))))
+        return
+
+    for collection in ("regular", "timeseries"):
+        environment = {
+            **os.environ,
+            "TRANSACTION_COLLECTION": collection,
+            "MONGODB_URI": re.sub(
+                r"/\w*$", f"/benchmark_{collection}", settings.MONGODB_URI
+            ),
+        }
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.timeseries",
+                "--measure",
+                f"--rows={arguments.rows}",
+                f"--repeat={arguments.repeat}",
+            ],
+            env=environment,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.splitlines()[-1])
+
+        print(
+            f"{collection:>10}: {result['storage_size'] / 2**20:.1f} MiB on disk, "
+            f"{result['index_size'] / 2**20:.1f} MiB of indexes, "
+            f"insert {result['insert_time']:.2f} s, "
+            f"report median {result['latency'] * 1000:.1f} ms "
+            f"({result['scan_latency'] * 1000:.1f} ms without rollups), "
+            f"reclassification {result['reclassification_time']:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compare the conversion of parsed rows through documents and raw dicts.
+
+Both paths produce what is sent to MongoDB by an insert, the writes
+themselves are included only with --write:
+
+    python -m benchmarks.transaction_insert --rows 100000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from beanie.odm.utils.dump import get_dict
+
+from database.core import init as database_init
+from database.models import Transaction
+from database.models.transaction import ParsedTransaction
+
+USER_ID = -1
+
+
+def generate_rows(rows: int) -> list[ParsedTransaction]:
+    started = datetime(2020, 1, 1)
+
+    return [
+        ParsedTransaction(
+            tg_id=USER_ID,
+            bank="Swedbank",
+            timestamp=started + timedelta(minutes=index),
+            amount=index % 1000 / 10,
+            type=Transaction.Type.debit,
+            currency=Transaction.Currency.eur,
+            account_number="LT000000000000000000",
+            description=f"Merchant {index % 500}",
+        )
+        for index in range(rows)
+    ]
+
+
+def through_documents(rows: list[ParsedTransaction]) -> list[dict]:
+    """Path of Transaction.insert_many used before the raw inserts."""
+
+    return [
+        get_dict(
+            Transaction(
+                tg_id=row.tg_id,
+                bank=row.bank,
+                timestamp=row.timestamp,
+                amount=row.amount,
+                type=row.type,
+                currency=row.currency,
+                category=row.category,
+                account_number=row.account_number,
+                description=row.description,
+            ),
+            to_db=True,
+            keep_nulls=True,
+        )
+        for row in rows
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--write", action="store_true")
+    arguments = parser.parse_args()
+
+    await database_init()
+
+    rows = generate_rows(arguments.rows)
+    collection = Transaction.get_motor_collection()
+
+    for name, convert in (
+        ("documents", through_documents),
+        ("raw", Transaction.to_documents),
+    ):
+        started = time.perf_counter()
+        documents = convert(rows)
+
+        if arguments.write:
+            await collection.insert_many(documents, ordered=False)
+            await collection.delete_many({"tg_id": USER_ID})
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:>9}: {len(rows)} rows in {elapsed:.2f} s "
+            f"({len(rows) / elapsed:,.0f} rows/sec)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""Aho–Corasick automaton for matching many keywords in a single pass.
+
+The automaton is a trie of keywords with failure links: when the next
+character doesn't continue the current keyword, matching falls back to
+the longest suffix which is a prefix of another keyword. So the text is
+read once and the cost is linear in its length plus the number of matches.
+"""
+
+from collections import deque
+from typing import Generic, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class AhoCorasick(Generic[T]):
+    """Case-insensitive matcher of keywords, each one has a value."""
+
+    def __init__(self, keywords: Iterable[tuple[str, T]]):
+        # Transitions, failure links and values of keywords ending in
+        # the state including ones reachable by failure links
+        self._transitions: list[dict[str, int]] = [{}]
+        self._failures: list[int] = [0]
+        self._outputs: list[tuple[T, ...]] = [()]
+
+        for keyword, value in keywords:
+            state = 0
+
+            for char in keyword.lower():
+                if (next_state := self._transitions[state].get(char)) is None:
+                    next_state = len(self._transitions)
+                    self._transitions.append({})
+                    self._failures.append(0)
+                    self._outputs.append(())
+                    self._transitions[state][char] = next_state
+
+                state = next_state
+
+            self._outputs[state] += (value,)
+
+        # Failure links are set in the breadth-first order, so links of
+        # shorter prefixes are ready when longer ones need them
+        states = deque(self._transitions[0].values())
+
+        while states:
+            state = states.popleft()
+
+            for char, next_state in self._transitions[state].items():
+                failure = self._failures[state]
+
+                while failure and char not in self._transitions[failure]:
+                    failure = self._failures[failure]
+
+                failure = self._transitions[failure].get(char, 0)
+
+                self._failures[next_state] = failure
+                self._outputs[next_state] += self._outputs[failure]
+                states.append(next_state)
+
+    def __len__(self) -> int:
+        """Number of states of the automaton."""
+
+        return len(self._transitions)
+
+    def find_all(self, text: str) -> Iterator[T]:
+        """Values of all keywords found in the text in the order of their ends."""
+
+        transitions, failures, outputs = (
+            self._transitions,
+            self._failures,
+            self._outputs,
+        )
+        state = 0
+
+        for char in text.lower():
+            while state and char not in transitions[state]:
+                state = failures[state]
+
+            state = transitions[state].get(char, 0)
+
+            yield from outputs[state]
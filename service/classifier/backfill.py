@@ -0,0 +1,194 @@
+"""Categories of stored uncategorized transactions predicted by the model.
+
+Transactions are streamed in the order of ids, predicted chunk by chunk
+and written by unordered bulk writes, which run concurrently up to the
+limit. Categories are marked as predicted by the model, transactions the
+model isn't confident about are left uncategorized. Only the current
+chunks are kept in memory. The checkpoint is moved once all chunks
+before it are written, so an interrupted run continues where it stopped:
+
+    python -m classifier.backfill [--chunk-size 1000] [--concurrency 4]
+                                  [--dry-run] [--restart]
+"""
+
+import argparse
+import asyncio
+import logging.config
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from classifier.ml import MlClassifier
+from config import settings
+from database.models import Checkpoint, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Name of the checkpoint of the backfill
+NAME = "ml_backfill"
+
+
+@dataclass
+class BackfillMetrics:
+    scanned: int = 0
+    classified: int = 0
+    elapsed: float = 0.0
+    categories: Counter = field(default_factory=Counter)
+
+    def __str__(self) -> str:
+        rate = self.scanned / self.elapsed if self.elapsed else 0.0
+
+        return (
+            f"{self.scanned} scanned, {self.classified} classified "
+            f"in {self.elapsed:.1f} s ({rate:.0f} rows/sec)"
+        )
+
+
+async def backfill(
+    model: MlClassifier,
+    chunk_size: int = 1000,
+    concurrency: int = 4,
+    dry_run: bool = False,
+    restart: bool = False,
+) -> BackfillMetrics:
+    metrics = BackfillMetrics()
+    filters = dict(Transaction.UNCATEGORIZED)
+
+    if not restart and (last_id := await Checkpoint.get_last_id(NAME)):
+        filters["_id"] = {"$gt": last_id}
+
+    limit = asyncio.Semaphore(concurrency)
+    # Writes in the order of chunks with the last id of each chunk
+    writes: deque[tuple[asyncio.Task, ObjectId]] = deque()
+
+    async def write(chunk: list[tuple[dict, Transaction.Category]]) -> int:
+        # A chunk without confident predictions still moves the checkpoint
+        if not chunk:
+            return 0
+
+        async with limit:
+            # Updates of the same category go together
+            chunk.sort(key=lambda item: Transaction.CATEGORY_CODES[item[1]])
+
+            return await Transaction.set_categories(
+                chunk, Transaction.CategorySource.MODEL
+            )
+
+    async def advance(wait: bool):
+        last_id = None
+
+        while writes and (wait or writes[0][0].done()):
+            task, last_id = writes.popleft()
+            metrics.classified += await task
+
+        if last_id is not None:
+            await Checkpoint.advance(NAME, last_id)
+
+    async def predict(documents: list[dict]):
+        categories = model.predict(model.get_frame(documents))
+        metrics.scanned += len(documents)
+        classified = [
+            (document, category)
+            for document, category in zip(documents, categories)
+            if category is not None
+        ]
+        metrics.categories.update(category for _, category in classified)
+
+        if dry_run:
+            return
+
+        # Wait for a free slot, so only a bounded number of chunks is in memory
+        while len(writes) >= concurrency:
+            await asyncio.wait({writes[0][0]})
+            await advance(wait=False)
+
+        writes.append(
+            (
+                asyncio.create_task(write(classified)),
+                documents[-1]["_id"],
+            )
+        )
+        await advance(wait=False)
+
+    started = time.perf_counter()
+    documents = []
+
+    try:
+        async for document in (
+            Transaction.get_motor_collection()
+            .find(filters, Transaction.CLASSIFICATION_FIELDS, batch_size=chunk_size)
+            .sort("_id", ASCENDING)
+        ):
+            documents.append(document)
+
+            if len(documents) == chunk_size:
+                await predict(documents)
+                documents = []
+
+        if documents:
+            await predict(documents)
+
+        await advance(wait=True)
+    finally:
+        for task, _ in writes:
+            task.cancel()
+
+    metrics.elapsed = time.perf_counter() - started
+
+    return metrics
+
+
+def load_latest_model() -> Optional[MlClassifier]:
+    if versions := MlClassifier.get_versions(settings.MODEL_STORAGE_PATH):
+        return MlClassifier.load(versions[-1])
+
+
+async def main():
+    from database.core import init as database_init, close as database_close
+
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Predict categories without writing them and the checkpoint",
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint")
+    arguments = parser.parse_args()
+
+    if (model := load_latest_model()) is None:
+        logger.error("There is no trained model, run python -m classifier.ml")
+
+        return
+
+    await database_init()
+
+    try:
+        metrics = await backfill(
+            model,
+            chunk_size=arguments.chunk_size,
+            concurrency=arguments.concurrency,
+            dry_run=arguments.dry_run,
+            restart=arguments.restart,
+        )
+
+        logger.info("Backfill finished: %s", metrics)
+
+        for category, count in metrics.categories.most_common():
+            logger.info("%s: %s", category, count)
+    finally:
+        await database_close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
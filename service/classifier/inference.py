@@ -0,0 +1,172 @@
+"""Prediction of categories of parsed transactions by the stored model.
+
+The model is loaded lazily on the first batch and shared by the whole
+process, its arrays are memory mapped, so workers of the parser share
+the same pages. A newer version written by python -m classifier.ml is
+picked up without a restart.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from config import settings
+from database.models.transaction import ParsedTransaction, Transaction
+
+if TYPE_CHECKING:
+    from classifier.ml import MlClassifier
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PredictorMetrics:
+    loads: int = 0
+    load_time: float = 0.0
+    batches: int = 0
+    rows: int = 0
+    predict_time: float = 0.0
+    max_predict_time: float = 0.0
+
+    @property
+    def mean_predict_time(self) -> float:
+        return self.predict_time / self.batches if self.batches else 0.0
+
+    def merge(self, other: "PredictorMetrics"):
+        """Add metrics collected by another process, e.g. a parser worker."""
+
+        if other.loads:
+            self.load_time = other.load_time
+
+        self.loads += other.loads
+        self.batches += other.batches
+        self.rows += other.rows
+        self.predict_time += other.predict_time
+        self.max_predict_time = max(self.max_predict_time, other.max_predict_time)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.loads} loads (last {self.load_time * 1000:.1f} ms), "
+            f"{self.rows} rows in {self.batches} batches, "
+            f"{self.mean_predict_time * 1000:.1f} ms mean, "
+            f"{self.max_predict_time * 1000:.1f} ms max per batch"
+        )
+
+
+class CategoryPredictor:
+    """Process-wide holder of the latest stored model."""
+
+    def __init__(
+        self,
+        directory: Path = settings.MODEL_STORAGE_PATH,
+        reload_interval: float = settings.MODEL_RELOAD_INTERVAL,
+    ):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.metrics = PredictorMetrics()
+        self.path: Optional[Path] = None
+        self._model: Optional["MlClassifier"] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> Optional["MlClassifier"]:
+        """The latest model, None if nothing was trained yet."""
+
+        now = time.monotonic()
+
+        if self._checked_at is None or now - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if (
+                    self._checked_at is None
+                    or now - self._checked_at >= self.reload_interval
+                ):
+                    self._reload()
+                    self._checked_at = now
+
+        return self._model
+
+    def classify_rows(self, rows: Sequence[ParsedTransaction]) -> int:
+        """Predict categories of uncategorized rows of the batch at once.
+
+        Rows the model isn't confident about stay uncategorized.
+        """
+
+        rows = [row for row in rows if row.category is None]
+
+        if not rows or (model := self.model) is None:
+            return 0
+
+        import pandas as pd
+
+        started = time.perf_counter()
+        categories = model.predict(
+            pd.DataFrame(
+                {
+                    "description": [row.description for row in rows],
+                    "timestamp": [row.timestamp for row in rows],
+                    "type": [str(row.type) for row in rows],
+                    "amount": [row.amount for row in rows],
+                }
+            )
+        )
+
+        predicted = 0
+
+        for row, category in zip(rows, categories):
+            if category is not None:
+                row.category = category
+                row.category_source = Transaction.CategorySource.MODEL
+                predicted += 1
+
+        elapsed = time.perf_counter() - started
+        self.metrics.batches += 1
+        self.metrics.rows += len(rows)
+        self.metrics.predict_time += elapsed
+        self.metrics.max_predict_time = max(self.metrics.max_predict_time, elapsed)
+
+        return predicted
+
+    def _reload(self):
+        try:
+            from classifier.ml import MlClassifier
+        except ImportError as error:
+            # The classifier extras aren't installed, so there is no model
+            logger.warning("Category model is disabled: %s", error)
+            self.reload_interval = float("inf")
+
+            return
+
+        versions = MlClassifier.get_versions(self.directory)
+
+        if not versions or versions[-1] == self.path:
+            return
+
+        started = time.perf_counter()
+
+        try:
+            model = MlClassifier.load(versions[-1])
+        except Exception as error:
+            # The previous model is kept, the version is tried again later
+            logger.error(
+                "Category model %s can't be loaded", versions[-1].name, exc_info=error
+            )
+
+            return
+
+        self._model = model
+        self.path = versions[-1]
+        self.metrics.loads += 1
+        self.metrics.load_time = time.perf_counter() - started
+
+        logger.info(
+            "Category model %s loaded in %.1f ms",
+            self.path.name,
+            self.metrics.load_time * 1000,
+        )
+
+
+predictor = CategoryPredictor()
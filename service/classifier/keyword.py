@@ -1,15 +1,23 @@
+import argparse
 import asyncio
-import re
 import logging.config
+from collections import defaultdict
+from functools import cache
+from typing import Iterable, Optional
 
+from classifier.aho_corasick import AhoCorasick
 from config import settings
-from database.core import init as database_init
-from database.models import Transaction
+from database.models import Checkpoint, Merchant, Transaction
+from database.models.transaction import ParsedTransaction, stored_name
+from database.normalization import normalize_merchant
 
 logger = logging.getLogger(__name__)
 
 
 class KeywordClassifier:
+    # Name of the checkpoint of the incremental mode
+    NAME = "keyword_classifier"
+
     CATEGORY_MAPPING = {
         Transaction.Category.FOOD: (
             "maxima",
@@ -137,35 +145,158 @@ class KeywordClassifier:
         Transaction.Category.MISC: ("apollo",),
     }
 
-    async def run(self):
-        """Find the keyword in the transaction and assign the category."""
+    @classmethod
+    @cache
+    def automaton(cls) -> AhoCorasick[int]:
+        """Automaton of all keywords, values are priorities of categories.
+
+        Categories were assigned one by one in the order of the mapping,
+        so the first category of the mapping still wins on overlaps.
+        """
+
+        return AhoCorasick(
+            (normalize_merchant(keyword), priority)
+            for priority, keywords in enumerate(cls.CATEGORY_MAPPING.values())
+            for keyword in keywords
+        )
+
+    @classmethod
+    def classify(cls, description: Optional[str]) -> Optional[Transaction.Category]:
+        """Category of the description or of the key of the merchant.
+
+        Keywords are normalized the same way as descriptions, so the
+        description and its merchant always get the same category.
+        """
+
+        if not (key := normalize_merchant(description)):
+            return None
+
+        priority = min(cls.automaton().find_all(key), default=None)
+
+        if priority is None:
+            return None
+
+        return list(cls.CATEGORY_MAPPING)[priority]
+
+    @classmethod
+    def classify_rows(cls, rows: Iterable[ParsedTransaction]) -> int:
+        """Assign categories to uncategorized rows before the insert."""
+
+        classified = 0
+
+        for row in rows:
+            if row.category is None:
+                if (category := cls.classify(row.description)) is not None:
+                    row.category = category
+                    row.category_source = Transaction.CategorySource.KEYWORD
+                    classified += 1
+
+        return classified
+
+    async def run(
+        self,
+        batch_size: int = 1000,
+        filters: Optional[dict] = None,
+        incremental: bool = False,
+    ) -> int:
+        """Classify stored uncategorized transactions by their merchants.
+
+        Distinct merchants of matched transactions are classified once,
+        categories are kept in the dictionary of merchants and fanned out
+        to transactions by an indexed update per category, so the work
+        depends on the number of merchants. Returns the number of
+        classified transactions. In the incremental mode only transactions
+        inserted after the checkpoint are considered.
+        """
 
         logger.info("Keyword classifier started")
 
-        async def update_category(category, keywords):
-            await Transaction.find(
-                {
-                    "category": {"$eq": None},
-                    "description": {
-                        "$regex": re.compile("|".join(keywords), re.IGNORECASE)
-                    },
-                }
-            ).update({"$set": {Transaction.category: category}})
+        filters = {**Transaction.UNCATEGORIZED, **(filters or {})}
+
+        if incremental and (checkpoint := await Checkpoint.get_last_id(self.NAME)):
+            filters["_id"] = {"$gt": checkpoint}
 
-        tasks = [
-            update_category(category, keywords)
-            for category, keywords in self.CATEGORY_MAPPING.items()
-        ]
+        merchant = stored_name("merchant")
+        classified = 0
+        last_id = None
+        keys = []
 
-        await asyncio.gather(*tasks)
+        async for group in Transaction.get_motor_collection().aggregate(
+            [
+                {"$match": {**filters, merchant: {"$type": "string"}}},
+                {"$group": {"_id": f"${merchant}", "last_id": {"$max": "$_id"}}},
+            ],
+            batchSize=batch_size,
+        ):
+            keys.append(group["_id"])
+            last_id = max(last_id or group["last_id"], group["last_id"])
+
+            if len(keys) == batch_size:
+                classified += await self.classify_merchants(keys, filters)
+                keys = []
+
+        if keys:
+            classified += await self.classify_merchants(keys, filters)
+
+        if incremental and last_id is not None:
+            await Checkpoint.advance(self.NAME, last_id)
+
+        logger.info("Keyword classifier finished, %s classified", classified)
+
+        return classified
+
+    async def classify_merchants(self, keys: list[str], filters: dict) -> int:
+        """Classify merchants and their transactions matching the filters."""
+
+        await Merchant.intern(keys)
+
+        categories = await Merchant.get_categories(keys)
+        new_categories = {
+            key: category
+            for key in keys
+            if key not in categories and (category := self.classify(key))
+        }
+        await Merchant.set_categories(new_categories)
+
+        merchants = defaultdict(list)
+
+        for key, category in {**categories, **new_categories}.items():
+            merchants[category].append(key)
+
+        classified = 0
+
+        for category, keys in merchants.items():
+            classified += await Transaction.set_category(
+                {**filters, stored_name("merchant"): {"$in": keys}},
+                category,
+                Transaction.CategorySource.KEYWORD,
+            )
+
+        return classified
 
 
 async def main():
+    from database.core import init as database_init, close as database_close
+
     logging.config.dictConfig(settings.LOGGING_CONFIG)
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Classify only transactions inserted since the last run",
+    )
+    arguments = parser.parse_args()
+
     await database_init()
 
-    await KeywordClassifier().run()
+    try:
+        await KeywordClassifier().run(
+            arguments.batch_size, incremental=arguments.incremental
+        )
+    finally:
+        await database_close()
 
 
 if __name__ == "__main__":
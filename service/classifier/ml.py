@@ -1,118 +1,248 @@
 import asyncio
 import logging.config
-from datetime import datetime
-from typing import AsyncIterator, Optional
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Optional, Sequence
 
+import joblib
 import numpy
 import pandas as pd
-from beanie import PydanticObjectId
-from pydantic import BaseModel, Field
-from sklearn.feature_extraction.text import TfidfVectorizer
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.linear_model import SGDClassifier
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report
 
 from config import settings
-from database.core import init as database_init
 from database.models import Transaction
+from database.columnar import FEATURE_COLUMNS, read_frames, to_columns
+from database.models.transaction import stored_name
 
 logger = logging.getLogger(__name__)
 
 
 class MlClassifier:
-    class TransactionProjection(BaseModel):
-        """Extracting only the necessary fields from transaction."""
+    # Size of the hashed space of description tokens
+    N_FEATURES = 2**18
 
-        id: PydanticObjectId = Field(alias="_id")
-        amount: float
-        timestamp: datetime
-        type: str
-        category: Optional[str] = None
-        description: Optional[str] = None
-
-        class Settings:
-            populate_by_name = True
+    # Versions of the model are files named by the time of training
+    MODEL_PREFIX = "category-model-"
+    MODEL_SUFFIX = ".joblib"
 
     def __init__(self, batch_size=1024):
         self.batch_size = batch_size
-        self._is_initial_step = True
 
-        # Converting categorical data to numeric using TF-IDF
-        self.vectorizer = TfidfVectorizer()
+        # Descriptions are hashed, so the feature space doesn't depend on
+        # the data and stays the same between batches
+        self.vectorizer = HashingVectorizer(
+            n_features=self.N_FEATURES, alternate_sign=False
+        )
 
-        # Convert type and category to numeric values
-        self.type_encoder = LabelEncoder()
-        self.category_encoder = LabelEncoder()
+        # Labels are known in advance, so ids of them never change
+        self.type_encoder = LabelEncoder().fit([str(kind) for kind in Transaction.Type])
+        self.category_encoder = LabelEncoder().fit(
+            [str(category) for category in Transaction.Category]
+        )
+        self.classes = numpy.arange(len(self.category_encoder.classes_))
 
         # Target model for fit
-        self.model = SGDClassifier()
+        self.model = SGDClassifier(random_state=0)
+
+    def get_features(self, df: pd.DataFrame) -> sparse.csr_matrix:
+        """Sparse features of transactions, descriptions are never densified."""
+
+        descriptions = self.vectorizer.transform(df["description"].fillna("Unknown"))
+        types = sparse.csr_matrix(
+            (
+                numpy.ones(len(df)),
+                (
+                    numpy.arange(len(df)),
+                    self.type_encoder.transform(df["type"].map(self._parse_type)),
+                ),
+            ),
+            shape=(len(df), len(self.type_encoder.classes_)),
+        )
+        timestamps = df["timestamp"].dt
+        numeric = numpy.column_stack(
+            (
+                timestamps.hour / 23,
+                timestamps.weekday / 6,
+                (timestamps.month - 1) / 11,
+                numpy.log1p(df["amount"].abs()),
+            )
+        )
 
-    async def run(self):
-        """Preparing data and training the model on data from the database."""
+        return sparse.hstack(
+            (descriptions, types, sparse.csr_matrix(numeric)), format="csr"
+        )
 
-        logger.info("Ml classifier started")
+    @staticmethod
+    def get_frame(documents: Sequence[dict]) -> pd.DataFrame:
+        """Columns of features of transactions as they are stored."""
 
-        # Set initial values for use classification_report
-        X = None
-        y = None
+        return pd.DataFrame(to_columns(documents, FEATURE_COLUMNS), copy=False)
 
-        async for batch in self.get_data({"category": {"$ne": None}}):
-            df = pd.DataFrame(item.model_dump() for item in batch)
+    def predict(
+        self, df: pd.DataFrame, min_score: Optional[float] = None
+    ) -> list[Optional[Transaction.Category]]:
+        """Categories of transactions predicted in a single call.
 
-            df["hour"] = df["timestamp"].dt.hour
-            df["day"] = df["timestamp"].dt.weekday
-            df["month"] = df["timestamp"].dt.month
-            df["description"] = df["description"].fillna("Unknown")
-            df["description"] = self.vectorizer.fit_transform(
-                df["description"]
-            ).toarray()
-            df["type"] = self.type_encoder.fit_transform((df["type"]))
-            df["category"] = self.category_encoder.fit_transform(df["category"])
+        A category is None when its decision score is below the minimum.
+        """
 
-            X = df[["description", "hour", "day", "month", "type", "amount"]]
-            y = df["category"]
+        if min_score is None:
+            min_score = settings.MODEL_MIN_SCORE
 
-            if self._is_initial_step:
-                self._is_initial_step = False
-                self.model.fit(X, y)
-            else:
-                self.model.partial_fit(X, y)
+        scores = self.model.decision_function(self.get_features(df))
+        best = scores.argmax(axis=1)
+        confident = scores[numpy.arange(len(best)), best] >= min_score
 
-        y_predicted = self.model.predict(X)
+        return [
+            Transaction.Category(category) if is_confident else None
+            for category, is_confident in zip(
+                self.category_encoder.inverse_transform(self.model.classes_[best]),
+                confident,
+            )
+        ]
 
-        logger.info(
-            classification_report(
-                y,
-                y_predicted,
-                target_names=self.category_encoder.classes_,
-                zero_division=numpy.nan,
+    def save(self, directory: Path) -> Path:
+        """Write a new version of the model, older ones are removed.
+
+        Arrays are stored uncompressed, so they can be memory mapped by
+        load. The file is renamed into place once it's completely written.
+        Only estimators are stored, not the classifier itself, which would
+        be pickled as __main__.MlClassifier by python -m classifier.ml.
+        """
+
+        directory.mkdir(parents=True, exist_ok=True)
+
+        version = datetime.now(UTC).strftime("%Y%m%d%H%M%S%f")
+        path = directory / f"{self.MODEL_PREFIX}{version}{self.MODEL_SUFFIX}"
+
+        # Versions must grow even if the clock didn't move
+        if versions := self.get_versions(directory):
+            path = max(
+                path, versions[-1].with_name(f"{versions[-1].stem}0{self.MODEL_SUFFIX}")
             )
+        temporary = path.with_suffix(".tmp")
+
+        joblib.dump(
+            {
+                "n_features": self.N_FEATURES,
+                "type_encoder": self.type_encoder,
+                "category_encoder": self.category_encoder,
+                "model": self.model,
+            },
+            temporary,
         )
+        temporary.replace(path)
 
-    async def get_data(
-        self, filters: dict
-    ) -> AsyncIterator[list[TransactionProjection]]:
-        batch = []
+        for outdated in self.get_versions(directory)[: -settings.MODEL_KEEP_VERSIONS]:
+            outdated.unlink(missing_ok=True)
 
-        async for transaction in Transaction.find(
-            filters, batch_size=self.batch_size
-        ).project(self.TransactionProjection):
-            if len(batch) < self.batch_size:
-                batch.append(transaction)
-            else:
-                yield batch
-                batch.clear()
+        return path
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "MlClassifier":
+        """Load the model, large arrays are memory mapped and shared."""
+
+        stored = joblib.load(path, mmap_mode="r" if mmap else None)
+
+        if stored["n_features"] != cls.N_FEATURES:
+            raise ValueError(
+                f"Model {path.name} has {stored['n_features']} hashed features, "
+                f"expected {cls.N_FEATURES}"
+            )
 
-        if batch:
-            yield batch
+        classifier = cls()
+        classifier.type_encoder = stored["type_encoder"]
+        classifier.category_encoder = stored["category_encoder"]
+        classifier.classes = numpy.arange(len(classifier.category_encoder.classes_))
+        classifier.model = stored["model"]
+
+        return classifier
+
+    @classmethod
+    def get_versions(cls, directory: Path) -> list[Path]:
+        """Paths of stored models from the oldest to the latest one."""
+
+        return sorted(directory.glob(f"{cls.MODEL_PREFIX}*{cls.MODEL_SUFFIX}"))
+
+    @staticmethod
+    def _parse_type(value: str) -> str:
+        return str(Transaction.Type.parse(value))
+
+    async def run(self):
+        """Train the model on categorized transactions batch by batch.
+
+        Every batch is predicted before the model learns it, so the report
+        of the last batch is made on data the model hasn't seen yet.
+        """
+
+        logger.info("Ml classifier started")
+
+        started = time.perf_counter()
+        rows = 0
+        y = y_predicted = None
+
+        # Predicted categories are left out, so the model doesn't learn
+        # its own mistakes
+        async for df in read_frames(
+            {
+                stored_name("category"): {"$ne": None},
+                stored_name("category_source"): {
+                    "$ne": str(Transaction.CategorySource.MODEL)
+                },
+            },
+            {**FEATURE_COLUMNS, "category": object},
+            batch_size=self.batch_size,
+        ):
+            X = self.get_features(df)
+            y = self.category_encoder.transform(df["category"].map(str))
+
+            if rows:
+                y_predicted = self.model.predict(X)
+
+            self.model.partial_fit(X, y, classes=self.classes)
+            rows += len(df)
+
+        elapsed = time.perf_counter() - started
+
+        logger.info(
+            "Ml classifier trained on %s transactions in %.1f s, %.0f rows/sec",
+            rows,
+            elapsed,
+            rows / elapsed if elapsed else 0,
+        )
+
+        if y_predicted is not None:
+            logger.info(
+                classification_report(
+                    y,
+                    y_predicted,
+                    labels=self.classes,
+                    target_names=self.category_encoder.classes_,
+                    zero_division=numpy.nan,
+                )
+            )
 
 
 async def main():
+    from database.core import init as database_init, close as database_close
+
     logging.config.dictConfig(settings.LOGGING_CONFIG)
 
     await database_init()
 
-    await MlClassifier().run()
+    try:
+        classifier = MlClassifier()
+        await classifier.run()
+
+        path = classifier.save(settings.MODEL_STORAGE_PATH)
+        logger.info("Model was saved to %s", path)
+    finally:
+        await database_close()
 
 
 if __name__ == "__main__":
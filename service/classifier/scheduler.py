@@ -0,0 +1,67 @@
+"""Classification of imported transactions in the background of the bot.
+
+After an upload only the range of ids of the imported statement is
+classified, which is found by the _id index, so it takes the same time
+regardless of the size of the collection.
+"""
+
+import asyncio
+import logging
+import time
+
+from beanie import PydanticObjectId
+
+from classifier.keyword import KeywordClassifier
+from database.models.transaction import stored_name
+
+logger = logging.getLogger(__name__)
+
+# References to running tasks, otherwise they may be garbage collected
+background_tasks: set[asyncio.Task] = set()
+
+
+async def classify_imported(
+    tg_id: int, first_id: PydanticObjectId, last_id: PydanticObjectId
+) -> int:
+    started = time.perf_counter()
+    classified = await KeywordClassifier().run(
+        filters={
+            stored_name("tg_id"): tg_id,
+            "_id": {"$gte": first_id, "$lte": last_id},
+        }
+    )
+
+    logger.info(
+        "%s imported transactions of %s were classified in %.3f s",
+        classified,
+        tg_id,
+        time.perf_counter() - started,
+    )
+
+    return classified
+
+
+def _log_failure(task: asyncio.Task):
+    background_tasks.discard(task)
+
+    if not task.cancelled() and (error := task.exception()) is not None:
+        logger.error("Classification failed", exc_info=error)
+
+
+def schedule_classification(
+    tg_id: int, first_id: PydanticObjectId, last_id: PydanticObjectId
+) -> asyncio.Task:
+    """Classify imported transactions without waiting for the result."""
+
+    task = asyncio.create_task(classify_imported(tg_id, first_id, last_id))
+    background_tasks.add(task)
+    task.add_done_callback(_log_failure)
+
+    return task
+
+
+async def shutdown():
+    """Wait for the scheduled classification before closing the database."""
+
+    if background_tasks:
+        await asyncio.gather(*background_tasks, return_exceptions=True)
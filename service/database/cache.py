@@ -0,0 +1,125 @@
+"""In-process cache of aggregated reports.
+
+Every user has a data generation, which is bumped whenever transactions
+of the user are inserted, reclassified or deleted. Cached reports remember
+the generation they were aggregated for, so a bump invalidates all reports
+of the user at once without scanning the cache. Reports of households
+are keyed by the ids of all members and their generation is the sum of
+generations of the members, so a bump of any member invalidates them.
+"""
+
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from config import settings
+
+
+@dataclass
+class CacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+
+        return self.hits / requests if requests else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits, {self.misses} misses ({self.hit_ratio:.0%}), "
+            f"{self.evictions} evictions, {self.invalidations} invalidations"
+        )
+
+
+class ReportCache:
+    """LRU cache with TTL for reports of users.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.REPORT_CACHE_SIZE,
+        ttl: float = settings.REPORT_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+        generations: Optional[defaultdict[int, int]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.metrics = CacheMetrics()
+        self._entries: OrderedDict[Hashable, tuple[int, float, Any]] = OrderedDict()
+        self._generations = defaultdict(int) if generations is None else generations
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(
+        tg_id: int | tuple[int, ...], start_date: datetime, end_date: datetime
+    ) -> tuple:
+        return tg_id, start_date, end_date
+
+    def generation(self, tg_id: int | tuple[int, ...]) -> int:
+        if isinstance(tg_id, tuple):
+            return sum(self._generations.get(member, 0) for member in tg_id)
+
+        return self._generations.get(tg_id, 0)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            generation, expires_at, value = entry
+
+            if generation == self.generation(key[0]) and self.clock() < expires_at:
+                self._entries.move_to_end(key)
+                self.metrics.hits += 1
+
+                return value
+
+            del self._entries[key]
+
+        self.metrics.misses += 1
+
+    def put(self, key: tuple, value: Any, generation: int):
+        """Store the value aggregated for the given generation of the user.
+
+        The generation must be taken before the aggregation, so a value
+        aggregated while the data was changing is never served.
+        """
+
+        if generation != self.generation(key[0]) or self.max_size <= 0:
+            return
+
+        self._entries[key] = (generation, self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+    def invalidate(self, tg_ids: Iterable[int]):
+        for tg_id in set(tg_ids):
+            self._generations[tg_id] += 1
+            self.metrics.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Generations are shared, so invalidation of reports covers prefix sums
+generations: defaultdict[int, int] = defaultdict(int)
+
+report_cache = ReportCache(generations=generations)
+prefix_sums_cache = ReportCache(
+    max_size=settings.PREFIX_SUMS_CACHE_SIZE,
+    ttl=settings.REPORT_CACHE_TTL,
+    generations=generations,
+)
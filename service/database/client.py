@@ -0,0 +1,131 @@
+"""Process-wide MongoDB client.
+
+Beanie, the FSM storage and scripts share a single client, so there is
+one connection pool and one set of monitoring threads per process. The
+client is configured from settings and has to be closed on shutdown.
+"""
+
+import threading
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from config import settings
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counters of the connection pool collected from pymongo events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.check_out_failures = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    @property
+    def connections(self) -> int:
+        return self.created - self.closed
+
+    @property
+    def in_use(self) -> int:
+        return self.checked_out - self.checked_in
+
+    @property
+    def mean_wait_time(self) -> float:
+        return self.wait_time / self.checked_out if self.checked_out else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.connections} connections ({self.in_use} in use), "
+            f"{self.checked_out} check outs with mean wait "
+            f"{self.mean_wait_time * 1000:.2f} ms and max wait "
+            f"{self.max_wait_time * 1000:.2f} ms, "
+            f"{self.check_out_failures} check out failures"
+        )
+
+    def _wait(self, event):
+        # Duration of the check out is reported since pymongo 4.9
+        duration = getattr(event, "duration", None) or 0.0
+
+        self.wait_time += duration
+        self.max_wait_time = max(self.max_wait_time, duration)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self._wait(event)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.check_out_failures += 1
+            self._wait(event)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_in += 1
+
+    def pool_created(self, event): ...
+
+    def pool_ready(self, event): ...
+
+    def pool_cleared(self, event): ...
+
+    def pool_closed(self, event): ...
+
+    def connection_ready(self, event): ...
+
+    def connection_check_out_started(self, event): ...
+
+
+pool_stats = PoolStats()
+
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """The client of the process, it's created on the first call."""
+
+    global _client
+
+    if _client is None:
+        options = {
+            "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+            "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+            "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        }
+
+        if settings.MONGODB_COMPRESSORS:
+            options["compressors"] = settings.MONGODB_COMPRESSORS
+
+        _client = AsyncIOMotorClient(
+            settings.MONGODB_URI,
+            authSource="admin",
+            event_listeners=[pool_stats],
+            **options,
+        )
+
+    return _client
+
+
+def close_client():
+    global _client
+
+    if _client is not None:
+        _client.close()
+        _client = None
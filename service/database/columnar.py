@@ -0,0 +1,154 @@
+"""Columnar reading of stored transactions.
+
+Transactions are fetched as raw BSON batches and decoded straight into
+NumPy arrays, one array per column, without models built per row. Arrays
+of a batch are allocated once at its full size and every batch gets new
+ones, so a consumer may keep them while the next batch is read.
+
+Columns are named by fields of transactions, so the same code reads both
+storage formats: stored names are resolved, amounts are decoded to floats
+and categories to their names. A missing value is None, NaN or NaT,
+depending on the type of the column.
+
+It requires the classifier extras, see pyproject.toml.
+"""
+
+from typing import TYPE_CHECKING, AsyncIterator, Mapping, Optional, Sequence, TypeAlias
+
+import numpy
+from bson import decode_all
+from numpy.typing import DTypeLike
+
+from database.models.transaction import (
+    COMPACT_STORAGE,
+    MINOR_UNITS,
+    Transaction,
+    stored_name,
+)
+
+if TYPE_CHECKING:
+    import pandas
+
+# Types of arrays by names of columns
+Columns: TypeAlias = Mapping[str, DTypeLike]
+
+# Columns of transactions used by the category model
+FEATURE_COLUMNS: Columns = {
+    "description": object,
+    "timestamp": "datetime64[ms]",
+    "type": object,
+    "amount": numpy.float64,
+}
+
+CATEGORY_NAMES = {
+    code: str(category) for code, category in Transaction.CODE_CATEGORIES.items()
+}
+
+
+def to_columns(
+    documents: Sequence[Mapping], columns: Columns
+) -> dict[str, numpy.ndarray]:
+    """Columns of stored documents, e.g. ones already fetched for updates."""
+
+    arrays = allocate(columns, len(documents))
+    fill(arrays, documents, 0)
+
+    return decode(arrays)
+
+
+def allocate(columns: Columns, size: int) -> dict[str, numpy.ndarray]:
+    return {name: numpy.empty(size, dtype) for name, dtype in columns.items()}
+
+
+def fill(arrays: dict[str, numpy.ndarray], documents: Sequence[Mapping], offset: int):
+    """Copy stored values of documents into arrays starting from the offset."""
+
+    end = offset + len(documents)
+
+    for name, array in arrays.items():
+        field = name if name == "_id" else stored_name(name)
+        # NumPy converts the whole list at once and None to NaN or NaT
+        array[offset:end] = [document.get(field) for document in documents]
+
+
+def decode(arrays: dict[str, numpy.ndarray]) -> dict[str, numpy.ndarray]:
+    """Decode stored amounts and categories in place."""
+
+    if not COMPACT_STORAGE:
+        return arrays
+
+    if (amounts := arrays.get("amount")) is not None:
+        if numpy.issubdtype(amounts.dtype, numpy.floating):
+            amounts /= MINOR_UNITS
+        else:
+            amounts[:] = [Transaction.decode_amount(amount) for amount in amounts]
+
+    if (categories := arrays.get("category")) is not None:
+        categories[:] = [CATEGORY_NAMES.get(code, code) for code in categories]
+
+    return arrays
+
+
+def get_projection(columns: Columns) -> dict:
+    projection = {stored_name(name): 1 for name in columns if name != "_id"}
+
+    if "_id" not in columns:
+        projection["_id"] = 0
+
+    return projection
+
+
+async def read_columns(
+    filters: dict,
+    columns: Columns,
+    batch_size: int = 1024,
+    sort: Optional[list[tuple[str, int]]] = None,
+) -> AsyncIterator[dict[str, numpy.ndarray]]:
+    """Arrays of matched transactions by batches of the given size.
+
+    Filters and the sort use stored names. The last batch is shorter.
+    """
+
+    cursor = Transaction.get_motor_collection().find_raw_batches(
+        filters, get_projection(columns), batch_size=batch_size
+    )
+
+    if sort:
+        cursor = cursor.sort(sort)
+
+    arrays = allocate(columns, batch_size)
+    size = 0
+
+    async for data in cursor:
+        # Batches of the server don't have to match ones of the reader
+        documents = decode_all(data)
+        start = 0
+
+        while start < len(documents):
+            chunk = documents[start : start + batch_size - size]
+            fill(arrays, chunk, size)
+            size += len(chunk)
+            start += len(chunk)
+
+            if size == batch_size:
+                yield decode(arrays)
+
+                arrays = allocate(columns, batch_size)
+                size = 0
+
+    if size:
+        yield decode({name: array[:size] for name, array in arrays.items()})
+
+
+async def read_frames(
+    filters: dict,
+    columns: Columns,
+    batch_size: int = 1024,
+    sort: Optional[list[tuple[str, int]]] = None,
+) -> AsyncIterator["pandas.DataFrame"]:
+    """The same batches as DataFrames, columns aren't copied."""
+
+    import pandas
+
+    async for arrays in read_columns(filters, columns, batch_size, sort):
+        yield pandas.DataFrame(arrays, copy=False)
@@ -0,0 +1,111 @@
+"""Migrate stored transactions to the format of TRANSACTION_STORAGE.
+
+Transactions stored in the other format are rewritten in batches, so the
+migration can be interrupted and run again. Indexes of the current
+format are built afterwards, ones of the previous format are kept until
+they are dropped by python -m database.indexes --drop-extra:
+
+    TRANSACTION_STORAGE=compact python -m database.compact [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import logging.config
+from pymongo import ReplaceOne
+
+from config import settings
+from database.models import Transaction
+from database.models.transaction import COMPACT_FIELDS, COMPACT_STORAGE, MINOR_UNITS
+
+logger = logging.getLogger(__name__)
+
+
+def to_compact(document: dict) -> dict:
+    result = {"_id": document["_id"]}
+
+    for field, name in COMPACT_FIELDS.items():
+        value = document.get(field)
+
+        if field == "amount":
+            value = round(value * MINOR_UNITS)
+        elif field == "category" and value is not None:
+            value = Transaction.CATEGORY_CODES[Transaction.Category.parse(value)]
+
+        result[name] = value
+
+    return result
+
+
+def to_default(document: dict) -> dict:
+    result = {"_id": document["_id"]}
+
+    for field, name in COMPACT_FIELDS.items():
+        value = document.get(name)
+
+        if field == "amount":
+            value = value / MINOR_UNITS
+        elif field == "category" and value is not None:
+            value = Transaction.CODE_CATEGORIES[value].value
+
+        result[field] = value
+
+    return result
+
+
+async def migrate(batch_size: int = 1000) -> int:
+    """Rewrite transactions stored in the other format, returns their number."""
+
+    if COMPACT_STORAGE:
+        filters, convert = {"tg_id": {"$exists": True}}, to_compact
+    else:
+        filters, convert = {COMPACT_FIELDS["tg_id"]: {"$exists": True}}, to_default
+
+    collection = Transaction.get_motor_collection()
+    migrated = 0
+    batch = []
+
+    async for document in collection.find(filters, batch_size=batch_size):
+        batch.append(ReplaceOne({"_id": document["_id"]}, convert(document)))
+
+        if len(batch) == batch_size:
+            await collection.bulk_write(batch, ordered=False)
+            migrated += len(batch)
+            batch.clear()
+            logger.info("%s transactions were migrated", migrated)
+
+    if batch:
+        await collection.bulk_write(batch, ordered=False)
+        migrated += len(batch)
+
+    return migrated
+
+
+async def main():
+    from database.core import init as database_init, close as database_close
+    from database.indexes import sync_indexes
+
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    arguments = parser.parse_args()
+
+    await database_init(build_indexes=False)
+
+    try:
+        migrated = await migrate(arguments.batch_size)
+
+        logger.info(
+            "%s transactions were migrated to the %s format",
+            migrated,
+            settings.TRANSACTION_STORAGE,
+        )
+
+        for plan in await sync_indexes(models=(Transaction,)):
+            logger.info("Indexes are in sync, %s", plan)
+    finally:
+        await database_close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,25 +1,63 @@
+import asyncio
 import logging
+from contextlib import suppress
+from typing import Optional
 
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
-
-from config import settings
+from database.cache import prefix_sums_cache, report_cache
+from database.client import close_client, get_client, pool_stats
+from database.household import household_cache
+from database.identity import identity_cache
+from database.indexes import sync_indexes_in_background
 from database.models import MODELS
 
 logger = logging.getLogger(__name__)
 
+# Build of indexes declared as background ones, see database.indexes
+index_build: Optional[asyncio.Task] = None
+
+
+async def init(build_indexes: bool = True):
+    global index_build
 
-async def init():
     logger.info("Database initialization")
 
-    client = AsyncIOMotorClient(settings.MONGODB_URI, authSource="admin")
+    client = get_client()
 
     await init_beanie(database=client.get_default_database(), document_models=MODELS)
 
+    if build_indexes:
+        index_build = sync_indexes_in_background(MODELS)
+
+
+async def cancel_index_build():
+    if index_build is not None and not index_build.done():
+        index_build.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await index_build
+
 
 async def drop():
     logger.info("Database drop")
 
-    client = AsyncIOMotorClient(settings.MONGODB_URI, authSource="admin")
+    await cancel_index_build()
+
+    report_cache.clear()
+    prefix_sums_cache.clear()
+    household_cache.clear()
+    identity_cache.clear()
+
+    client = get_client()
 
     await client.drop_database(client.get_default_database())
+
+
+async def close():
+    """Close the client of the process, it's created again by init."""
+
+    logger.info("Database close, connection pool: %s", pool_stats)
+
+    await cancel_index_build()
+
+    close_client()
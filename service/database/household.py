@@ -0,0 +1,115 @@
+"""In-process cache of households sharing a budget.
+
+A household is a group of users connected by accepted invites: the owner
+of the invite and everyone who has started the bot with its code. Reports
+of any member are aggregated over transactions of the whole household.
+
+Members are resolved by a breadth-first walk over invites and cached per
+user, so a report needs a single dictionary lookup. Accepting an invite
+may merge households, so it clears the whole cache.
+"""
+
+from collections import OrderedDict
+
+from config import settings
+from database.cache import CacheMetrics
+from database.models import Invite, User
+
+
+class HouseholdCache:
+    """LRU cache of household members of users."""
+
+    def __init__(self, max_size: int = settings.HOUSEHOLD_CACHE_SIZE):
+        self.max_size = max_size
+        self.metrics = CacheMetrics()
+        self._members: OrderedDict[int, tuple[int, ...]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    async def get_members(self, tg_id: int) -> tuple[int, ...]:
+        """Sorted ids of all members of the household including the user."""
+
+        if (members := self._members.get(tg_id)) is not None:
+            self._members.move_to_end(tg_id)
+            self.metrics.hits += 1
+
+            return members
+
+        self.metrics.misses += 1
+        members = await self._resolve(tg_id)
+
+        if self.max_size > 0:
+            # Every member has the same household, so it's stored for all
+            for member in members:
+                self._members[member] = members
+                self._members.move_to_end(member)
+
+            while len(self._members) > self.max_size:
+                self._members.popitem(last=False)
+                self.metrics.evictions += 1
+
+        return members
+
+    def clear(self):
+        if self._members:
+            self.metrics.invalidations += 1
+
+        self._members.clear()
+
+    @staticmethod
+    async def _resolve(tg_id: int) -> tuple[int, ...]:
+        members = {tg_id}
+        frontier = [tg_id]
+
+        while frontier:
+            # Users who accepted invites of the frontier
+            codes = [
+                invite["code"]
+                async for invite in Invite.get_motor_collection().find(
+                    {"tg_id": {"$in": frontier}, "code": {"$type": "string"}},
+                    {"_id": 0, "code": 1},
+                )
+            ]
+            found = set()
+
+            if codes:
+                found.update(
+                    [
+                        user["tg_id"]
+                        async for user in User.get_motor_collection().find(
+                            {"accepted_invite_code": {"$in": codes}},
+                            {"_id": 0, "tg_id": 1},
+                        )
+                    ]
+                )
+
+            # Owners of invites accepted by the frontier
+            accepted_codes = [
+                user["accepted_invite_code"]
+                async for user in User.get_motor_collection().find(
+                    {
+                        "tg_id": {"$in": frontier},
+                        "accepted_invite_code": {"$type": "string"},
+                    },
+                    {"_id": 0, "accepted_invite_code": 1},
+                )
+            ]
+
+            if accepted_codes:
+                found.update(
+                    [
+                        invite["tg_id"]
+                        async for invite in Invite.get_motor_collection().find(
+                            {"code": {"$in": accepted_codes}}, {"_id": 0, "tg_id": 1}
+                        )
+                    ]
+                )
+
+            frontier = list(found - members)
+            members.update(frontier)
+
+        return tuple(sorted(members))
+
+
+household_cache = HouseholdCache()
@@ -0,0 +1,68 @@
+"""In-process cache of users and invites.
+
+Users are cached by tg_id as they were stored by the last upsert, so
+repeated /start commands with the same profile don't touch the database.
+Invites are cached by code, codes never change once created, while
+unknown codes aren't cached since they may be created later.
+"""
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Hashable, Optional
+
+from config import settings
+from database.cache import CacheMetrics
+
+if TYPE_CHECKING:
+    from database.models import Invite, User
+
+
+class IdentityCache:
+    """LRU cache of users and invites, each one is bounded separately.
+
+    Cached documents are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_size: int = settings.IDENTITY_CACHE_SIZE):
+        self.max_size = max_size
+        self.metrics = CacheMetrics()
+        self._users: OrderedDict[int, "User"] = OrderedDict()
+        self._invites: OrderedDict[str, "Invite"] = OrderedDict()
+
+    def get_user(self, tg_id: int) -> Optional["User"]:
+        return self._get(self._users, tg_id)
+
+    def put_user(self, user: "User"):
+        self._put(self._users, user.tg_id, user)
+
+    def get_invite(self, code: str) -> Optional["Invite"]:
+        return self._get(self._invites, code)
+
+    def put_invite(self, invite: "Invite"):
+        self._put(self._invites, invite.code, invite)
+
+    def clear(self):
+        self._users.clear()
+        self._invites.clear()
+
+    def _get(self, entries: OrderedDict, key: Hashable) -> Optional[Any]:
+        if (value := entries.get(key)) is not None:
+            entries.move_to_end(key)
+            self.metrics.hits += 1
+
+            return value
+
+        self.metrics.misses += 1
+
+    def _put(self, entries: OrderedDict, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+
+        entries[key] = value
+        entries.move_to_end(key)
+
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+
+identity_cache = IdentityCache()
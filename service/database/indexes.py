@@ -0,0 +1,181 @@
+"""Management of indexes, which are built in the background.
+
+Indexes required for the correctness (e.g. unique ones) are declared
+in `Settings.indexes` and created by Beanie on the initialization.
+Indexes needed only for the query performance are declared in
+`Settings.background_indexes`, they are compared with the existing
+ones and missing indexes are built without blocking the startup.
+Indexes of `Settings.indexes` are built as well when they are missing,
+e.g. after a migration of the collection, and never dropped as extra.
+
+Can be run as a script to build indexes and see the difference:
+
+    python -m database.indexes [--dry-run] [--drop-extra]
+"""
+
+import argparse
+import asyncio
+import logging.config
+from dataclasses import dataclass, field
+from typing import Iterable, Type
+
+from beanie import Document
+from beanie.odm.utils.pydantic import get_model_fields
+from beanie.odm.utils.typing import get_index_attributes
+from bson import json_util
+from pymongo import IndexModel
+
+from config import settings
+from database.models import MODELS
+
+logger = logging.getLogger(__name__)
+
+# Options which make indexes with the same keys different
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _signature(index: dict) -> tuple:
+    keys = index["key"]
+    keys = tuple(keys.items() if isinstance(keys, dict) else keys)
+    # Existing options are decoded as SON, so they are compared by
+    # their JSON with sorted keys rather than by representations
+    options = tuple(
+        (option, json_util.dumps(index.get(option), sort_keys=True))
+        for option in INDEX_OPTIONS
+    )
+
+    return keys, options
+
+
+@dataclass
+class IndexPlan:
+    model: Type[Document]
+    missing: list[IndexModel] = field(default_factory=list)
+    extra: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        missing = ", ".join(index.document["name"] for index in self.missing)
+        extra = ", ".join(self.extra)
+
+        return (
+            f"{self.model.__name__}: missing [{missing or '-'}], "
+            f"extra [{extra or '-'}]"
+        )
+
+
+def get_background_indexes(model: Type[Document]) -> list[IndexModel]:
+    return list(getattr(getattr(model, "Settings", None), "background_indexes", []))
+
+
+def get_beanie_indexes(model: Type[Document]) -> list[IndexModel]:
+    """Indexes created by Beanie from settings and fields of the model."""
+
+    indexes = [index.index for index in model.get_settings().indexes]
+
+    for name, value in get_model_fields(model).items():
+        if attributes := get_index_attributes(value):
+            direction, options = attributes
+            indexes.append(IndexModel([(value.alias or name, direction)], **options))
+
+    return indexes
+
+
+def get_declared_indexes(model: Type[Document]) -> list[IndexModel]:
+    """All indexes of the model including ones created by Beanie."""
+
+    return get_beanie_indexes(model) + get_background_indexes(model)
+
+
+async def plan_indexes(model: Type[Document]) -> IndexPlan:
+    """Compare existing indexes of the model with the declared ones."""
+
+    existing = await model.get_motor_collection().index_information()
+    existing_signatures = {_signature(index) for index in existing.values()}
+    declared = get_declared_indexes(model)
+    declared_signatures = {_signature(index.document) for index in declared}
+    # Indexes created by Beanie are kept even if their options changed
+    protected_names = {"_id_"} | {
+        index.document["name"] for index in get_beanie_indexes(model)
+    }
+
+    return IndexPlan(
+        model=model,
+        missing=[
+            index
+            for index in declared
+            if _signature(index.document) not in existing_signatures
+        ],
+        extra=[
+            name
+            for name, index in existing.items()
+            if name not in protected_names
+            and _signature(index) not in declared_signatures
+        ],
+    )
+
+
+async def sync_indexes(
+    models: Iterable[Type[Document]] = MODELS,
+    drop_extra: bool = False,
+    dry_run: bool = False,
+) -> list[IndexPlan]:
+    plans = []
+
+    for model in models:
+        plan = await plan_indexes(model)
+        plans.append(plan)
+
+        if dry_run:
+            continue
+
+        collection = model.get_motor_collection()
+
+        # Extra indexes are dropped first, so their names can be reused
+        if drop_extra:
+            for name in plan.extra:
+                logger.info("Dropping index %s of %s", name, model.__name__)
+                await collection.drop_index(name)
+
+        if plan.missing:
+            logger.info("Building indexes of %s", model.__name__)
+            await collection.create_indexes(plan.missing)
+
+    return plans
+
+
+def sync_indexes_in_background(
+    models: Iterable[Type[Document]] = MODELS,
+) -> asyncio.Task:
+    async def build():
+        try:
+            for plan in await sync_indexes(models):
+                logger.info("Indexes are in sync, %s", plan)
+        except Exception as error:
+            logger.error("Background index build failed", exc_info=error)
+
+    return asyncio.create_task(build())
+
+
+async def main():
+    from database.core import init as database_init, close as database_close
+
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--drop-extra", action="store_true")
+    arguments = parser.parse_args()
+
+    await database_init(build_indexes=False)
+
+    try:
+        for plan in await sync_indexes(
+            drop_extra=arguments.drop_extra, dry_run=arguments.dry_run
+        ):
+            print(plan)
+    finally:
+        await database_close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
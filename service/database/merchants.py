@@ -0,0 +1,75 @@
+"""Set keys of merchants of transactions stored before the dictionary.
+
+Transactions without the merchant field get the key normalized from
+their description in batches, so the script can be interrupted and run
+again:
+
+    python -m database.merchants [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import logging.config
+
+from pymongo import UpdateOne
+
+from config import settings
+from database.models import Transaction
+from database.models.transaction import stored_name
+from database.normalization import normalize_merchant
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(batch_size: int = 1000) -> int:
+    """Set keys of merchants, returns the number of updated transactions."""
+
+    description, merchant = stored_name("description"), stored_name("merchant")
+    collection = Transaction.get_motor_collection()
+    migrated = 0
+    batch = []
+
+    async for document in collection.find(
+        {merchant: {"$exists": False}}, {description: 1}, batch_size=batch_size
+    ):
+        batch.append(
+            UpdateOne(
+                {"_id": document["_id"]},
+                {"$set": {merchant: normalize_merchant(document.get(description))}},
+            )
+        )
+
+        if len(batch) == batch_size:
+            await collection.bulk_write(batch, ordered=False)
+            migrated += len(batch)
+            batch.clear()
+            logger.info("%s transactions were migrated", migrated)
+
+    if batch:
+        await collection.bulk_write(batch, ordered=False)
+        migrated += len(batch)
+
+    return migrated
+
+
+async def main():
+    from database.core import init as database_init, close as database_close
+
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=1000)
+    arguments = parser.parse_args()
+
+    await database_init()
+
+    try:
+        migrated = await migrate(arguments.batch_size)
+
+        logger.info("Merchants of %s transactions were set", migrated)
+    finally:
+        await database_close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
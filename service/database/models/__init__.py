@@ -1,8 +1,31 @@
-__all__ = ("MODELS", "Invite", "Transaction", "User")
+__all__ = (
+    "MODELS",
+    "Checkpoint",
+    "DailyRollup",
+    "ImportedStatement",
+    "Invite",
+    "Merchant",
+    "MonthlyRollup",
+    "Transaction",
+    "User",
+)
 
+from .checkpoint import Checkpoint
+from .imported_statement import ImportedStatement
 from .invite import Invite
+from .merchant import Merchant
+from .rollup import DailyRollup, MonthlyRollup
 from .transaction import Transaction
 from .user import User
 
 
-MODELS = (Invite, Transaction, User)
+MODELS = (
+    Checkpoint,
+    DailyRollup,
+    ImportedStatement,
+    Invite,
+    Merchant,
+    MonthlyRollup,
+    Transaction,
+    User,
+)
@@ -0,0 +1,32 @@
+from datetime import UTC, datetime
+from typing import Optional
+
+from beanie import Document, Indexed, PydanticObjectId
+from pydantic import Field
+
+
+class Checkpoint(Document):
+    """The greatest id of transactions processed by an incremental job."""
+
+    name: Indexed(str, unique=True)
+    last_id: PydanticObjectId
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+    @classmethod
+    async def get_last_id(cls, name: str) -> Optional[PydanticObjectId]:
+        checkpoint = await cls.find_one(cls.name == name)
+
+        return checkpoint.last_id if checkpoint else None
+
+    @classmethod
+    async def advance(cls, name: str, last_id: PydanticObjectId):
+        """Move the checkpoint forward, it never goes back."""
+
+        await cls.get_motor_collection().update_one(
+            {"name": name},
+            {
+                "$max": {"last_id": last_id},
+                "$set": {"updated_at": datetime.now(UTC)},
+            },
+            upsert=True,
+        )
@@ -0,0 +1,65 @@
+from datetime import UTC, datetime
+from typing import Optional
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+
+class ImportedStatement(Document):
+    """Bank statement, which was already imported by the user."""
+
+    tg_id: int
+    bank: str
+    file_unique_id: Optional[str] = None
+    sha256: str
+    rows: int
+    inserted: int
+    # All transactions inserted from the statement have ids within the range
+    first_id: Optional[PydanticObjectId] = None
+    last_id: Optional[PydanticObjectId] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [
+                    ("tg_id", ASCENDING),
+                    ("file_unique_id", ASCENDING),
+                ],
+                unique=True,
+                partialFilterExpression={"file_unique_id": {"$type": "string"}},
+            ),
+            IndexModel(
+                [
+                    ("tg_id", ASCENDING),
+                    ("sha256", ASCENDING),
+                ],
+                unique=True,
+            ),
+        ]
+
+    @classmethod
+    async def find_by_file(
+        cls, tg_id: int, file_unique_id: str
+    ) -> Optional["ImportedStatement"]:
+        return await cls.find_one(
+            cls.tg_id == tg_id, cls.file_unique_id == file_unique_id
+        )
+
+    @classmethod
+    async def find_by_hash(
+        cls, tg_id: int, sha256: str
+    ) -> Optional["ImportedStatement"]:
+        return await cls.find_one(cls.tg_id == tg_id, cls.sha256 == sha256)
+
+    async def save_once(self) -> "ImportedStatement":
+        """Save the statement unless the same one was saved concurrently."""
+
+        try:
+            await self.insert()
+        except DuplicateKeyError:
+            pass
+
+        return self
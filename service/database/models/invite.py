@@ -6,6 +6,8 @@ from pymongo import IndexModel, ASCENDING
 from beanie import Document
 from pymongo.errors import DuplicateKeyError
 
+from database.identity import identity_cache
+
 
 class Invite(Document):
     tg_id: int
@@ -19,9 +21,25 @@ class Invite(Document):
                     ("code", ASCENDING),
                 ],
                 unique=True,
-            )
+            ),
+            # Invites are looked up by code, which is unique across users
+            IndexModel(
+                [("code", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"code": {"$type": "string"}},
+            ),
         ]
 
+    @classmethod
+    async def find_by_code(cls, code: str) -> Optional["Invite"]:
+        if (invite := identity_cache.get_invite(code)) is not None:
+            return invite
+
+        if (invite := await cls.find_one(cls.code == code)) is not None:
+            identity_cache.put_invite(invite)
+
+        return invite
+
     async def get_or_create_code(self) -> str:
         if invite := await Invite.find(Invite.tg_id == self.tg_id).first_or_none():
             return invite.code
@@ -34,6 +52,8 @@ class Invite(Document):
             except DuplicateKeyError:
                 continue
             else:
+                identity_cache.put_invite(invite)
+
                 return invite.code
 
     @staticmethod
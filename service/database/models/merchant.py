@@ -0,0 +1,74 @@
+from typing import Iterable, Mapping, Optional
+
+from beanie import Document, Indexed
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .transaction import DUPLICATE_KEY_ERROR, Transaction
+
+
+class Merchant(Document):
+    """Dictionary of normalized descriptions, see database.normalization.
+
+    Transactions reference merchants by the key, so classifiers decide
+    the category once per merchant instead of every transaction.
+    """
+
+    key: Indexed(str, unique=True)
+    category: Optional[Transaction.Category] = None
+
+    @classmethod
+    async def intern(cls, keys: Iterable[str]):
+        """Add merchants which aren't in the dictionary yet."""
+
+        if not (keys := set(keys)):
+            return
+
+        try:
+            await cls.get_motor_collection().bulk_write(
+                [
+                    UpdateOne(
+                        {"key": key},
+                        {"$setOnInsert": {"key": key, "category": None}},
+                        upsert=True,
+                    )
+                    for key in keys
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as error:
+            # Concurrent upserts of the same key, one of them wins
+            if error.details.get("writeConcernErrors") or any(
+                write_error["code"] != DUPLICATE_KEY_ERROR
+                for write_error in error.details["writeErrors"]
+            ):
+                raise
+
+    @classmethod
+    async def get_categories(
+        cls, keys: Iterable[str]
+    ) -> dict[str, Transaction.Category]:
+        """Categories of classified merchants of the keys."""
+
+        return {
+            merchant["key"]: Transaction.Category(merchant["category"])
+            async for merchant in cls.get_motor_collection().find(
+                {"key": {"$in": list(keys)}, "category": {"$ne": None}},
+                {"_id": 0, "key": 1, "category": 1},
+            )
+        }
+
+    @classmethod
+    async def set_categories(cls, categories: Mapping[str, Transaction.Category]):
+        if categories:
+            await cls.get_motor_collection().bulk_write(
+                [
+                    UpdateOne(
+                        {"key": key},
+                        {"$set": {"category": category.value}},
+                        upsert=True,
+                    )
+                    for key, category in categories.items()
+                ],
+                ordered=False,
+            )
@@ -0,0 +1,109 @@
+from datetime import datetime
+from typing import ClassVar, Iterable
+
+from beanie import Document
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+
+class Rollup(Document):
+    """Totals of the user transactions for a period.
+
+    Reports take whole periods from rollups instead of aggregating every
+    transaction. Rollups are kept in sync by Transaction, whenever
+    transactions are inserted, reclassified or deleted.
+    """
+
+    tg_id: int
+    type: str
+    currency: str
+    category: str
+    amount: float = 0.0
+    transactions: int = 0
+
+    # Field of the period start, which is a part of the rollup key
+    PERIOD: ClassVar[str]
+
+    @classmethod
+    def key(cls) -> tuple[str, ...]:
+        return "tg_id", cls.PERIOD, "type", "currency", "category"
+
+    @classmethod
+    async def increment(cls, totals: Iterable[dict]):
+        """Add totals of transactions grouped by the rollup key.
+
+        Negative totals are used to subtract removed or moved transactions,
+        rollups without transactions are removed afterwards.
+        """
+
+        totals = list(totals)
+
+        if not totals:
+            return
+
+        collection = cls.get_motor_collection()
+
+        await collection.bulk_write(
+            [
+                UpdateOne(
+                    {key: total[key] for key in cls.key()},
+                    {
+                        "$inc": {
+                            "amount": total["amount"],
+                            "transactions": total["transactions"],
+                        }
+                    },
+                    upsert=True,
+                )
+                for total in totals
+            ],
+            ordered=False,
+        )
+
+        if decremented := {
+            total["tg_id"] for total in totals if total["transactions"] < 0
+        }:
+            await collection.delete_many(
+                {"tg_id": {"$in": list(decremented)}, "transactions": {"$lte": 0}}
+            )
+
+
+class MonthlyRollup(Rollup):
+    month: datetime
+
+    PERIOD: ClassVar[str] = "month"
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [
+                    ("tg_id", ASCENDING),
+                    ("month", ASCENDING),
+                    ("type", ASCENDING),
+                    ("currency", ASCENDING),
+                    ("category", ASCENDING),
+                ],
+                unique=True,
+            )
+        ]
+
+
+class DailyRollup(Rollup):
+    """Rollups of days, which are the base of prefix sums for custom ranges."""
+
+    day: datetime
+
+    PERIOD: ClassVar[str] = "day"
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [
+                    ("tg_id", ASCENDING),
+                    ("day", ASCENDING),
+                    ("type", ASCENDING),
+                    ("currency", ASCENDING),
+                    ("category", ASCENDING),
+                ],
+                unique=True,
+            )
+        ]
@@ -1,12 +1,65 @@
 import asyncio
+from array import array
+import hashlib
 from collections import defaultdict
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
-from typing import Optional, Self, TypeAlias
+from types import NoneType
+from typing import ClassVar, Iterable, Optional, Self, Sequence, TypeAlias
 
-from beanie import Document
+from beanie import Document, PydanticObjectId, TimeSeriesConfig
+from bson import ObjectId
+from beanie import Granularity as TimeSeriesGranularity
+from pydantic import Field, model_validator
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
 
+from config import settings
+from database.cache import prefix_sums_cache, report_cache
+from database.normalization import normalize_merchant
+from database.prefix_sums import PrefixSums
+from .rollup import DailyRollup, MonthlyRollup, Rollup
+
+DUPLICATE_KEY_ERROR = 11000
+
+# In the compact storage format fields are stored with short names, amounts
+# as integer minor units and categories as integer codes
+COMPACT_STORAGE = settings.TRANSACTION_STORAGE == "compact"
+COMPACT_FIELDS = {
+    "tg_id": "u",
+    "bank": "b",
+    "timestamp": "t",
+    "amount": "a",
+    "type": "y",
+    "currency": "c",
+    "category": "g",
+    "category_source": "s",
+    "account_number": "n",
+    "description": "d",
+    "fingerprint": "f",
+    "merchant": "m",
+}
+MINOR_UNITS = 100
+
+# Transactions whose category is being changed are claimed by the writer,
+# see Transaction.set_category
+CLAIM_FIELD = "_claim"
+PREVIOUS_CATEGORY_FIELD = "_previous_category"
+
+# In the time-series mode transactions are bucketed by user and timestamp,
+# see python -m database.timeseries for the migration of the collection
+TIMESERIES_COLLECTION = settings.TRANSACTION_COLLECTION == "timeseries"
+
+
+def stored_name(field: str) -> str:
+    """Name of the transaction field in the collection."""
+
+    return COMPACT_FIELDS[field] if COMPACT_STORAGE else field
+
+
+# Reports are made for a user or for all members of a household
+UserIds: TypeAlias = int | tuple[int, ...]
 
 ReportEntry: TypeAlias = dict[
     "Transaction.Currency", dict["Transaction.Category", float]
@@ -25,6 +78,123 @@ class Analytics:
     compared_period: Report
 
 
+class Granularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+    def __str__(self) -> str:
+        return self.value
+
+    def truncate(self, timestamp: datetime) -> datetime:
+        """Start of the bucket the same way as $dateTrunc does it."""
+
+        timestamp = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        match self:
+            case Granularity.DAY:
+                return timestamp
+            case Granularity.WEEK:
+                return timestamp - timedelta(days=timestamp.weekday())
+            case Granularity.MONTH:
+                return timestamp.replace(day=1)
+
+    def next(self, bucket: datetime) -> datetime:
+        match self:
+            case Granularity.DAY:
+                return bucket + timedelta(days=1)
+            case Granularity.WEEK:
+                return bucket + timedelta(days=7)
+            case Granularity.MONTH:
+                return (bucket + timedelta(days=32)).replace(day=1)
+
+
+TrendKey: TypeAlias = tuple[
+    "Transaction.Type", "Transaction.Currency", "Transaction.Category"
+]
+
+
+@dataclass
+class Trend:
+    """Totals of the period bucketed by the granularity.
+
+    Every series holds a total for each of the buckets, buckets without
+    transactions are zeros.
+    """
+
+    granularity: Granularity
+    buckets: list[datetime]
+    series: dict[TrendKey, array]
+
+    def total(
+        self, operation: "Transaction.Type", currency: "Transaction.Currency"
+    ) -> array:
+        """Totals of all categories of the operation in the currency."""
+
+        result = array("d", bytes(8 * len(self.buckets)))
+
+        for (type_, currency_, _), values in self.series.items():
+            if type_ == operation and currency_ == currency:
+                for index, value in enumerate(values):
+                    result[index] += value
+
+        return result
+
+    def currencies(self) -> list["Transaction.Currency"]:
+        return sorted(
+            {currency for _, currency, _ in self.series},
+            key=lambda currency: currency.value,
+        )
+
+
+@dataclass(slots=True)
+class ParsedTransaction:
+    """Transaction parsed from a bank statement but not yet stored.
+
+    It's a lightweight alternative to the Transaction document for bulk
+    imports, rows are validated once per batch by Transaction.to_documents.
+    """
+
+    tg_id: int
+    bank: str
+    timestamp: datetime
+    amount: float
+    type: "Transaction.Type"
+    currency: "Transaction.Currency"
+    category: Optional["Transaction.Category"] = None
+    category_source: Optional["Transaction.CategorySource"] = None
+    account_number: Optional[str] = None
+    description: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+    def identity(self) -> str:
+        """Fields identifying the transaction across different statements."""
+
+        return "|".join(
+            (
+                str(self.tg_id),
+                self.bank,
+                self.account_number or "",
+                self.timestamp.isoformat(),
+                f"{self.amount:.2f}",
+                self.type.value,
+                " ".join((self.description or "").lower().split()),
+            )
+        )
+
+    @staticmethod
+    def calculate_fingerprint(identity: str, occurrence: int) -> str:
+        """Deterministic fingerprint of the transaction.
+
+        Identical transactions within the same statement (e.g. two equal
+        payments on the same day) are distinguished by the occurrence.
+        """
+
+        return hashlib.blake2b(
+            f"{identity}|{occurrence}".encode(), digest_size=16
+        ).hexdigest()
+
+
 class Transaction(Document):
     class Type(Enum):
         debit = "D"
@@ -86,84 +256,896 @@ class Transaction(Document):
             except ValueError as error:
                 raise ValueError(f"Unknown category {value}") from error
 
-    tg_id: int
-    bank: str
-    timestamp: datetime
-    amount: float
-    type: Type
-    currency: Currency
-    category: Optional[Category] = None
-    account_number: Optional[str] = None
-    description: Optional[str] = None
+    class CategorySource(str, Enum):
+        """Origin of the category, predicted ones aren't used for training."""
+
+        KEYWORD = "keyword"
+        MODEL = "model"
+
+        def __str__(self) -> str:
+            return self.value
+
+    # Stable codes of categories in the compact storage format
+    CATEGORY_CODES: ClassVar[dict[Category, int]] = {
+        Category.INCOME: 1,
+        Category.HOUSING: 2,
+        Category.TRANSPORT: 3,
+        Category.CHILDREN: 4,
+        Category.BEAUTY: 5,
+        Category.HEALTH: 6,
+        Category.MISC: 7,
+        Category.GAMES: 8,
+        Category.SHOPPING: 9,
+        Category.SERVICES: 10,
+        Category.EDUCATION: 11,
+        Category.TRAVEL: 12,
+        Category.PETS: 13,
+        Category.UNKNOWN: 14,
+        Category.FOOD: 15,
+        Category.SPORT: 16,
+    }
+    CODE_CATEGORIES: ClassVar[dict[int, Category]] = dict(
+        zip(CATEGORY_CODES.values(), CATEGORY_CODES.keys())
+    )
+
+    tg_id: int = Field(alias=stored_name("tg_id"))
+    bank: str = Field(alias=stored_name("bank"))
+    timestamp: datetime = Field(alias=stored_name("timestamp"))
+    amount: float = Field(alias=stored_name("amount"))
+    type: Type = Field(alias=stored_name("type"))
+    currency: Currency = Field(alias=stored_name("currency"))
+    category: Optional[Category] = Field(None, alias=stored_name("category"))
+    category_source: Optional[CategorySource] = Field(
+        None, alias=stored_name("category_source")
+    )
+    account_number: Optional[str] = Field(None, alias=stored_name("account_number"))
+    description: Optional[str] = Field(None, alias=stored_name("description"))
+    fingerprint: Optional[str] = Field(None, alias=stored_name("fingerprint"))
+    # Key of the merchant in the dictionary, see database.models.merchant
+    merchant: Optional[str] = Field(None, alias=stored_name("merchant"))
 
+    # Filter of transactions without a category, which matches the partial
+    # index, since the index can't be used by the equality to null
+    UNCATEGORIZED: ClassVar[dict] = {stored_name("category"): {"$type": "null"}}
+    # Projection of stored transactions for classifiers, see set_categories
+    CLASSIFICATION_FIELDS: ClassVar[dict] = {
+        stored_name(field): 1
+        for field in (
+            "tg_id",
+            "timestamp",
+            "type",
+            "currency",
+            "category",
+            "amount",
+            "description",
+            "merchant",
+        )
+    }
+
+    class Settings:
+        if TIMESERIES_COLLECTION:
+            timeseries = TimeSeriesConfig(
+                time_field=stored_name("timestamp"),
+                meta_field=stored_name("tg_id"),
+                granularity=TimeSeriesGranularity.hours,
+            )
+        if TIMESERIES_COLLECTION:
+            # Unique indexes are not supported by time-series collections,
+            # already imported rows are skipped by insert_parsed instead
+            indexes = []
+        else:
+            indexes = [
+                # Prevents from storing the same transaction twice
+                # when overlapping statements are uploaded
+                IndexModel(
+                    [(stored_name("fingerprint"), ASCENDING)],
+                    unique=True,
+                    partialFilterExpression={
+                        stored_name("fingerprint"): {"$type": "string"}
+                    },
+                )
+            ]
+        # Transactions claimed by set_category are found by the token, only
+        # the few ones being changed at the moment are in the index
+        indexes.append(
+            IndexModel([(CLAIM_FIELD, ASCENDING)], name="claim", sparse=True)
+        )
+        # See database.indexes
+        background_indexes = [
+            # Reports and analytics of the user for the period
+            IndexModel(
+                [
+                    (stored_name("tg_id"), ASCENDING),
+                    (stored_name("timestamp"), ASCENDING),
+                ],
+                name="tg_id_timestamp",
+            ),
+        ]
+        if TIMESERIES_COLLECTION:
+            # Lookup of already imported rows and the fan out of categories
+            # of merchants, partial indexes of time-series collections may
+            # filter on the meta field only
+            background_indexes += [
+                IndexModel(
+                    [
+                        (stored_name("tg_id"), ASCENDING),
+                        (stored_name("fingerprint"), ASCENDING),
+                    ],
+                    name="tg_id_fingerprint",
+                ),
+                IndexModel([(stored_name("merchant"), ASCENDING)], name="merchant"),
+            ]
+        else:
+            # Categories of merchants are fanned out to uncategorized
+            # transactions, see classifier.keyword
+            background_indexes.append(
+                IndexModel(
+                    [(stored_name("merchant"), ASCENDING)],
+                    name="uncategorized_merchant",
+                    partialFilterExpression={
+                        stored_name("category"): {"$type": "null"}
+                    },
+                )
+            )
+
+        if COMPACT_STORAGE:
+            # Amount is the only float field of the transaction
+            bson_encoders = {
+                float: lambda amount: Transaction.encode_amount(amount),
+                Enum: lambda value: (
+                    Transaction.encode_category(value)
+                    if isinstance(value, Transaction.Category)
+                    else value.value
+                ),
+            }
+
+    @model_validator(mode="before")
     @classmethod
-    async def get_report(
-        cls, tg_id: int, start_date: datetime, end_date: datetime
-    ) -> Report:
-        result = await cls.aggregate(
-            [
+    def decode_compact_storage(cls, data):
+        return decode_compact_document(data)
+
+    @staticmethod
+    def encode_amount(amount: float) -> float | int:
+        return round(amount * MINOR_UNITS) if COMPACT_STORAGE else amount
+
+    @staticmethod
+    def decode_amount(value: float | int) -> float:
+        return value / MINOR_UNITS if COMPACT_STORAGE else value
+
+    @classmethod
+    def encode_category(cls, category: Optional[Category]) -> Optional[str | int]:
+        if category is None:
+            return None
+
+        return cls.CATEGORY_CODES[category] if COMPACT_STORAGE else category.value
+
+    @classmethod
+    def decode_category(cls, value: str | int) -> Category:
+        if COMPACT_STORAGE and isinstance(value, int):
+            return cls.CODE_CATEGORIES[value]
+
+        return cls.Category.parse(value)
+
+    @classmethod
+    def _path(cls, field: str) -> str:
+        """Path of the transaction field in aggregation expressions."""
+
+        return f"${stored_name(field)}"
+
+    @classmethod
+    def _category_or_unknown(cls) -> dict:
+        return {
+            "$ifNull": [
+                cls._path("category"),
+                cls.encode_category(cls.Category.UNKNOWN),
+            ]
+        }
+
+    @classmethod
+    def to_documents(cls, rows: Sequence[ParsedTransaction]) -> list[dict]:
+        """Convert parsed rows to raw documents validating them by columns.
+
+        Instead of the model validation of every row, only distinct
+        types of values are checked for each column of the batch.
+        """
+
+        columns = {
+            "tg_id": (int,),
+            "bank": (str,),
+            "timestamp": (datetime,),
+            "amount": (float, int),
+            "type": (cls.Type,),
+            "currency": (cls.Currency,),
+            "category": (cls.Category, NoneType),
+            "category_source": (cls.CategorySource, NoneType),
+            "account_number": (str, NoneType),
+            "description": (str, NoneType),
+            "fingerprint": (str, NoneType),
+        }
+
+        for column, types in columns.items():
+            if invalid := {type(getattr(row, column)) for row in rows}.difference(
+                types
+            ):
+                raise ValueError(
+                    f"Invalid {column} types: {', '.join(t.__name__ for t in invalid)}"
+                )
+
+        if not COMPACT_STORAGE:
+            return [
                 {
-                    "$match": {
-                        "tg_id": tg_id,
-                        "timestamp": {"$gte": start_date, "$lte": end_date},
-                    }
-                },
+                    "tg_id": row.tg_id,
+                    "bank": row.bank,
+                    "timestamp": row.timestamp,
+                    "amount": row.amount,
+                    "type": row.type.value,
+                    "currency": row.currency.value,
+                    "category": row.category and row.category.value,
+                    "category_source": row.category_source
+                    and row.category_source.value,
+                    "account_number": row.account_number,
+                    "description": row.description,
+                    "fingerprint": row.fingerprint,
+                    "merchant": normalize_merchant(row.description),
+                }
+                for row in rows
+            ]
+
+        fields = COMPACT_FIELDS
+
+        return [
+            {
+                fields["tg_id"]: row.tg_id,
+                fields["bank"]: row.bank,
+                fields["timestamp"]: row.timestamp,
+                fields["amount"]: round(row.amount * MINOR_UNITS),
+                fields["type"]: row.type.value,
+                fields["currency"]: row.currency.value,
+                fields["category"]: cls.encode_category(row.category),
+                fields["category_source"]: row.category_source
+                and row.category_source.value,
+                fields["account_number"]: row.account_number,
+                fields["description"]: row.description,
+                fields["fingerprint"]: row.fingerprint,
+                fields["merchant"]: normalize_merchant(row.description),
+            }
+            for row in rows
+        ]
+
+    @classmethod
+    async def insert_parsed(
+        cls, rows: Sequence[ParsedTransaction], ordered: bool = False
+    ) -> int:
+        """Insert parsed rows bypassing the construction of documents.
+
+        Rows which were already imported are skipped and only the number
+        of actually inserted transactions is returned.
+        """
+
+        documents = cls.to_documents(rows)
+
+        if TIMESERIES_COLLECTION:
+            documents = await cls._skip_imported(documents)
+
+            if not documents:
+                return 0
+
+        try:
+            await cls.get_motor_collection().insert_many(documents, ordered=ordered)
+        except BulkWriteError as error:
+            write_errors = error.details["writeErrors"]
+
+            if error.details.get("writeConcernErrors") or any(
+                write_error["code"] != DUPLICATE_KEY_ERROR
+                for write_error in write_errors
+            ):
+                raise
+
+            if ordered:
+                documents = documents[: error.details["nInserted"]]
+            else:
+                failed = {write_error["index"] for write_error in write_errors}
+                documents = [
+                    document
+                    for index, document in enumerate(documents)
+                    if index not in failed
+                ]
+
+        await cls._increment_rollups(cls._get_daily_totals(documents))
+        report_cache.invalidate(
+            document[stored_name("tg_id")] for document in documents
+        )
+
+        return len(documents)
+
+    @classmethod
+    async def _skip_imported(cls, documents: list[dict]) -> list[dict]:
+        """Drop documents whose fingerprints are already stored.
+
+        Used instead of the unique index which time-series collections
+        don't support. Duplicates within the documents are dropped as well.
+        """
+
+        tg_id, fingerprint = stored_name("tg_id"), stored_name("fingerprint")
+        fingerprints = {
+            document[fingerprint]
+            for document in documents
+            if document.get(fingerprint) is not None
+        }
+
+        seen = set()
+
+        if fingerprints:
+            cursor = cls.get_motor_collection().find(
                 {
-                    "$addFields": {
-                        "category": {
-                            "$ifNull": ["$category", str(cls.Category.UNKNOWN)]
-                        }
-                    }
+                    tg_id: {"$in": list({document[tg_id] for document in documents})},
+                    fingerprint: {"$in": list(fingerprints)},
                 },
+                {"_id": 0, fingerprint: 1},
+            )
+            seen = {document[fingerprint] async for document in cursor}
+
+        result = []
+
+        for document in documents:
+            if document.get(fingerprint) is None:
+                result.append(document)
+            elif document[fingerprint] not in seen:
+                seen.add(document[fingerprint])
+                result.append(document)
+
+        return result
+
+    @classmethod
+    async def set_category(
+        cls,
+        filters: dict,
+        category: Category,
+        source: Optional[CategorySource] = None,
+    ) -> int:
+        """Set the category of matched transactions keeping rollups in sync."""
+
+        token = ObjectId()
+        result = await cls.get_motor_collection().update_many(
+            {"$and": [filters, {CLAIM_FIELD: {"$exists": False}}]},
+            cls._claim_update(token, category, source),
+        )
+
+        await cls._apply_claimed(token, result.modified_count)
+
+        return result.modified_count
+
+    @classmethod
+    async def set_categories(
+        cls,
+        classified: Sequence[tuple[dict, Category]],
+        source: Optional[CategorySource] = None,
+    ) -> int:
+        """Set categories of stored documents keeping rollups in sync.
+
+        Each document is updated only if its category is still the same,
+        rollups are changed only by documents which were updated.
+        """
+
+        category = stored_name("category")
+        token = ObjectId()
+
+        result = await cls.get_motor_collection().bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": document["_id"],
+                        category: document.get(category),
+                        CLAIM_FIELD: {"$exists": False},
+                    },
+                    cls._claim_update(token, new_category, source),
+                )
+                for document, new_category in classified
+            ],
+            ordered=False,
+        )
+
+        await cls._apply_claimed(token, result.modified_count)
+
+        return result.modified_count
+
+    @classmethod
+    def _claim_update(
+        cls, token: ObjectId, category: Category, source: Optional[CategorySource]
+    ) -> list[dict]:
+        """Update setting the category, which keeps the previous one.
+
+        Concurrent writers skip claimed transactions, so every change of
+        a category is counted in rollups exactly once by its writer.
+        """
+
+        return [
+            {
+                "$set": {
+                    CLAIM_FIELD: token,
+                    PREVIOUS_CATEGORY_FIELD: cls._path("category"),
+                    stored_name("category"): {
+                        "$literal": cls.encode_category(category)
+                    },
+                    stored_name("category_source"): {
+                        "$literal": source and source.value
+                    },
+                }
+            }
+        ]
+
+    @classmethod
+    async def _apply_claimed(cls, token: ObjectId, modified: int):
+        """Move totals of claimed transactions between categories and release them."""
+
+        if not modified:
+            return
+
+        filters = {CLAIM_FIELD: token}
+        (previous, _), (current, _) = await asyncio.gather(
+            cls._aggregate_daily_totals(filters, f"${PREVIOUS_CATEGORY_FIELD}"),
+            cls._aggregate_daily_totals(filters),
+        )
+
+        await cls._increment_rollups([*cls._negate_totals(previous), *current])
+        await cls.get_motor_collection().update_many(
+            filters, {"$unset": {CLAIM_FIELD: "", PREVIOUS_CATEGORY_FIELD: ""}}
+        )
+        report_cache.invalidate(total["tg_id"] for total in current)
+
+    @classmethod
+    async def delete_transactions(cls, filters: dict) -> int:
+        """Delete matched transactions keeping rollups in sync."""
+
+        totals, last_id = await cls._aggregate_daily_totals(filters)
+
+        if last_id is None:
+            return 0
+
+        result = await cls.get_motor_collection().delete_many(
+            {"$and": [filters, {"_id": {"$lte": last_id}}]}
+        )
+
+        await cls._increment_rollups(cls._negate_totals(totals))
+        report_cache.invalidate(total["tg_id"] for total in totals)
+
+        return result.deleted_count
+
+    @classmethod
+    async def rebuild_rollups(cls, tg_id: Optional[int] = None):
+        """Calculate rollups from scratch, e.g. for existing transactions."""
+
+        filters = {} if tg_id is None else {"tg_id": tg_id}
+        totals, _ = await cls._aggregate_daily_totals(
+            {} if tg_id is None else {stored_name("tg_id"): tg_id}
+        )
+
+        await asyncio.gather(
+            DailyRollup.get_motor_collection().delete_many(filters),
+            MonthlyRollup.get_motor_collection().delete_many(filters),
+        )
+        await cls._increment_rollups(totals)
+        report_cache.invalidate(total["tg_id"] for total in totals)
+
+    @classmethod
+    async def backfill_rollups(cls) -> list[int]:
+        """Build rollups of users whose transactions were stored before them.
+
+        Reports take whole months from rollups only, so such transactions
+        would be missing from them. Returns ids of the rebuilt users.
+        """
+
+        users, rolled_up = await asyncio.gather(
+            cls.get_motor_collection().distinct(stored_name("tg_id")),
+            MonthlyRollup.get_motor_collection().distinct("tg_id"),
+        )
+        missing = sorted(set(users) - set(rolled_up))
+
+        for tg_id in missing:
+            await cls.rebuild_rollups(tg_id)
+
+        return missing
+
+    @classmethod
+    async def _increment_rollups(cls, daily_totals: Sequence[dict]):
+        """Add daily totals to daily rollups and their sums to monthly ones."""
+
+        monthly_totals = defaultdict(lambda: [0.0, 0])
+
+        for total in daily_totals:
+            monthly_total = monthly_totals[
+                (
+                    total["tg_id"],
+                    cls._get_month(total["day"]),
+                    total["type"],
+                    total["currency"],
+                    total["category"],
+                )
+            ]
+            monthly_total[0] += total["amount"]
+            monthly_total[1] += total["transactions"]
+
+        await asyncio.gather(
+            DailyRollup.increment(daily_totals),
+            MonthlyRollup.increment(cls._to_totals(MonthlyRollup, monthly_totals)),
+        )
+
+    @staticmethod
+    def _to_totals(rollup: "type[Rollup]", totals: dict[tuple, list]) -> list[dict]:
+        return [
+            {
+                **dict(zip(rollup.key(), key)),
+                "amount": amount,
+                "transactions": transactions,
+            }
+            for key, (amount, transactions) in totals.items()
+            if transactions
+        ]
+
+    @staticmethod
+    def _negate_totals(totals: Sequence[dict]) -> list[dict]:
+        return [
+            {
+                **total,
+                "amount": -total["amount"],
+                "transactions": -total["transactions"],
+            }
+            for total in totals
+        ]
+
+    @classmethod
+    def _get_daily_totals(cls, documents: Sequence[dict]) -> list[dict]:
+        totals = defaultdict(lambda: [0.0, 0])
+
+        tg_id, timestamp, type_, currency, category, amount = map(
+            stored_name,
+            ("tg_id", "timestamp", "type", "currency", "category", "amount"),
+        )
+
+        for document in documents:
+            total = totals[
+                (
+                    document[tg_id],
+                    cls._get_day(document[timestamp]),
+                    document[type_],
+                    document[currency],
+                    document[category],
+                )
+            ]
+            total[0] += document[amount]
+            total[1] += 1
+
+        return cls._to_totals(
+            DailyRollup,
+            {
+                (tg_id, day, type_, currency, cls._decode_rollup_category(category)): [
+                    cls.decode_amount(amount),
+                    transactions,
+                ]
+                for (tg_id, day, type_, currency, category), (
+                    amount,
+                    transactions,
+                ) in totals.items()
+            },
+        )
+
+    @classmethod
+    def _decode_rollup_category(cls, value: Optional[str | int]) -> str:
+        """Category of rollups, which are always stored by names."""
+
+        if value is None:
+            return str(cls.Category.UNKNOWN)
+
+        return str(cls.decode_category(value))
+
+    @classmethod
+    async def _aggregate_daily_totals(
+        cls, filters: dict, category_path: Optional[str] = None
+    ) -> tuple[list[dict], Optional[PydanticObjectId]]:
+        """Daily totals of matched transactions and the greatest of their ids."""
+
+        result = await cls.aggregate(
+            [
+                {"$match": filters},
                 {
                     "$group": {
                         "_id": {
-                            "category": "$category",
-                            "type": "$type",
-                            "currency": "$currency",
+                            "tg_id": cls._path("tg_id"),
+                            "day": {
+                                "$dateFromParts": {
+                                    "year": {"$year": cls._path("timestamp")},
+                                    "month": {"$month": cls._path("timestamp")},
+                                    "day": {"$dayOfMonth": cls._path("timestamp")},
+                                }
+                            },
+                            "type": cls._path("type"),
+                            "currency": cls._path("currency"),
+                            "category": category_path or cls._path("category"),
                         },
-                        "total_amount": {"$sum": "$amount"},
+                        "amount": {"$sum": cls._path("amount")},
+                        "transactions": {"$sum": 1},
+                        "last_id": {"$max": "$_id"},
+                    }
+                },
+            ]
+        ).to_list()
+
+        return (
+            [
+                {
+                    **record["_id"],
+                    "category": cls._decode_rollup_category(record["_id"]["category"]),
+                    "amount": cls.decode_amount(record["amount"]),
+                    "transactions": record["transactions"],
+                }
+                for record in result
+            ],
+            max((record["last_id"] for record in result), default=None),
+        )
+
+    @staticmethod
+    def _get_day(timestamp: datetime) -> datetime:
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _get_month(timestamp: datetime) -> datetime:
+        return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def _get_whole_months(
+        cls, start_date: datetime, end_date: datetime
+    ) -> tuple[datetime, datetime]:
+        """Range of months, which are fully covered by the period."""
+
+        next_month = Granularity.MONTH.next
+
+        first_month = cls._get_month(start_date)
+
+        if first_month < start_date:
+            first_month = next_month(first_month)
+
+        # Months are stored with the precision of milliseconds
+        last_month = cls._get_month(end_date)
+
+        if next_month(last_month) - timedelta(milliseconds=1) <= end_date:
+            last_month = next_month(last_month)
+
+        return first_month, max(first_month, last_month)
+
+    @classmethod
+    def _split_period(
+        cls, start_date: datetime, end_date: datetime
+    ) -> tuple[Optional[tuple[datetime, datetime]], list[dict]]:
+        """Split the period into whole months and ranges of days at the edges.
+
+        Whole months are taken from rollups and only the edges of the period
+        are aggregated from transactions.
+        """
+
+        first_month, last_month = cls._get_whole_months(start_date, end_date)
+
+        if first_month == last_month:
+            return None, [{"$gte": start_date, "$lte": end_date}]
+
+        edges = []
+
+        if start_date < first_month:
+            edges.append({"$gte": start_date, "$lt": first_month})
+        if last_month <= end_date:
+            edges.append({"$gte": last_month, "$lte": end_date})
+
+        return (first_month, last_month), edges
+
+    @classmethod
+    def _get_report_pipeline(
+        cls, tg_id: UserIds, edges: Sequence[list[dict]]
+    ) -> list[dict]:
+        """Aggregation of edges of all periods in a single pass.
+
+        The union of edges is matched once and split into periods by $facet,
+        so the index range of the user is scanned only once.
+        """
+
+        def group(ranges: list[dict]) -> list[dict]:
+            return [
+                {
+                    "$match": {
+                        "$or": [{stored_name("timestamp"): period} for period in ranges]
                     }
                 },
                 {
                     "$group": {
                         "_id": {
-                            "type": "$_id.type",
-                            "currency": "$_id.currency",
-                        },
-                        "categories": {
-                            "$push": {
-                                "category": "$_id.category",
-                                "total_amount": "$total_amount",
-                            }
+                            "category": cls._category_or_unknown(),
+                            "type": cls._path("type"),
+                            "currency": cls._path("currency"),
                         },
+                        "total_amount": {"$sum": cls._path("amount")},
                     }
                 },
             ]
-        ).to_list()
 
+        return [
+            {
+                "$match": {
+                    stored_name("tg_id"): cls._match_users(tg_id),
+                    "$or": [
+                        {stored_name("timestamp"): period}
+                        for ranges in edges
+                        for period in ranges
+                    ],
+                }
+            },
+            {
+                "$facet": {
+                    str(index): group(ranges)
+                    for index, ranges in enumerate(edges)
+                    if ranges
+                }
+            },
+        ]
+
+    @staticmethod
+    def _match_users(tg_id: UserIds) -> int | dict:
+        """Condition on the user or on all members of the household."""
+
+        if isinstance(tg_id, int):
+            return tg_id
+
+        return tg_id[0] if len(tg_id) == 1 else {"$in": list(tg_id)}
+
+    @classmethod
+    async def get_report(
+        cls, tg_id: UserIds, start_date: datetime, end_date: datetime
+    ) -> Report:
+        """Report of the user or the household for the period.
+
+        Repeated reports are cached.
+        """
+
+        (report,) = await cls.get_reports(tg_id, [(start_date, end_date)])
+
+        return report
+
+    @classmethod
+    async def get_reports(
+        cls, tg_id: UserIds, periods: Sequence[tuple[datetime, datetime]]
+    ) -> list[Report]:
+        """Reports of the user for several periods in one round trip.
+
+        Cached reports are reused and the rest are aggregated together.
+        """
+
+        generation = report_cache.generation(tg_id)
+        keys = [report_cache.key(tg_id, *period) for period in periods]
+        reports = [report_cache.get(key) for key in keys]
+
+        if missing := [index for index, report in enumerate(reports) if report is None]:
+            aggregated = await cls._aggregate_reports(
+                tg_id, [periods[index] for index in missing]
+            )
+
+            for index, report in zip(missing, aggregated):
+                reports[index] = report
+                report_cache.put(keys[index], report, generation)
+
+        return reports
+
+    @classmethod
+    async def _aggregate_reports(
+        cls, tg_id: UserIds, periods: Sequence[tuple[datetime, datetime]]
+    ) -> list[Report]:
+        months, edges = zip(
+            *(
+                cls._split_period(start_date, end_date)
+                for start_date, end_date in periods
+            )
+        )
+
+        async def get_rollups() -> list[MonthlyRollup]:
+            if not (ranges := [month for month in months if month is not None]):
+                return []
+
+            return await MonthlyRollup.find(
+                {
+                    "tg_id": cls._match_users(tg_id),
+                    "$or": [
+                        {"month": {"$gte": first_month, "$lt": last_month}}
+                        for first_month, last_month in ranges
+                    ],
+                }
+            ).to_list()
+
+        async def get_edge_totals() -> dict:
+            if not any(edges):
+                return {}
+
+            (result,) = await cls.aggregate(
+                cls._get_report_pipeline(tg_id, edges)
+            ).to_list()
+
+            return result
+
+        rollups, edge_totals = await asyncio.gather(get_rollups(), get_edge_totals())
+
+        reports = []
+
+        for index, month_range in enumerate(months):
+            totals = [
+                (rollup.type, rollup.currency, rollup.category, rollup.amount)
+                for rollup in rollups
+                if month_range is not None
+                and month_range[0] <= rollup.month < month_range[1]
+            ]
+            totals.extend(
+                (
+                    record["_id"]["type"],
+                    record["_id"]["currency"],
+                    cls._decode_rollup_category(record["_id"]["category"]),
+                    cls.decode_amount(record["total_amount"]),
+                )
+                for record in edge_totals.get(str(index), [])
+            )
+
+            reports.append(cls._build_report(totals))
+
+        return reports
+
+    @classmethod
+    async def get_range_report(
+        cls, tg_id: UserIds, start_date: date, end_date: date
+    ) -> Report:
+        """Report of the user for the range of days inclusive.
+
+        It's answered from prefix sums of daily rollups, which are loaded
+        once and reused until transactions of the user change.
+        """
+
+        key = (tg_id,)
+        generation = prefix_sums_cache.generation(tg_id)
+
+        if (prefix_sums := prefix_sums_cache.get(key)) is None:
+            prefix_sums = PrefixSums.build(
+                await DailyRollup.get_motor_collection()
+                .find(
+                    {"tg_id": cls._match_users(tg_id)},
+                    {
+                        "_id": 0,
+                        "day": 1,
+                        "type": 1,
+                        "currency": 1,
+                        "category": 1,
+                        "amount": 1,
+                    },
+                )
+                .sort("day")
+                .to_list(None)
+            )
+            prefix_sums_cache.put(key, prefix_sums, generation)
+
+        return cls._build_report(prefix_sums.totals(start_date, end_date))
+
+    @classmethod
+    def _build_report(cls, totals: Iterable[tuple[str, str, str, float]]) -> Report:
         income = defaultdict(lambda: defaultdict(float))
         expenses = defaultdict(lambda: defaultdict(float))
 
-        for record in result:
-            operation = cls.Type.parse(record["_id"]["type"])
-            currency = cls.Currency.parse(record["_id"]["currency"])
-
-            for category_record in record["categories"]:
-                amount = category_record["total_amount"]
-                category = Transaction.Category.parse(category_record["category"])
+        for operation, currency, category, amount in totals:
+            operation = cls.Type.parse(operation)
+            currency = cls.Currency.parse(currency)
+            category = Transaction.Category.parse(category)
 
-                if operation == cls.Type.credit:
-                    income[currency][category] += amount
-                elif operation == cls.Type.debit:
-                    expenses[currency][category] += amount
+            if operation == cls.Type.credit:
+                income[currency][category] += amount
+            elif operation == cls.Type.debit:
+                expenses[currency][category] += amount
 
         return Report(income=dict(income), expenses=dict(expenses))
 
     @classmethod
     async def get_analytics(
         cls,
-        tg_id: int,
+        tg_id: UserIds,
         original: tuple[datetime, datetime],
         compared: tuple[datetime, datetime],
     ) -> Analytics:
@@ -174,19 +1156,101 @@ class Transaction(Document):
         assert compared_period_start < compared_period_end
         assert compared_period_end <= original_period_start
 
-        original_period, compared_period = await asyncio.gather(
-            cls.get_report(
-                tg_id=tg_id,
-                start_date=original_period_start,
-                end_date=original_period_end,
-            ),
-            cls.get_report(
-                tg_id=tg_id,
-                start_date=compared_period_start,
-                end_date=compared_period_end,
-            ),
+        original_period, compared_period = await cls.get_reports(
+            tg_id, [original, compared]
         )
 
         return Analytics(
             original_period=original_period, compared_period=compared_period
         )
+
+    @classmethod
+    async def get_trend(
+        cls,
+        tg_id: UserIds,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity = Granularity.MONTH,
+    ) -> Trend:
+        """Totals of the period bucketed by day, week or month.
+
+        Buckets are calculated by the server in a single pass over the
+        index range of the user.
+        """
+
+        granularity = Granularity(granularity)
+
+        result = await cls.aggregate(
+            [
+                {
+                    "$match": {
+                        stored_name("tg_id"): cls._match_users(tg_id),
+                        stored_name("timestamp"): {
+                            "$gte": start_date,
+                            "$lte": end_date,
+                        },
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": {
+                            "bucket": {
+                                "$dateTrunc": {
+                                    "date": cls._path("timestamp"),
+                                    "unit": str(granularity),
+                                    "startOfWeek": "monday",
+                                }
+                            },
+                            "type": cls._path("type"),
+                            "currency": cls._path("currency"),
+                            "category": cls._category_or_unknown(),
+                        },
+                        "total_amount": {"$sum": cls._path("amount")},
+                    }
+                },
+            ]
+        ).to_list()
+
+        buckets = []
+        bucket = granularity.truncate(start_date)
+
+        while bucket <= end_date:
+            buckets.append(bucket)
+            bucket = granularity.next(bucket)
+
+        positions = {bucket: index for index, bucket in enumerate(buckets)}
+        series = {}
+
+        for record in result:
+            key = (
+                cls.Type.parse(record["_id"]["type"]),
+                cls.Currency.parse(record["_id"]["currency"]),
+                cls.decode_category(record["_id"]["category"]),
+            )
+
+            if key not in series:
+                series[key] = array("d", bytes(8 * len(buckets)))
+
+            series[key][positions[record["_id"]["bucket"]]] += cls.decode_amount(
+                record["total_amount"]
+            )
+
+        return Trend(granularity=granularity, buckets=buckets, series=series)
+
+
+def decode_compact_document(data):
+    """Decode amounts and categories of transactions loaded from the collection.
+
+    Only stored names are decoded, values passed by field names are taken
+    as they are. It's used by models validating stored transactions.
+    """
+
+    if COMPACT_STORAGE and isinstance(data, dict):
+        data = dict(data)
+
+        if (amount := data.get(COMPACT_FIELDS["amount"])) is not None:
+            data[COMPACT_FIELDS["amount"]] = Transaction.decode_amount(amount)
+        if (category := data.get(COMPACT_FIELDS["category"])) is not None:
+            data[COMPACT_FIELDS["category"]] = Transaction.decode_category(category)
+
+    return data
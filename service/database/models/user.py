@@ -1,7 +1,10 @@
 from typing import Optional
 
-from beanie import Document, Indexed
+from beanie import Document, Indexed, UpdateResponse
 from beanie.odm.operators.update.general import Set
+from pymongo import ASCENDING, IndexModel
+
+from database.identity import identity_cache
 
 
 class User(Document):
@@ -12,23 +15,72 @@ class User(Document):
     language_code: Optional[str] = None
     accepted_invite_code: Optional[str] = None
 
+    class Settings:
+        # See database.indexes
+        background_indexes = [
+            # Members of households, see database.household
+            IndexModel(
+                [("accepted_invite_code", ASCENDING)],
+                name="accepted_invite_code",
+                partialFilterExpression={"accepted_invite_code": {"$type": "string"}},
+            )
+        ]
+
+    @classmethod
+    async def find_by_tg_id(cls, tg_id: int) -> Optional["User"]:
+        if (user := identity_cache.get_user(tg_id)) is not None:
+            return user
+
+        if (user := await cls.find_one(cls.tg_id == tg_id)) is not None:
+            identity_cache.put_user(user)
+
+        return user
+
+    def is_stored_as(self, user: Optional["User"]) -> bool:
+        """Whether the upsert of the user wouldn't change the stored one."""
+
+        return (
+            user is not None
+            and self.first_name == user.first_name
+            and self.last_name == user.last_name
+            and self.username == user.username
+            and self.language_code == user.language_code
+            and self.accepted_invite_code in (None, user.accepted_invite_code)
+        )
+
     async def insert_or_update(self) -> "User":
-        await User.find_one(User.tg_id == self.tg_id).upsert(
-            Set(
-                {
-                    User.first_name: self.first_name,
-                    User.last_name: self.last_name,
-                    User.username: self.username,
-                    User.language_code: self.language_code,
-                }
-            ),
+        """Insert or update the user, the accepted invite is kept if not given.
+
+        The upsert is skipped if the cached user has the same profile.
+        """
+
+        if self.is_stored_as(identity_cache.get_user(self.tg_id)):
+            return self
+
+        fields = {
+            User.first_name: self.first_name,
+            User.last_name: self.last_name,
+            User.username: self.username,
+            User.language_code: self.language_code,
+        }
+
+        if self.accepted_invite_code is not None:
+            fields[User.accepted_invite_code] = self.accepted_invite_code
+
+        stored = await User.find_one(User.tg_id == self.tg_id).upsert(
+            Set(fields),
             on_insert=User(
                 tg_id=self.tg_id,
                 first_name=self.first_name,
                 last_name=self.last_name,
                 username=self.username,
                 language_code=self.language_code,
+                accepted_invite_code=self.accepted_invite_code,
             ),
+            response_type=UpdateResponse.NEW_DOCUMENT,
         )
 
+        if stored is not None:
+            identity_cache.put_user(stored)
+
         return self
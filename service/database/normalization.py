@@ -0,0 +1,31 @@
+"""Normalization of bank descriptions into keys of merchants.
+
+Descriptions of the same merchant differ in dates, times, amounts and
+masked card numbers, so they are removed and the rest is lowercased with
+punctuation collapsed into single spaces, e.g. both
+"WOLT LT 2024-01-10 12:30 **1234" and "Wolt lt, 12.50" become "wolt lt".
+"""
+
+import re
+from typing import Optional
+
+NOISE = re.compile(
+    r"\d{4}-\d{2}-\d{2}"  # ISO dates
+    r"|\d{1,2}[./]\d{1,2}[./]\d{2,4}"  # local dates
+    r"|\d{1,2}:\d{2}(?::\d{2})?"  # times
+    r"|\d+[.,]\d{2}\b"  # amounts
+    r"|[*x]{2,}\d+",  # masked card numbers
+    re.IGNORECASE,
+)
+SEPARATORS = re.compile(r"[^\w&']+")
+
+
+def normalize_merchant(description: Optional[str]) -> Optional[str]:
+    """Key of the merchant of the description, None if nothing is left."""
+
+    if not description:
+        return None
+
+    key = SEPARATORS.sub(" ", NOISE.sub(" ", description.lower())).strip()
+
+    return key or None
@@ -0,0 +1,65 @@
+"""Prefix sums of daily rollups for reports of arbitrary ranges of days.
+
+Sums are cumulative totals of the user per (type, currency, category) for
+every day with transactions. The total of any range of days is a
+difference of two prefix entries found by a binary search.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Iterator, TypeAlias
+
+PrefixKey: TypeAlias = tuple[str, str, str]
+
+
+@dataclass
+class PrefixSums:
+    # Ordinals of days with transactions in ascending order
+    days: array
+    # Sums of all days before the one of the same index, so the last one
+    # is the total of all days
+    sums: dict[PrefixKey, array]
+
+    @classmethod
+    def build(cls, rollups: Iterable[dict]) -> "PrefixSums":
+        """Build sums from daily rollups sorted by day."""
+
+        days = array("q")
+        amounts = defaultdict(lambda: defaultdict(float))
+
+        for rollup in rollups:
+            day = rollup["day"].toordinal()
+
+            if not days or days[-1] != day:
+                days.append(day)
+
+            key = (rollup["type"], rollup["currency"], rollup["category"])
+            amounts[key][len(days) - 1] += rollup["amount"]
+
+        sums = {}
+
+        for key, daily_amounts in amounts.items():
+            prefix = sums[key] = array("d", bytes(8 * (len(days) + 1)))
+
+            for index in range(len(days)):
+                prefix[index + 1] = prefix[index] + daily_amounts.get(index, 0.0)
+
+        return cls(days=days, sums=sums)
+
+    def totals(
+        self, start_date: date, end_date: date
+    ) -> Iterator[tuple[str, str, str, float]]:
+        """Totals of days from the start to the end date inclusive."""
+
+        start = bisect_left(self.days, start_date.toordinal())
+        end = bisect_right(self.days, end_date.toordinal())
+
+        if start >= end:
+            return
+
+        for (operation, currency, category), prefix in self.sums.items():
+            if amount := prefix[end] - prefix[start]:
+                yield operation, currency, category, amount
@@ -0,0 +1,40 @@
+"""Rebuild daily and monthly rollups from stored transactions.
+
+Rollups are maintained incrementally and ones of users with transactions
+imported before rollups existed are built on the start of the bot, so the
+rebuild is only needed to repair them:
+
+    python -m database.rollups [--tg-id TG_ID]
+"""
+
+import argparse
+import asyncio
+import logging.config
+
+from config import settings
+from database.models import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    from database.core import init as database_init, close as database_close
+
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tg-id", type=int)
+    arguments = parser.parse_args()
+
+    await database_init(build_indexes=False)
+
+    try:
+        await Transaction.rebuild_rollups(arguments.tg_id)
+    finally:
+        await database_close()
+
+    logger.info("Rollups were rebuilt")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
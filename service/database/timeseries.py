@@ -0,0 +1,130 @@
+"""Move stored transactions to the collection type of TRANSACTION_COLLECTION.
+
+Time-series collections can't be renamed, so the transactions are kept
+in a regular backup collection first and copied by $out from there into
+a new collection of the configured type in place of the current one.
+It's done before the initialization of Beanie, which would fail to create
+indexes of the other collection type, declared indexes are built afterwards.
+$out into a time-series collection needs MongoDB 7.0.3+:
+
+    TRANSACTION_COLLECTION=timeseries python -m database.timeseries
+"""
+
+import argparse
+import asyncio
+import logging.config
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from config import settings
+from database.models import Transaction
+from database.models.transaction import TIMESERIES_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+
+async def is_timeseries(collection: AsyncIOMotorCollection) -> Optional[bool]:
+    """Whether it's a time-series collection, None if it doesn't exist."""
+
+    cursor = await collection.database.list_collections(
+        filter={"name": collection.name}
+    )
+
+    async for info in cursor:
+        return info["type"] == "timeseries"
+
+    return None
+
+
+def get_out_stage(collection: AsyncIOMotorCollection) -> dict:
+    if not TIMESERIES_COLLECTION:
+        return {"$out": collection.name}
+
+    options = Transaction.Settings.timeseries
+
+    return {
+        "$out": {
+            "db": collection.database.name,
+            "coll": collection.name,
+            "timeseries": {
+                "timeField": options.time_field,
+                "metaField": options.meta_field,
+                "granularity": options.granularity.value,
+            },
+        }
+    }
+
+
+async def migrate(
+    collection: AsyncIOMotorCollection, backup: str, timeseries: bool
+) -> int:
+    """Copy transactions into a collection of the configured type.
+
+    The backup has to be removed manually once the result is checked.
+    Returns the number of transactions in the new collection.
+    """
+
+    database = collection.database
+
+    if await is_timeseries(database[backup]) is not None:
+        raise RuntimeError(f"Backup collection {backup} already exists")
+
+    if timeseries:
+        await collection.aggregate([{"$out": backup}]).to_list(None)
+        await collection.drop()
+    else:
+        await collection.rename(backup)
+
+    await database[backup].aggregate([get_out_stage(collection)]).to_list(None)
+
+    return await collection.count_documents({})
+
+
+async def main():
+    from database.client import get_client
+    from database.core import init as database_init, close as database_close
+    from database.indexes import sync_indexes
+
+    logging.config.dictConfig(settings.LOGGING_CONFIG)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", default=Transaction.__name__)
+    parser.add_argument(
+        "--backup",
+        help="Name of the collection the current transactions are kept in",
+    )
+    arguments = parser.parse_args()
+
+    collection = get_client().get_default_database()[arguments.collection]
+
+    try:
+        timeseries = await is_timeseries(collection)
+
+        if timeseries in (TIMESERIES_COLLECTION, None):
+            logger.info(
+                "Transactions are already in a %s collection",
+                settings.TRANSACTION_COLLECTION,
+            )
+        else:
+            backup = arguments.backup or f"{collection.name}_backup"
+            migrated = await migrate(collection, backup, timeseries)
+
+            logger.info(
+                "%s transactions were moved to a %s collection, "
+                "the previous one is kept as %s",
+                migrated,
+                settings.TRANSACTION_COLLECTION,
+                backup,
+            )
+
+        await database_init(build_indexes=False)
+
+        for plan in await sync_indexes(models=(Transaction,)):
+            logger.info("Indexes are in sync, %s", plan)
+    finally:
+        await database_close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -9,8 +9,9 @@ from aiogram.handlers import MessageHandler, CallbackQueryHandler
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.markdown import bold, italic
 
+from database.household import household_cache
 from database.models import Transaction
-from database.models.transaction import ReportEntry, Analytics
+from database.models.transaction import ReportEntry, Analytics, Granularity, Trend
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -23,6 +24,12 @@ class AnalyticsCallback(CallbackData, prefix="analytics"):
     compared_to_date: str
 
 
+class TrendCallback(CallbackData, prefix="trend"):
+    from_date: str
+    to_date: str
+    granularity: Granularity
+
+
 @router.message(Command("analytics"))
 class AnalyticsCommandHandler(MessageHandler):
     """Handler of the analytics command."""
@@ -78,6 +85,14 @@ class AnalyticsCommandHandler(MessageHandler):
         )
         compared_current_year_end = current_year_start
 
+        # Trends of the last 30 days, 12 weeks and 24 months
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        daily_trend_start = today - timedelta(days=29)
+        weekly_trend_start = today - timedelta(weeks=12)
+        monthly_trend_start = (current_month_start - timedelta(days=23 * 31)).replace(
+            day=1
+        )
+
         return InlineKeyboardMarkup(
             inline_keyboard=[
                 [
@@ -136,6 +151,21 @@ class AnalyticsCommandHandler(MessageHandler):
                         ).pack(),
                     ),
                 ],
+                [
+                    InlineKeyboardButton(
+                        text=text,
+                        callback_data=TrendCallback(
+                            from_date=trend_start.strftime("%Y-%m-%d"),
+                            to_date=now.strftime("%Y-%m-%d"),
+                            granularity=granularity,
+                        ).pack(),
+                    )
+                    for text, trend_start, granularity in (
+                        ("Daily trend", daily_trend_start, Granularity.DAY),
+                        ("Weekly trend", weekly_trend_start, Granularity.WEEK),
+                        ("Monthly trend", monthly_trend_start, Granularity.MONTH),
+                    )
+                ],
             ]
         )
 
@@ -166,7 +196,7 @@ class ReportCallbackHandler(CallbackQueryHandler):
             return await self.event.answer("Something get wrong")
 
         analytics = await Transaction.get_analytics(
-            self.from_user.id,
+            await household_cache.get_members(self.from_user.id),
             original=(original_from_date, original_to_date),
             compared=(compared_from_date, compared_to_date),
         )
@@ -241,3 +271,62 @@ class ReportCallbackHandler(CallbackQueryHandler):
                 )
 
         return "\n".join(result)
+
+
+@router.callback_query(TrendCallback.filter())
+class TrendCallbackHandler(CallbackQueryHandler):
+    """Callback for selecting a trend of income and expenses."""
+
+    async def handle(self):
+        callback_data = TrendCallback.unpack(self.callback_data)
+
+        try:
+            from_date = datetime.strptime(callback_data.from_date, "%Y-%m-%d")
+            to_date = datetime.strptime(callback_data.to_date, "%Y-%m-%d")
+        except ValueError as error:
+            logger.error("parse date error", exc_info=error)
+
+            return await self.event.answer("Something get wrong")
+
+        # The last day is included in the trend completely
+        to_date = to_date.replace(hour=23, minute=59, second=59, microsecond=999000)
+
+        trend = await Transaction.get_trend(
+            await household_cache.get_members(self.from_user.id),
+            from_date,
+            to_date,
+            callback_data.granularity,
+        )
+
+        await self.bot.send_message(
+            chat_id=self.event.message.chat.id,
+            text=self._format_trend(trend),
+            parse_mode=ParseMode.MARKDOWN_V2,
+        )
+        await self.event.answer()
+
+    @staticmethod
+    def _format_trend(trend: Trend) -> str:
+        """Formats totals of income and expenses for each bucket."""
+
+        label_format = "%Y-%m" if trend.granularity == Granularity.MONTH else "%Y-%m-%d"
+        result = [bold(f"📈 Trend by {trend.granularity}s")]
+
+        if not trend.series:
+            result.append("\nThere are no transactions for the period")
+
+        for currency in trend.currencies():
+            income = trend.total(Transaction.Type.credit, currency)
+            expenses = trend.total(Transaction.Type.debit, currency)
+            result.append(f"\n💱 {bold(currency)}:")
+
+            for bucket, income_amount, expenses_amount in zip(
+                trend.buckets, income, expenses
+            ):
+                result.append(
+                    f" • {italic(bucket.strftime(label_format))}: "
+                    f"⬆️ {md.quote(str(round(income_amount, 2)))} "
+                    f"⬇️ {md.quote(str(round(expenses_amount, 2)))}"
+                )
+
+        return "\n".join(result)
@@ -1,18 +1,21 @@
 import logging
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime, timedelta
 
-from aiogram import Router, md
+from aiogram import Router, F, md
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
 from aiogram.filters.callback_data import CallbackData
+from aiogram.fsm.state import StatesGroup, State
 from aiogram.handlers import MessageHandler, CallbackQueryHandler
 from aiogram.types import (
     InlineKeyboardMarkup,
     InlineKeyboardButton,
 )
 
+from database.household import household_cache
 from database.models import Transaction
-from database.models.transaction import ReportEntry
+from database.models.transaction import Report, ReportEntry
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -23,6 +26,14 @@ class ReportCallback(CallbackData, prefix="report"):
     to_date: str
 
 
+class CustomReportCallback(CallbackData, prefix="custom_report"):
+    pass
+
+
+class CustomReport(StatesGroup):
+    selected_range = State()
+
+
 @router.message(Command("report"))
 class ReportCommandHandler(MessageHandler):
     """Handler of the report command."""
@@ -104,49 +115,41 @@ class ReportCommandHandler(MessageHandler):
                         ).pack(),
                     ),
                 ],
+                [
+                    InlineKeyboardButton(
+                        text="Custom range",
+                        callback_data=CustomReportCallback().pack(),
+                    ),
+                ],
             ]
         )
 
 
-@router.callback_query(ReportCallback.filter())
-class ReportCallbackHandler(CallbackQueryHandler):
-    """Callback for selecting a specific period for the report."""
-
-    async def handle(self):
-        callback_data = ReportCallback.unpack(self.callback_data)
-
-        try:
-            from_date = datetime.strptime(callback_data.from_date, "%Y-%m-%d")
-            to_date = datetime.strptime(callback_data.to_date, "%Y-%m-%d")
-        except ValueError as error:
-            logger.error("parse date error", exc_info=error)
-
-            return await self.event.answer("Something get wrong")
-
-        report = await Transaction.get_report(self.from_user.id, from_date, to_date)
+class ReportMessageMixin:
+    """Formatting of the report message shared by report handlers."""
 
-        await self.bot.send_message(
-            chat_id=self.event.message.chat.id,
-            text=(
-                "Here is your financial report from "
-                f"_{md.quote(callback_data.from_date)}_ to _{md.quote(callback_data.to_date)}_:"
-                "\n\n"
-                f"**Income** {md.quote(self._total_amount(report.income))}\n"
-                f"{md.quote(self._build_report(report.income))}"
-                "\n"
-                f"**Expenses** {md.quote(self._total_amount(report.expenses))}\n"
-                f"{md.quote(self._build_report(report.expenses))}"
-            ),
-            parse_mode=ParseMode.MARKDOWN_V2,
+    @classmethod
+    def _format_report(cls, report: Report, from_date: str, to_date: str) -> str:
+        return (
+            "Here is your financial report from "
+            f"_{md.quote(from_date)}_ to _{md.quote(to_date)}_:"
+            "\n\n"
+            f"**Income** {md.quote(cls._total_amount(report.income))}\n"
+            f"{md.quote(cls._build_report(report.income))}"
+            "\n"
+            f"**Expenses** {md.quote(cls._total_amount(report.expenses))}\n"
+            f"{md.quote(cls._build_report(report.expenses))}"
         )
-        await self.event.answer()
 
     @staticmethod
     def _build_report(entry: ReportEntry) -> str:
         max_length = max(
-            len(category)
-            for currency, categories in entry.items()
-            for category, amount in categories.items()
+            (
+                len(category)
+                for currency, categories in entry.items()
+                for category, amount in categories.items()
+            ),
+            default=0,
         )
 
         return (
@@ -166,6 +169,8 @@ class ReportCallbackHandler(CallbackQueryHandler):
         ]
 
         match len(results):
+            case 0:
+                return ""
             case 1:
                 return results.pop()
             case 2:
@@ -174,3 +179,92 @@ class ReportCallbackHandler(CallbackQueryHandler):
             case _:
                 *items, last = results
                 return f"{', '.join(items)} and {last}"
+
+
+@router.callback_query(ReportCallback.filter())
+class ReportCallbackHandler(ReportMessageMixin, CallbackQueryHandler):
+    """Callback for selecting a specific period for the report."""
+
+    async def handle(self):
+        callback_data = ReportCallback.unpack(self.callback_data)
+
+        try:
+            from_date = datetime.strptime(callback_data.from_date, "%Y-%m-%d")
+            to_date = datetime.strptime(callback_data.to_date, "%Y-%m-%d")
+        except ValueError as error:
+            logger.error("parse date error", exc_info=error)
+
+            return await self.event.answer("Something get wrong")
+
+        report = await Transaction.get_report(
+            await household_cache.get_members(self.from_user.id), from_date, to_date
+        )
+
+        await self.bot.send_message(
+            chat_id=self.event.message.chat.id,
+            text=self._format_report(
+                report, callback_data.from_date, callback_data.to_date
+            ),
+            parse_mode=ParseMode.MARKDOWN_V2,
+        )
+        await self.event.answer()
+
+
+@router.callback_query(CustomReportCallback.filter())
+class CustomReportCallbackHandler(CallbackQueryHandler):
+    """Callback for selecting a custom range of days for the report."""
+
+    async def handle(self):
+        await self.data["state"].set_state(CustomReport.selected_range)
+
+        await self.bot.send_message(
+            chat_id=self.event.message.chat.id,
+            text=(
+                "Please send the range of days for your report, "
+                "for example _2024\\-03\\-17 2024\\-08\\-02_"
+            ),
+            parse_mode=ParseMode.MARKDOWN_V2,
+        )
+        await self.event.answer()
+
+
+# Commands are left to their handlers, so they work in the middle of the input
+@router.message(CustomReport.selected_range, F.text, ~F.text.startswith("/"))
+class CustomReportHandler(ReportMessageMixin, MessageHandler):
+    """Handler of the custom range of days for the report."""
+
+    DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+    async def handle(self):
+        try:
+            from_date, to_date = self._parse_range(self.event.text)
+        except ValueError:
+            return await self.event.answer(
+                "Please send two dates in the format YYYY-MM-DD, "
+                "the first one can't be after the second one"
+            )
+
+        await self.data["state"].clear()
+
+        report = await Transaction.get_range_report(
+            await household_cache.get_members(self.from_user.id), from_date, to_date
+        )
+
+        await self.event.answer(
+            self._format_report(report, from_date.isoformat(), to_date.isoformat()),
+            parse_mode=ParseMode.MARKDOWN_V2,
+        )
+
+    @classmethod
+    def _parse_range(cls, text: str) -> tuple[date, date]:
+        match cls.DATE_PATTERN.findall(text):
+            case [from_date, to_date]:
+                from_date = date.fromisoformat(from_date)
+                to_date = date.fromisoformat(to_date)
+            case _:
+                raise ValueError(f"Unknown range {text}")
+
+        if from_date > to_date:
+            raise ValueError(f"Empty range {text}")
+
+        return from_date, to_date
@@ -3,6 +3,7 @@ from aiogram.enums import ParseMode
 from aiogram.filters import CommandStart
 from aiogram.handlers import MessageHandler
 
+from database.household import household_cache
 from database.models import User, Invite
 
 router = Router()
@@ -14,6 +15,10 @@ class StartCommandHandler(MessageHandler):
 
     async def handle(self):
         invitation_code = self.data["command"].args
+        invite = None
+
+        if invitation_code is not None:
+            invite = await Invite.find_by_code(invitation_code)
 
         await User(
             tg_id=self.from_user.id,
@@ -21,9 +26,13 @@ class StartCommandHandler(MessageHandler):
             last_name=self.from_user.last_name,
             username=self.from_user.username,
             language_code=self.from_user.language_code,
-            accepted_invite_code=invitation_code,
+            accepted_invite_code=invite.code if invite else None,
         ).insert_or_update()
 
+        if invite:
+            # Households of the user and of the inviter are merged
+            household_cache.clear()
+
         await self.event.answer(
             "Welcome to BudgetBuddy\\! 💰\n"
             "Your personal assistant for tracking expenses and income\n"
@@ -41,13 +50,8 @@ class StartCommandHandler(MessageHandler):
             parse_mode=ParseMode.MARKDOWN_V2,
         )
 
-        if invitation_code is not None:
-            invite = await Invite.find_one(Invite.code == invitation_code)
-
-            if not invite:
-                return
-
-            user = await User.find_one(User.tg_id == invite.tg_id)
+        if invite:
+            user = await User.find_by_tg_id(invite.tg_id)
 
             await self.event.answer(
                 f"Also you have been invited by _{user.first_name} {user.last_name}_ "
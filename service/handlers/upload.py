@@ -1,8 +1,11 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import UTC, datetime
 from pathlib import Path
-from itertools import batched
+from typing import AsyncIterator
 
 from aiogram import Router, F, md
+from beanie import PydanticObjectId
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
 from aiogram.fsm.state import StatesGroup, State
@@ -17,8 +20,11 @@ from aiogram.enums.content_type import ContentType
 
 from config import settings
 from bank_providers import BANK_PROVIDERS
-from bank_providers.errors import UnsupportedFileType
-from database.models import Transaction
+from bank_providers.base import DocumentSource
+from bank_providers.errors import BankProviderException
+from classifier.scheduler import schedule_classification
+from database.models import ImportedStatement
+from ingestion import IngestionPipeline, calculate_sha256
 
 router = Router()
 
@@ -96,39 +102,100 @@ class UploadBankStatementDocumentHandler(MessageHandler):
         data = await state.get_data()
         selected_bank = data["selected_bank"]
         bank_provider = BANK_PROVIDERS[selected_bank]
-        document_path = self._get_download_destination(selected_bank)
+        document = self.event.document
 
         async with ChatActionSender.typing(bot=self.bot, chat_id=self.event.chat.id):
-            await self.bot.download(
-                self.event.document.file_id, destination=document_path
-            )
-            await state.update_data(uploaded_file=str(document_path))
+            # The same file sent again is recognized without downloading it
+            if statement := await ImportedStatement.find_by_file(
+                self.from_user.id, document.file_unique_id
+            ):
+                await state.clear()
+
+                return await self._answer_already_imported(statement)
+
+            await state.update_data(uploaded_file=document.file_name)
 
             try:
-                amount = 0
-
-                for batch in batched(
-                    bank_provider(self.from_user.id, document_path).parse(), 256
-                ):
-                    amount += len(batch)
-                    await Transaction.insert_many(batch)
-            except UnsupportedFileType as error:
+                async with self._download(selected_bank) as source:
+                    sha256 = await asyncio.to_thread(calculate_sha256, source)
+
+                    if statement := await ImportedStatement.find_by_hash(
+                        self.from_user.id, sha256
+                    ):
+                        await state.clear()
+
+                        return await self._answer_already_imported(statement)
+
+                    first_id = PydanticObjectId()
+                    metrics = await IngestionPipeline().run(
+                        bank_provider,
+                        self.from_user.id,
+                        source,
+                        document.file_name,
+                        document.file_size,
+                    )
+                    last_id = PydanticObjectId()
+            except BankProviderException as error:
                 await self.event.answer(str(error))
             else:
                 await state.clear()
 
-                # Remove uploaded document from a disk
-                document_path.unlink(missing_ok=True)
-
-                if amount > 0:
-                    await self.event.answer(
-                        f"{amount} transactions were processed and saved"
-                    )
-                else:
-                    await self.event.answer(
+                if metrics.rows == 0:
+                    # Not recorded, so a fixed file can be uploaded again
+                    return await self.event.answer(
                         "There are no valid transactions in the file"
                     )
 
+                await ImportedStatement(
+                    tg_id=self.from_user.id,
+                    bank=selected_bank,
+                    file_unique_id=document.file_unique_id,
+                    sha256=sha256,
+                    rows=metrics.rows,
+                    inserted=metrics.inserted,
+                    first_id=first_id,
+                    last_id=last_id,
+                ).save_once()
+
+                if metrics.inserted > 0:
+                    schedule_classification(self.from_user.id, first_id, last_id)
+
+                await self.event.answer(
+                    f"{metrics.rows} transactions were processed and "
+                    f"{metrics.inserted} new of them were saved"
+                )
+
+    async def _answer_already_imported(self, statement: ImportedStatement):
+        await self.event.answer(
+            "This statement has already been uploaded "
+            f"on {statement.created_at:%Y-%m-%d}, "
+            f"{statement.inserted} transactions were saved from it"
+        )
+
+    @asynccontextmanager
+    async def _download(self, selected_bank: str) -> AsyncIterator[DocumentSource]:
+        """Download the document into memory or to a disk if it is too large."""
+
+        document = self.event.document
+
+        if (
+            document.file_size is not None
+            and document.file_size <= settings.DOCUMENT_IN_MEMORY_MAX_SIZE
+        ):
+            yield await self.bot.download(document.file_id)
+
+            return
+
+        document_path = self._get_download_destination(selected_bank)
+
+        try:
+            await self.bot.download(document.file_id, destination=document_path)
+
+            yield document_path
+        finally:
+            # Remove uploaded document from a disk
+            document_path.unlink(missing_ok=True)
+
     def _get_download_destination(self, selected_bank: str) -> Path:
         return settings.DOCUMENT_STORAGE_PATH / "_".join(
             (
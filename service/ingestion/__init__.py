@@ -0,0 +1,11 @@
+__all__ = (
+    "IngestionMetrics",
+    "IngestionPipeline",
+    "ParserPool",
+    "calculate_sha256",
+    "parser_pool",
+)
+
+from .parsing import ParserPool, parser_pool
+from .pipeline import IngestionMetrics, IngestionPipeline
+from .statements import calculate_sha256
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import batched
+from pathlib import Path
+from typing import AsyncIterator, Literal, Optional, Type
+
+from bank_providers.base import BankProvider, DocumentSource
+from classifier.inference import PredictorMetrics, predictor
+from classifier.keyword import KeywordClassifier
+from config import settings
+from database.models.transaction import ParsedTransaction
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the parsed batches in the queue
+_DONE = None
+
+
+def _produce(
+    provider: Type[BankProvider],
+    user_id: int,
+    document: DocumentSource,
+    file_name: Optional[str],
+    batch_size: int,
+    batches: queue.Queue,
+    stop: threading.Event,
+    send_metrics: bool = False,
+):
+    """Parse the document and put batches of parsed rows into the queue.
+
+    Rows are classified by keywords and the rest of them by the stored
+    model here, so it's done outside the event loop and transactions are
+    inserted with categories already. A worker process has its own
+    predictor, so metrics of it are sent back before the end of batches.
+    """
+
+    def put(item) -> bool:
+        # Wait for the free space in the bounded queue, but give up
+        # as soon as the consumer is no longer interested in results
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            else:
+                return True
+
+        return False
+
+    if send_metrics:
+        predictor.metrics = PredictorMetrics()
+
+    try:
+        for batch in batched(
+            provider(user_id, document, file_name).parse(), batch_size
+        ):
+            batch = list(batch)
+            KeywordClassifier.classify_rows(batch)
+            predictor.classify_rows(batch)
+
+            if not put(batch):
+                return
+    except Exception as error:
+        put(error)
+    finally:
+        if send_metrics:
+            put(predictor.metrics)
+
+        put(_DONE)
+
+
+class ParserPool:
+    """Runs parsing of bank statements outside the event loop.
+
+    Parsing and building of transactions is CPU-bound, so it is executed
+    in a thread or a process pool while parsed batches are passed back
+    to the event loop through a bounded queue.
+    """
+
+    def __init__(
+        self,
+        executor: Literal["thread", "process"],
+        max_workers: int,
+        queue_size: int,
+    ):
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+
+        self._executor: Optional[Executor] = None
+        self._manager = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                # Workers are started when the driver of MongoDB already
+                # runs its threads, which a forked child would inherit
+                # in whatever state they hold their locks
+                context = multiprocessing.get_context("forkserver")
+                self._manager = context.Manager()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=context
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="parser"
+                )
+
+        return self._executor
+
+    async def parse(
+        self,
+        provider: Type[BankProvider],
+        user_id: int,
+        document: DocumentSource,
+        file_name: Optional[str] = None,
+        batch_size: int = 256,
+    ) -> AsyncIterator[list[ParsedTransaction]]:
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+
+        if self._manager is not None:
+            batches = self._manager.Queue(maxsize=self.queue_size)
+            stop = self._manager.Event()
+
+            if not isinstance(document, (Path, bytes)):
+                # Streams can't be shared between processes
+                document.seek(0)
+                document = document.read()
+        else:
+            batches = queue.Queue(maxsize=self.queue_size)
+            stop = threading.Event()
+
+        producer = loop.run_in_executor(
+            executor,
+            _produce,
+            provider,
+            user_id,
+            document,
+            file_name,
+            batch_size,
+            batches,
+            stop,
+            self._manager is not None,
+        )
+
+        try:
+            while True:
+                try:
+                    # Poll with a timeout, so a cancelled upload doesn't
+                    # leave a thread waiting for the queue forever
+                    batch = await loop.run_in_executor(
+                        None, partial(batches.get, timeout=1)
+                    )
+                except queue.Empty:
+                    # A worker process may fail before the producer
+                    # could put anything, e.g. on an import error
+                    if producer.done():
+                        await producer
+                        break
+
+                    continue
+
+                if batch is _DONE:
+                    break
+
+                if isinstance(batch, PredictorMetrics):
+                    predictor.metrics.merge(batch)
+                    continue
+
+                if isinstance(batch, Exception):
+                    raise batch
+
+                yield batch
+        finally:
+            stop.set()
+
+            await producer
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+parser_pool = ParserPool(
+    executor=settings.PARSER_EXECUTOR,
+    max_workers=settings.PARSER_MAX_WORKERS,
+    queue_size=settings.PARSER_QUEUE_SIZE,
+)
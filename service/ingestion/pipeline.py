@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import statistics
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Optional, Type
+
+from bank_providers.base import BankProvider, DocumentSource
+from config import settings
+from database.models import Transaction
+from .parsing import ParserPool, parser_pool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestionMetrics:
+    rows: int = 0
+    inserted: int = 0
+    batches: int = 0
+    batch_size: int = 0
+    writers: int = 0
+    elapsed: float = 0.0
+    queue_depths: list[int] = field(default_factory=list)
+    write_latencies: list[float] = field(default_factory=list)
+
+    @property
+    def duplicates(self) -> int:
+        return self.rows - self.inserted
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def max_queue_depth(self) -> int:
+        return max(self.queue_depths, default=0)
+
+    @property
+    def mean_write_latency(self) -> float:
+        return statistics.fmean(self.write_latencies) if self.write_latencies else 0.0
+
+    @property
+    def max_write_latency(self) -> float:
+        return max(self.write_latencies, default=0.0)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows in {self.elapsed:.2f} s "
+            f"({self.rows_per_second:.0f} rows/sec), {self.duplicates} duplicates, "
+            f"{self.batches} batches of {self.batch_size} by {self.writers} writers, "
+            f"max queue depth {self.max_queue_depth}, write latency "
+            f"mean {self.mean_write_latency * 1000:.1f} ms "
+            f"max {self.max_write_latency * 1000:.1f} ms"
+        )
+
+
+class IngestionPipeline:
+    """Parses a statement and writes transactions at the same time.
+
+    Parsed batches are put into a bounded queue, which is drained by
+    several writers with unordered bulk inserts, so the parser and
+    the database are never waiting for each other.
+    """
+
+    def __init__(
+        self,
+        pool: ParserPool = parser_pool,
+        batch_size: Optional[int] = None,
+        writers: Optional[int] = None,
+        queue_size: int = settings.INGESTION_QUEUE_SIZE,
+    ):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.writers = writers
+        self.queue_size = queue_size
+
+    @staticmethod
+    def tune(document_size: Optional[int]) -> tuple[int, int]:
+        """Choose the batch size and the number of writers for the document."""
+
+        if not document_size:
+            return settings.INGESTION_MIN_BATCH_SIZE, 1
+
+        rows = document_size // settings.INGESTION_BYTES_PER_ROW
+
+        # Around 16 batches per document, but within the configured bounds
+        batch_size = min(
+            max(rows // 16, settings.INGESTION_MIN_BATCH_SIZE),
+            settings.INGESTION_MAX_BATCH_SIZE,
+        )
+        # Extra writers make sense only if there are enough batches for them
+        writers = min(max(rows // (batch_size * 4), 1), settings.INGESTION_MAX_WRITERS)
+
+        return batch_size, writers
+
+    async def run(
+        self,
+        provider: Type[BankProvider],
+        user_id: int,
+        document: DocumentSource,
+        file_name: Optional[str] = None,
+        document_size: Optional[int] = None,
+    ) -> IngestionMetrics:
+        batch_size, writers = self.tune(document_size)
+        metrics = IngestionMetrics(
+            batch_size=self.batch_size or batch_size,
+            writers=self.writers or writers,
+        )
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def produce():
+            async with aclosing(
+                self.pool.parse(
+                    provider, user_id, document, file_name, metrics.batch_size
+                )
+            ) as batches:
+                async for batch in batches:
+                    await queue.put(batch)
+                    metrics.queue_depths.append(queue.qsize())
+
+            for _ in range(metrics.writers):
+                await queue.put(None)
+
+        async def write():
+            while (batch := await queue.get()) is not None:
+                started = time.perf_counter()
+                inserted = await Transaction.insert_parsed(batch)
+                metrics.write_latencies.append(time.perf_counter() - started)
+                metrics.rows += len(batch)
+                metrics.inserted += inserted
+                metrics.batches += 1
+
+        started = time.perf_counter()
+
+        try:
+            # Failure of the parser or any writer cancels the rest of the pipeline
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+
+                for _ in range(metrics.writers):
+                    group.create_task(write())
+        except ExceptionGroup as errors:
+            # Callers expect the original error, e.g. about unsupported file
+            raise errors.exceptions[0]
+
+        metrics.elapsed = time.perf_counter() - started
+
+        logger.info("Ingestion for %s finished: %s", user_id, metrics)
+
+        return metrics
@@ -0,0 +1,22 @@
+import hashlib
+from pathlib import Path
+
+from bank_providers.base import DocumentSource
+
+
+def calculate_sha256(document: DocumentSource) -> str:
+    """Calculate the hash of the document content reading it by chunks."""
+
+    match document:
+        case Path():
+            with document.open("rb") as file:
+                return hashlib.file_digest(file, "sha256").hexdigest()
+        case bytes() | bytearray() | memoryview():
+            return hashlib.sha256(document).hexdigest()
+        case _:
+            document.seek(0)
+
+            try:
+                return hashlib.file_digest(document, "sha256").hexdigest()
+            finally:
+                document.seek(0)
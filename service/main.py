@@ -5,7 +5,6 @@ from aiogram import Bot, Dispatcher
 from aiogram.exceptions import TelegramRetryAfter
 from aiogram.fsm.storage.mongo import MongoStorage
 from aiogram.types import BotCommand
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from handlers import (
     analytics as analytics_handler,
@@ -15,8 +14,14 @@ from handlers import (
     start as start_handler,
     upload as upload_handler,
 )
+from classifier import scheduler as classification_scheduler
+from classifier.inference import predictor
 from config import settings
 from database import core as database
+from database.cache import report_cache
+from database.client import get_client
+from database.models import Transaction
+from ingestion import parser_pool
 
 logging.config.dictConfig(settings.LOGGING_CONFIG)
 logger = logging.getLogger(__name__)
@@ -25,13 +30,14 @@ logger = logging.getLogger(__name__)
 async def main():
     await database.init()
 
+    if users := await Transaction.backfill_rollups():
+        logger.info("Rollups were built for %s users", len(users))
+
     bot = Bot(token=settings.TOKEN)
 
     dispatcher = Dispatcher(
         bot=bot,
-        storage=MongoStorage(
-            AsyncIOMotorClient(settings.MONGODB_URI, authSource="admin")
-        ),
+        storage=MongoStorage(get_client()),
     )
 
     dispatcher.include_router(analytics_handler.router)
@@ -63,6 +69,15 @@ async def main():
     try:
         await dispatcher.start_polling(bot)
     finally:
+        parser_pool.shutdown()
+
+        await classification_scheduler.shutdown()
+
+        logger.info("Report cache: %s", report_cache.metrics)
+        logger.info("Category model: %s", predictor.metrics)
+
+        await database.close()
+
         try:
             await bot.close()
         except TelegramRetryAfter as error:
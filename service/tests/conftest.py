@@ -1,26 +1,35 @@
 import re
 
+import pytest
 import pytest_asyncio
 from pytest_factoryboy import register
 
-from database.core import init as database_init, drop as database_drop
+from database.core import (
+    init as database_init,
+    drop as database_drop,
+    close as database_close,
+)
 from config import settings
 from .factories import (
     MessageFactory,
+    ImportedStatementFactory,
     InviteFactory,
     UserFactory,
     TelegramUserFactory,
     RevolutTransactionDataFactory,
     SwedbankTransactionDataFactory,
+    ParsedTransactionFactory,
 )
 
 
 register(MessageFactory)
+register(ImportedStatementFactory)
 register(InviteFactory)
 register(UserFactory)
 register(TelegramUserFactory)
 register(RevolutTransactionDataFactory)
 register(SwedbankTransactionDataFactory)
+register(ParsedTransactionFactory)
 
 
 @pytest_asyncio.fixture(loop_scope="function", autouse=True)
@@ -34,3 +43,19 @@ async def init(database_for_tests="tests"):
     yield
 
     await database_drop()
+    await database_close()
+
+
+@pytest.fixture(scope="function")
+def swedbank_statement(swedbank_transaction_data_factory) -> bytes:
+    lines = [
+        '"Account","Code","Date","Beneficiary","Details","Amount","Currency","D/K"'
+    ]
+
+    for data in swedbank_transaction_data_factory.build_batch(3):
+        lines.append(
+            f'"{data.account_number}","20","{data.timestamp}","","{data.description}",'
+            f'"{data.amount}","{data.currency}","{data.type}"'
+        )
+
+    return "\n".join(lines).encode()
@@ -3,7 +3,8 @@ from typing import Optional
 import factory
 from dataclasses import dataclass, field
 
-from database.models import Invite, User
+from database.models import ImportedStatement, Invite, Transaction, User
+from database.models.transaction import ParsedTransaction
 from bank_providers import swedbank, revolut
 
 
@@ -19,6 +20,7 @@ class TelegramUser:
 @dataclass
 class Message:
     from_user: TelegramUser
+    text: Optional[str] = None
     answers: list[str] = field(default_factory=list)
 
     async def answer(self, text: str, *args, **kwargs):
@@ -33,6 +35,18 @@ class InviteFactory(factory.Factory):
     code = factory.LazyFunction(lambda: Invite.generate_code())
 
 
+class ImportedStatementFactory(factory.Factory):
+    class Meta:
+        model = ImportedStatement
+
+    tg_id = factory.Faker("pyint")
+    bank = factory.Faker("random_element", elements=["Revolut", "Swedbank"])
+    file_unique_id = factory.Faker("pystr")
+    sha256 = factory.Faker("sha256")
+    rows = factory.Faker("pyint")
+    inserted = factory.Faker("pyint")
+
+
 class UserFactory(factory.Factory):
     class Meta:
         model = User
@@ -86,3 +100,20 @@ class SwedbankTransactionDataFactory(factory.Factory):
     currency = factory.Faker("random_element", elements=["EUR", "USD"])
     account_number = factory.Faker("iban")
     description = factory.Faker("sentence", nb_words=5)
+
+
+class ParsedTransactionFactory(factory.Factory):
+    class Meta:
+        model = ParsedTransaction
+
+    tg_id = factory.Faker("pyint")
+    bank = factory.Faker("random_element", elements=["Revolut", "Swedbank"])
+    timestamp = factory.Faker("date_time")
+    amount = factory.Faker("pyfloat", positive=True, right_digits=2)
+    type = factory.Faker(
+        "random_element", elements=[Transaction.Type.debit, Transaction.Type.credit]
+    )
+    currency = factory.Faker("random_element", elements=list(Transaction.Currency))
+    account_number = factory.Faker("iban")
+    description = factory.Faker("sentence", nb_words=5)
+    fingerprint = factory.Faker("md5")
@@ -1,4 +1,32 @@
+import openpyxl
+import pytest
+
 from bank_providers import BANK_PROVIDERS, Revolut
+from bank_providers.errors import InvalidDocument
+
+
+@pytest.fixture(scope="function")
+def revolut_statement(tmp_path, revolut_transaction_data_factory):
+    path = tmp_path / "statement.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook.active.append(
+        ("Type", "Started Date", "Description", "Amount", "Currency")
+    )
+
+    for data in revolut_transaction_data_factory.build_batch(3):
+        workbook.active.append(
+            (
+                "CARD_PAYMENT",
+                data.timestamp,
+                data.description,
+                -data.amount,
+                data.currency,
+            )
+        )
+
+    workbook.save(path)
+
+    return path
 
 
 class TestRevolut:
@@ -10,3 +38,26 @@ class TestRevolut:
 
     def test_build_transaction_instance(self, revolut_transaction_data):
         assert Revolut._build_transaction_instance(revolut_transaction_data)
+
+    def test_read_rows_returns_required_columns(self, revolut_statement):
+        rows = list(Revolut(1, revolut_statement)._read_rows())
+
+        assert len(rows) == 3
+        assert all(len(row) == len(Revolut.columns) for row in rows)
+
+    def test_read_rows_without_required_columns(self, tmp_path):
+        path = tmp_path / "statement.xlsx"
+        workbook = openpyxl.Workbook()
+        workbook.active.append(("Type", "Amount"))
+        workbook.save(path)
+
+        with pytest.raises(InvalidDocument):
+            list(Revolut(1, path)._read_rows())
+
+    def test_parse(self, revolut_statement):
+        assert len(list(Revolut(1, revolut_statement).parse())) == 3
+
+    def test_parse_from_memory(self, revolut_statement):
+        revolut = Revolut(1, revolut_statement.read_bytes(), revolut_statement.name)
+
+        assert len(list(revolut.parse())) == 3
@@ -1,4 +1,9 @@
+import io
+
+import pytest
+
 from bank_providers import BANK_PROVIDERS, Swedbank
+from bank_providers.errors import UnsupportedFileType
 
 
 class TestSwedbank:
@@ -10,3 +15,35 @@ class TestSwedbank:
 
     def test_build_transaction_instance(self, swedbank_transaction_data):
         assert Swedbank._build_transaction_instance(swedbank_transaction_data)
+
+    def test_parse_from_bytes(self, swedbank_statement):
+        swedbank = Swedbank(1, swedbank_statement, "statement.csv")
+
+        assert len(list(swedbank.parse())) == 3
+
+    def test_parse_from_stream(self, swedbank_statement):
+        stream = io.BytesIO(swedbank_statement)
+
+        assert len(list(Swedbank(1, stream, "statement.csv").parse())) == 3
+        assert not stream.closed
+
+    def test_parse_unsupported_file_type(self, swedbank_statement):
+        with pytest.raises(UnsupportedFileType):
+            Swedbank(1, swedbank_statement, "statement.pdf").parse()
+
+    def test_parse_assigns_fingerprints(self, swedbank_statement):
+        # The same statement twice gives the same transactions twice
+        _, rows = swedbank_statement.split(b"\n", 1)
+        document = b"\n".join((swedbank_statement, rows))
+
+        fingerprints = [
+            transaction.fingerprint
+            for transaction in Swedbank(1, document, "statement.csv").parse()
+        ]
+
+        assert len(fingerprints) == 6
+        assert len(set(fingerprints)) == 6
+        assert fingerprints == [
+            transaction.fingerprint
+            for transaction in Swedbank(1, document, "statement.csv").parse()
+        ]
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Callable
+
+import pandas as pd
+import pytest
+
+from classifier.ml import MlClassifier
+from database.models import Transaction
+
+
+def train_classifier(*examples: tuple[str, Transaction.Category]) -> MlClassifier:
+    classifier = MlClassifier()
+    df = pd.DataFrame(
+        {
+            "description": [description for description, _ in examples],
+            "timestamp": [datetime(2024, 1, 1, 12)] * len(examples),
+            "type": ["D"] * len(examples),
+            "amount": [10.0] * len(examples),
+        }
+    )
+    y = classifier.category_encoder.transform(
+        [str(category) for _, category in examples]
+    )
+
+    for _ in range(5):
+        classifier.model.partial_fit(
+            classifier.get_features(df), y, classes=classifier.classes
+        )
+
+    return classifier
+
+
+@pytest.fixture
+def train() -> Callable[..., MlClassifier]:
+    return train_classifier
+
+
+@pytest.fixture
+def classifier() -> MlClassifier:
+    return train_classifier(
+        ("Wolt", Transaction.Category.FOOD), ("Bolt", Transaction.Category.TRANSPORT)
+    )
@@ -0,0 +1,29 @@
+import pytest
+
+from classifier.aho_corasick import AhoCorasick
+
+
+class TestAhoCorasick:
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("ushers", ["she", "he", "hers"]),
+            ("HIS", ["his"]),
+            ("nothing", []),
+            ("", []),
+        ],
+    )
+    def test_find_all(self, text, expected):
+        automaton = AhoCorasick(
+            (keyword, keyword) for keyword in ("he", "she", "his", "hers")
+        )
+
+        assert list(automaton.find_all(text)) == expected
+
+    def test_shared_keyword_values(self):
+        automaton = AhoCorasick([("store", 1), ("ikea store", 2), ("store", 3)])
+
+        assert sorted(automaton.find_all("IKEA STORE Vilnius")) == [1, 2, 3]
+
+    def test_states_are_shared_by_prefixes(self):
+        assert len(AhoCorasick([("abc", 1), ("abd", 2)])) == 5
@@ -0,0 +1,70 @@
+import pytest
+
+from classifier.backfill import NAME, backfill
+from database.models import Checkpoint, DailyRollup, Transaction
+
+
+@pytest.fixture
+def uncategorized(parsed_transaction_factory):
+    return [
+        parsed_transaction_factory.build(
+            tg_id=1, description=description, category=None, amount=10.0
+        )
+        for description in ("Wolt", "Bolt", "Wolt", "Bolt", "Wolt")
+    ]
+
+
+@pytest.mark.asyncio
+class TestBackfill:
+    async def test_backfill(self, classifier, uncategorized):
+        await Transaction.insert_parsed(uncategorized)
+
+        metrics = await backfill(classifier, chunk_size=2, concurrency=2)
+
+        categories = [
+            transaction.category
+            for transaction in await Transaction.find(Transaction.tg_id == 1).to_list()
+        ]
+        rollups = await DailyRollup.find(DailyRollup.tg_id == 1).to_list()
+
+        assert metrics.scanned == metrics.classified == 5
+        assert sorted(map(str, categories)) == ["Food"] * 3 + ["Transport"] * 2
+        assert {str(rollup.category) for rollup in rollups} == {"Food", "Transport"}
+        assert await Checkpoint.get_last_id(NAME) is not None
+        assert (
+            await Transaction.find(
+                Transaction.category_source == Transaction.CategorySource.MODEL
+            ).count()
+            == 5
+        )
+
+    async def test_backfill_skips_uncertain(
+        self, classifier, uncategorized, monkeypatch
+    ):
+        monkeypatch.setattr("config.settings.MODEL_MIN_SCORE", float("inf"))
+        await Transaction.insert_parsed(uncategorized)
+
+        metrics = await backfill(classifier, chunk_size=2)
+
+        assert metrics.scanned == 5 and metrics.classified == 0
+        assert await Transaction.find(Transaction.category != None).count() == 0
+        assert await Checkpoint.get_last_id(NAME) is not None
+
+    async def test_backfill_resumes_from_checkpoint(self, classifier, uncategorized):
+        await Transaction.insert_parsed(uncategorized[:3])
+        await backfill(classifier, chunk_size=2)
+
+        await Transaction.insert_parsed(uncategorized[3:])
+        metrics = await backfill(classifier, chunk_size=2)
+
+        assert metrics.scanned == 2
+
+    async def test_dry_run(self, classifier, uncategorized):
+        await Transaction.insert_parsed(uncategorized)
+
+        metrics = await backfill(classifier, chunk_size=2, dry_run=True)
+
+        assert metrics.scanned == 5 and metrics.classified == 0
+        assert metrics.categories[Transaction.Category.FOOD] == 3
+        assert await Transaction.find(Transaction.category != None).count() == 0
+        assert await Checkpoint.get_last_id(NAME) is None
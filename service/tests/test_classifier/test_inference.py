@@ -0,0 +1,145 @@
+import queue
+import runpy
+import threading
+
+import numpy
+import pandas as pd
+import pytest
+
+from bank_providers import Swedbank
+from classifier.inference import CategoryPredictor, PredictorMetrics
+from classifier.ml import MlClassifier
+from database.models import Transaction
+from ingestion.parsing import _produce
+
+
+class TestMlClassifierStorage:
+    def test_save_and_load(self, classifier, tmp_path):
+        path = classifier.save(tmp_path)
+        loaded = MlClassifier.load(path)
+
+        assert MlClassifier.get_versions(tmp_path) == [path]
+        assert isinstance(loaded.model.coef_, numpy.memmap)
+        assert numpy.array_equal(loaded.model.coef_, classifier.model.coef_)
+
+    @pytest.mark.filterwarnings("ignore:'classifier.ml' found in sys.modules")
+    def test_load_model_saved_by_script(self, classifier, tmp_path):
+        # A copy of the module as python -m runs it, which can't be imported
+        script = runpy.run_module("classifier.ml", run_name="__mp_main__")
+        saved = script["MlClassifier"]()
+        saved.model = classifier.model
+
+        loaded = MlClassifier.load(saved.save(tmp_path))
+        df = pd.DataFrame(
+            {
+                "description": ["Wolt"],
+                "timestamp": [pd.Timestamp(2024, 1, 1, 12)],
+                "type": ["D"],
+                "amount": [10.0],
+            }
+        )
+
+        assert type(loaded) is MlClassifier
+        assert loaded.predict(df) == [Transaction.Category.FOOD]
+
+    def test_save_keeps_latest_versions(self, classifier, tmp_path, monkeypatch):
+        monkeypatch.setattr("config.settings.MODEL_KEEP_VERSIONS", 2)
+
+        paths = [classifier.save(tmp_path) for _ in range(3)]
+
+        assert MlClassifier.get_versions(tmp_path) == paths[1:]
+
+
+class TestCategoryPredictor:
+    def test_without_model(self, tmp_path, parsed_transaction_factory):
+        predictor = CategoryPredictor(tmp_path)
+        rows = parsed_transaction_factory.build_batch(2, category=None)
+
+        assert predictor.classify_rows(rows) == 0
+        assert predictor.model is None
+
+    def test_classify_rows(self, classifier, tmp_path, parsed_transaction_factory):
+        classifier.save(tmp_path)
+        predictor = CategoryPredictor(tmp_path)
+        rows = [
+            parsed_transaction_factory.build(
+                description="Wolt", category=None, amount=10.0
+            ),
+            parsed_transaction_factory.build(
+                description="Wolt", category=Transaction.Category.PETS
+            ),
+        ]
+
+        assert predictor.classify_rows(rows) == 1
+        assert [row.category for row in rows] == [
+            Transaction.Category.FOOD,
+            Transaction.Category.PETS,
+        ]
+        assert rows[0].category_source == Transaction.CategorySource.MODEL
+        assert predictor.metrics.loads == 1 and predictor.metrics.batches == 1
+
+    def test_classify_rows_below_min_score(
+        self, classifier, tmp_path, parsed_transaction_factory, monkeypatch
+    ):
+        monkeypatch.setattr("config.settings.MODEL_MIN_SCORE", float("inf"))
+        classifier.save(tmp_path)
+        predictor = CategoryPredictor(tmp_path)
+        row = parsed_transaction_factory.build(description="Wolt", category=None)
+
+        assert predictor.classify_rows([row]) == 0
+        assert row.category is None and row.category_source is None
+
+    def test_broken_version_keeps_model(self, classifier, tmp_path):
+        path = classifier.save(tmp_path)
+        predictor = CategoryPredictor(tmp_path, reload_interval=0)
+
+        assert predictor.model is not None
+
+        path.with_name(f"{path.stem}0{MlClassifier.MODEL_SUFFIX}").write_bytes(b"")
+
+        assert predictor.model is not None and predictor.path == path
+        assert predictor.metrics.loads == 1
+
+    def test_metrics_of_parser_worker(self, classifier, tmp_path, monkeypatch):
+        classifier.save(tmp_path)
+        worker = CategoryPredictor(tmp_path)
+        worker.metrics.batches = 10
+        monkeypatch.setattr("ingestion.parsing.predictor", worker)
+        statement = (
+            '"Account","Code","Date","Beneficiary","Details","Amount","Currency","D/K"\n'
+            '"LT01","20","2024-01-10","","Unknown shop","12.50","EUR","D"'
+        ).encode()
+        batches = queue.Queue()
+
+        _produce(
+            Swedbank,
+            1,
+            statement,
+            "statement.csv",
+            256,
+            batches,
+            threading.Event(),
+            True,
+        )
+        *_, metrics, done = batches.queue
+
+        # Only metrics of this statement are sent
+        assert isinstance(metrics, PredictorMetrics) and done is None
+        assert metrics.loads == 1 and metrics.batches == 1 and metrics.rows == 1
+
+        merged = PredictorMetrics(batches=2, max_predict_time=float("inf"))
+        merged.merge(metrics)
+
+        assert merged.loads == 1 and merged.load_time == metrics.load_time
+        assert merged.batches == 3 and merged.max_predict_time == float("inf")
+
+    def test_hot_reload(self, classifier, train, tmp_path):
+        classifier.save(tmp_path)
+        predictor = CategoryPredictor(tmp_path, reload_interval=0)
+
+        assert predictor.model is not None
+
+        path = train(("Wolt", Transaction.Category.SHOPPING)).save(tmp_path)
+
+        assert predictor.model is not None and predictor.path == path
+        assert predictor.metrics.loads == 2
@@ -0,0 +1,142 @@
+import re
+
+import pytest
+
+from classifier.keyword import KeywordClassifier
+from database.models import Checkpoint, DailyRollup, Merchant, Transaction
+
+
+class TestKeywordClassifier:
+    @pytest.mark.parametrize(
+        "description, expected",
+        [
+            ("KFC Vilnius", Transaction.Category.FOOD),
+            ("Payment to STEAM games", Transaction.Category.GAMES),
+            # Both keywords match, the first category of the mapping wins
+            ("Mokestis: grynieji", Transaction.Category.SERVICES),
+            ("Transfer", None),
+            (None, None),
+        ],
+    )
+    def test_classify(self, description, expected):
+        assert KeywordClassifier.classify(description) == expected
+
+    def test_classify_as_regular_expressions(self):
+        descriptions = [
+            f"Card payment {keyword.upper()} #{index}"
+            for index, keywords in enumerate(
+                KeywordClassifier.CATEGORY_MAPPING.values()
+            )
+            for keyword in keywords
+        ]
+
+        for description in descriptions:
+            expected = next(
+                category
+                for category, keywords in KeywordClassifier.CATEGORY_MAPPING.items()
+                if re.search("|".join(keywords), description, re.IGNORECASE)
+            )
+
+            assert KeywordClassifier.classify(description) == expected
+
+    def test_classify_rows(self, parsed_transaction_factory):
+        rows = [
+            parsed_transaction_factory.build(description="Wolt", category=None),
+            parsed_transaction_factory.build(
+                description="Wolt", category=Transaction.Category.TRAVEL
+            ),
+            parsed_transaction_factory.build(description="Transfer", category=None),
+        ]
+
+        assert KeywordClassifier.classify_rows(rows) == 1
+        assert [row.category for row in rows] == [
+            Transaction.Category.FOOD,
+            Transaction.Category.TRAVEL,
+            None,
+        ]
+        assert rows[0].category_source == Transaction.CategorySource.KEYWORD
+
+    @pytest.mark.asyncio
+    async def test_run(self, parsed_transaction_factory):
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=1, description=description, category=None, amount=1.0
+            )
+            for description in ("Wolt", "Bolt", "Transfer", "Rimi")
+        ]
+        await Transaction.insert_parsed(rows)
+
+        assert await KeywordClassifier().run(batch_size=2) == 3
+
+        categories = [
+            transaction.category
+            for transaction in await Transaction.find(Transaction.tg_id == 1)
+            .sort(Transaction.timestamp)
+            .to_list()
+        ]
+        rollups = await DailyRollup.find(DailyRollup.tg_id == 1).to_list()
+
+        assert sorted(map(str, filter(None, categories))) == [
+            "Food",
+            "Food",
+            "Transport",
+        ]
+        assert (
+            sum(
+                rollup.transactions
+                for rollup in rollups
+                if rollup.category == Transaction.Category.UNKNOWN
+            )
+            == 1
+        )
+        assert sum(rollup.transactions for rollup in rollups) == 4
+
+    @pytest.mark.asyncio
+    async def test_run_incremental(self, parsed_transaction_factory):
+        rows = [
+            parsed_transaction_factory.build(tg_id=1, description=description)
+            for description in ("Wolt", "Transfer", "Bolt")
+        ]
+        await Transaction.insert_parsed(rows[:2])
+
+        assert await KeywordClassifier().run(incremental=True) == 1
+
+        # Transactions before the checkpoint aren't considered again
+        await Transaction.find(Transaction.tg_id == 1).update(
+            {"$set": {Transaction.category: None}}
+        )
+        await Transaction.insert_parsed(rows[2:])
+
+        assert await KeywordClassifier().run(incremental=True) == 1
+        assert await Checkpoint.get_last_id(KeywordClassifier.NAME) is not None
+
+    @pytest.mark.asyncio
+    async def test_run_classifies_merchants_once(
+        self, parsed_transaction_factory, monkeypatch
+    ):
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=1, description=f"{description} {index:02}.01.2024"
+            )
+            for index in range(1, 11)
+            for description in ("WOLT LT", "Transfer")
+        ]
+        await Transaction.insert_parsed(rows)
+        await Merchant.set_categories({"transfer": Transaction.Category.HOUSING})
+
+        calls = []
+        classify = KeywordClassifier.classify
+        monkeypatch.setattr(
+            KeywordClassifier,
+            "classify",
+            staticmethod(
+                lambda description: calls.append(description) or classify(description)
+            ),
+        )
+
+        assert await KeywordClassifier().run() == 20
+        assert calls == ["wolt lt"]
+        assert await Merchant.get_categories(["wolt lt", "transfer"]) == {
+            "wolt lt": Transaction.Category.FOOD,
+            "transfer": Transaction.Category.HOUSING,
+        }
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from classifier.ml import MlClassifier
+from database.models import Transaction
+
+
+@pytest.fixture
+def categorized_transactions(parsed_transaction_factory):
+    return [
+        parsed_transaction_factory.build(
+            tg_id=1,
+            description=description,
+            category=category,
+            type=Transaction.Type.debit,
+            amount=10.0,
+        )
+        for _ in range(20)
+        for description, category in (
+            ("WOLT LT Vilnius", Transaction.Category.FOOD),
+            ("BOLT.EU ride", Transaction.Category.TRANSPORT),
+        )
+    ]
+
+
+class TestMlClassifier:
+    def test_get_features(self):
+        classifier = MlClassifier()
+        df = pd.DataFrame(
+            {
+                "description": ["Wolt", None],
+                "timestamp": [datetime(2024, 1, 1, 12), datetime(2024, 6, 2, 8)],
+                "type": ["D", "C"],
+                "amount": [10.0, -3.5],
+            }
+        )
+
+        features = classifier.get_features(df)
+
+        assert features.format == "csr"
+        assert features.shape == (2, MlClassifier.N_FEATURES + 3 + 4)
+
+    def test_labels_are_fitted_once(self):
+        assert list(MlClassifier().category_encoder.classes_) == sorted(
+            str(category) for category in Transaction.Category
+        )
+
+    @pytest.mark.asyncio
+    async def test_run(self, categorized_transactions):
+        await Transaction.insert_parsed(categorized_transactions)
+        classifier = MlClassifier(batch_size=8)
+
+        await classifier.run()
+
+        df = pd.DataFrame(
+            {
+                "description": ["WOLT LT Kaunas", "BOLT.EU ride"],
+                "timestamp": [datetime(2024, 1, 1, 12)] * 2,
+                "type": ["D", "D"],
+                "amount": [10.0, 10.0],
+            }
+        )
+        predicted = classifier.category_encoder.inverse_transform(
+            classifier.model.predict(classifier.get_features(df))
+        )
+
+        assert list(classifier.model.classes_) == list(classifier.classes)
+        assert list(predicted) == ["Food", "Transport"]
+
+    @pytest.mark.asyncio
+    async def test_run_skips_predicted_categories(self, categorized_transactions):
+        for row in categorized_transactions:
+            row.category_source = Transaction.CategorySource.MODEL
+        await Transaction.insert_parsed(categorized_transactions)
+        classifier = MlClassifier(batch_size=8)
+
+        await classifier.run()
+
+        assert not hasattr(classifier.model, "coef_")
+
+    def test_predict_min_score(self, classifier):
+        df = pd.DataFrame(
+            {
+                "description": ["Wolt"],
+                "timestamp": [datetime(2024, 1, 1, 12)],
+                "type": ["D"],
+                "amount": [10.0],
+            }
+        )
+
+        assert classifier.predict(df) == [Transaction.Category.FOOD]
+        assert classifier.predict(df, min_score=float("inf")) == [None]
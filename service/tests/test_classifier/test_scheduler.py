@@ -0,0 +1,31 @@
+import pytest
+from beanie import PydanticObjectId
+
+from classifier.scheduler import schedule_classification
+from database.models import Transaction
+
+
+@pytest.mark.asyncio
+class TestScheduler:
+    async def test_schedule_classification(self, parsed_transaction_factory):
+        await Transaction.insert_parsed(
+            [parsed_transaction_factory.build(tg_id=1, description="Wolt")]
+        )
+
+        first_id = PydanticObjectId()
+        await Transaction.insert_parsed(
+            [
+                parsed_transaction_factory.build(tg_id=tg_id, description="Wolt")
+                for tg_id in (1, 2)
+            ]
+        )
+        last_id = PydanticObjectId()
+
+        assert await schedule_classification(1, first_id, last_id) == 1
+
+        transactions = await Transaction.find(Transaction.tg_id == 1).to_list()
+
+        assert sorted(str(transaction.category) for transaction in transactions) == [
+            "Food",
+            "None",
+        ]
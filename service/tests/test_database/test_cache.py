@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from database.cache import ReportCache
+
+START_DATE = datetime(2024, 1, 1)
+END_DATE = datetime(2024, 1, 31)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock) -> ReportCache:
+    return ReportCache(max_size=2, ttl=60, clock=clock)
+
+
+class TestReportCache:
+    def test_get_after_put(self, cache):
+        key = cache.key(1, START_DATE, END_DATE)
+
+        assert cache.get(key) is None
+
+        cache.put(key, "report", cache.generation(1))
+
+        assert cache.get(key) == "report"
+        assert cache.metrics.hits == 1
+        assert cache.metrics.misses == 1
+
+    def test_invalidate(self, cache):
+        key = cache.key(1, START_DATE, END_DATE)
+        other_key = cache.key(2, START_DATE, END_DATE)
+        cache.put(key, "report", cache.generation(1))
+        cache.put(other_key, "other report", cache.generation(2))
+
+        cache.invalidate([1])
+
+        assert cache.get(key) is None
+        assert cache.get(other_key) == "other report"
+
+    def test_put_of_outdated_generation(self, cache):
+        key = cache.key(1, START_DATE, END_DATE)
+        generation = cache.generation(1)
+
+        cache.invalidate([1])
+        cache.put(key, "report", generation)
+
+        assert cache.get(key) is None
+
+    def test_ttl(self, cache, clock):
+        key = cache.key(1, START_DATE, END_DATE)
+        cache.put(key, "report", cache.generation(1))
+
+        clock.now += 60
+
+        assert cache.get(key) is None
+        assert len(cache) == 0
+
+    def test_size_bound(self, cache):
+        keys = [cache.key(tg_id, START_DATE, END_DATE) for tg_id in range(3)]
+
+        for tg_id, key in enumerate(keys[:2]):
+            cache.put(key, tg_id, cache.generation(tg_id))
+
+        # The first key becomes the most recently used one
+        cache.get(keys[0])
+        cache.put(keys[2], 2, cache.generation(2))
+
+        assert cache.get(keys[0]) == 0
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) == 2
+        assert cache.metrics.evictions == 1
@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+
+from database.client import PoolStats, get_client
+
+
+@dataclass
+class Event:
+    duration: float = 0.0
+
+
+class TestClient:
+    def test_get_client_is_shared(self):
+        assert get_client() is get_client()
+
+    def test_pool_stats(self):
+        stats = PoolStats()
+
+        stats.connection_created(Event())
+        stats.connection_created(Event())
+        stats.connection_checked_out(Event(duration=0.001))
+        stats.connection_checked_out(Event(duration=0.003))
+        stats.connection_checked_in(Event())
+        stats.connection_closed(Event())
+
+        assert stats.connections == 1
+        assert stats.in_use == 1
+        assert stats.mean_wait_time == 0.002
+        assert stats.max_wait_time == 0.003
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import numpy
+import pytest
+from pymongo import ASCENDING
+
+from database.columnar import FEATURE_COLUMNS, read_columns, read_frames, to_columns
+from database.models import Transaction
+from database.models.transaction import stored_name
+
+
+@pytest.fixture
+def transactions(parsed_transaction_factory):
+    return [
+        parsed_transaction_factory.build(
+            tg_id=1,
+            timestamp=datetime(2024, 1, day, 12),
+            amount=day + 0.25,
+            category=Transaction.Category.FOOD if day % 2 else None,
+        )
+        for day in range(1, 6)
+    ]
+
+
+@pytest.mark.asyncio
+class TestColumnar:
+    async def test_read_columns(self, transactions):
+        await Transaction.insert_parsed(transactions)
+
+        batches = [
+            batch
+            async for batch in read_columns(
+                {stored_name("tg_id"): 1},
+                {"_id": object, "category": object, **FEATURE_COLUMNS},
+                batch_size=2,
+                sort=[(stored_name("timestamp"), ASCENDING)],
+            )
+        ]
+
+        assert [len(batch["amount"]) for batch in batches] == [2, 2, 1]
+        # Every batch has its own arrays
+        assert batches[0]["amount"] is not batches[1]["amount"]
+        assert batches[0]["amount"].dtype == numpy.float64
+        assert numpy.concatenate([batch["amount"] for batch in batches]).tolist() == [
+            1.25,
+            2.25,
+            3.25,
+            4.25,
+            5.25,
+        ]
+        assert list(batches[0]["category"]) == ["Food", None]
+        assert batches[2]["timestamp"][0] == numpy.datetime64("2024-01-05T12:00")
+        assert len({_id for batch in batches for _id in batch["_id"]}) == 5
+
+    async def test_read_frames(self, transactions):
+        await Transaction.insert_parsed(transactions)
+
+        frames = [
+            frame
+            async for frame in read_frames(
+                Transaction.UNCATEGORIZED, {"amount": float, "category": object}
+            )
+        ]
+
+        assert len(frames) == 1
+        assert list(frames[0].columns) == ["amount", "category"]
+        assert sorted(frames[0]["amount"]) == [2.25, 4.25]
+        assert frames[0]["category"].isna().all()
+
+    async def test_read_nothing(self):
+        assert [batch async for batch in read_columns({}, FEATURE_COLUMNS)] == []
+
+
+def test_to_columns():
+    columns = to_columns(
+        [
+            {
+                stored_name("description"): "Wolt",
+                stored_name("amount"): Transaction.encode_amount(12.5),
+            },
+            {stored_name("amount"): Transaction.encode_amount(-3.0)},
+        ],
+        {"description": object, "amount": float, "timestamp": "datetime64[ms]"},
+    )
+
+    assert list(columns["description"]) == ["Wolt", None]
+    assert columns["amount"].tolist() == [12.5, -3.0]
+    assert numpy.isnat(columns["timestamp"]).all()
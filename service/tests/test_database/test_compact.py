@@ -0,0 +1,79 @@
+import pytest
+from beanie import PydanticObjectId
+
+from database import core
+from database.compact import main, migrate, to_compact, to_default
+from database.models import Transaction
+from database.models.transaction import COMPACT_STORAGE
+from database.normalization import normalize_merchant
+
+
+@pytest.fixture
+def default_document(parsed_transaction) -> dict:
+    parsed_transaction.amount = 12.34
+    parsed_transaction.category = Transaction.Category.FOOD
+    fields = (
+        "tg_id",
+        "bank",
+        "timestamp",
+        "amount",
+        "type",
+        "currency",
+        "category",
+        "account_number",
+        "description",
+        "fingerprint",
+    )
+    document = {field: getattr(parsed_transaction, field) for field in fields}
+
+    return {
+        **document,
+        "_id": PydanticObjectId(),
+        "type": parsed_transaction.type.value,
+        "currency": parsed_transaction.currency.value,
+        "category": parsed_transaction.category.value,
+        "category_source": None,
+        "merchant": normalize_merchant(parsed_transaction.description),
+    }
+
+
+class TestCompact:
+    def test_to_compact(self, default_document):
+        document = to_compact(default_document)
+
+        assert document["u"] == default_document["tg_id"]
+        assert document["a"] == 1234
+        assert document["g"] == Transaction.CATEGORY_CODES[Transaction.Category.FOOD]
+
+    def test_round_trip(self, default_document):
+        assert to_default(to_compact(default_document)) == default_document
+
+    @pytest.mark.asyncio
+    async def test_migrate(self, default_document):
+        stored = default_document if COMPACT_STORAGE else to_compact(default_document)
+        await Transaction.get_motor_collection().insert_one(stored)
+
+        assert await migrate() == 1
+        assert await migrate() == 0
+
+        transaction = await Transaction.get(default_document["_id"])
+
+        assert transaction.amount == 12.34
+        assert transaction.category == Transaction.Category.FOOD
+
+    @pytest.mark.asyncio
+    async def test_main_keeps_unique_index(self, default_document, monkeypatch):
+        async def close():
+            pass
+
+        stored = default_document if COMPACT_STORAGE else to_compact(default_document)
+        await Transaction.get_motor_collection().insert_one(stored)
+        monkeypatch.setattr("sys.argv", ["compact"])
+        monkeypatch.setattr(core, "close", close)
+
+        await main()
+
+        name = Transaction.get_settings().indexes[0].index.document["name"]
+        indexes = await Transaction.get_motor_collection().index_information()
+
+        assert indexes[name]["unique"]
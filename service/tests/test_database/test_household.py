@@ -0,0 +1,73 @@
+import pytest
+
+from database.household import HouseholdCache
+
+
+@pytest.fixture
+def household(invite_factory, user_factory):
+    async def create(owner: int, *members: int):
+        invite = await invite_factory.build(tg_id=owner).create()
+        await user_factory.build(tg_id=owner).create()
+
+        for member in members:
+            await user_factory.build(
+                tg_id=member, accepted_invite_code=invite.code
+            ).create()
+
+    return create
+
+
+@pytest.mark.asyncio
+class TestHouseholdCache:
+    async def test_user_without_household(self):
+        assert await HouseholdCache().get_members(1) == (1,)
+
+    async def test_members_are_resolved_from_any_member(self, household):
+        await household(1, 2, 3, 4, 5)
+        await household(10, 11)
+
+        for tg_id in (1, 3, 5):
+            assert await HouseholdCache().get_members(tg_id) == (1, 2, 3, 4, 5)
+
+    async def test_chained_invites(self, household, user_factory, invite_factory):
+        await household(1, 2)
+        await household(3, 4)
+        invite = await invite_factory.build(tg_id=2).create()
+        await user_factory.build(
+            tg_id=3, accepted_invite_code=invite.code
+        ).insert_or_update()
+
+        assert await HouseholdCache().get_members(4) == (1, 2, 3, 4)
+
+    async def test_single_lookup_for_the_household(self, household):
+        await household(1, 2, 3, 4, 5)
+        cache = HouseholdCache()
+
+        await cache.get_members(1)
+
+        for tg_id in (1, 2, 3, 4, 5):
+            assert await cache.get_members(tg_id) == (1, 2, 3, 4, 5)
+
+        assert cache.metrics.misses == 1 and cache.metrics.hits == 5
+
+    async def test_clear(self, household):
+        cache = HouseholdCache()
+
+        assert await cache.get_members(1) == (1,)
+
+        await household(1, 2)
+
+        assert await cache.get_members(1) == (1,)
+
+        cache.clear()
+
+        assert await cache.get_members(1) == (1, 2)
+
+    async def test_max_size(self, household):
+        await household(1, 2)
+        cache = HouseholdCache(max_size=2)
+
+        await cache.get_members(1)
+        await cache.get_members(3)
+
+        assert len(cache) == 2 and cache.metrics.evictions == 1
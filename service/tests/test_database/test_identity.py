@@ -0,0 +1,34 @@
+from database.identity import IdentityCache
+
+
+class TestIdentityCache:
+    def test_users_and_invites(self, user, invite):
+        cache = IdentityCache()
+
+        assert cache.get_user(user.tg_id) is None
+        assert cache.get_invite(invite.code) is None
+
+        cache.put_user(user)
+        cache.put_invite(invite)
+
+        assert cache.get_user(user.tg_id) is user
+        assert cache.get_invite(invite.code) is invite
+        assert cache.metrics.hits == 2 and cache.metrics.misses == 2
+
+    def test_max_size(self, user_factory):
+        cache = IdentityCache(max_size=2)
+        users = [user_factory.build(tg_id=tg_id) for tg_id in range(3)]
+
+        for user in users:
+            cache.put_user(user)
+
+        assert cache.get_user(users[0].tg_id) is None
+        assert cache.get_user(users[2].tg_id) is users[2]
+        assert cache.metrics.evictions == 1
+
+    def test_clear(self, user):
+        cache = IdentityCache()
+        cache.put_user(user)
+        cache.clear()
+
+        assert cache.get_user(user.tg_id) is None
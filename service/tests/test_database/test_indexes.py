@@ -0,0 +1,73 @@
+import pytest
+from bson import SON
+from pymongo import ASCENDING, IndexModel
+
+from database.indexes import (
+    _signature,
+    get_declared_indexes,
+    plan_indexes,
+    sync_indexes,
+)
+from database.models import MODELS, Transaction
+
+
+@pytest.mark.asyncio
+class TestIndexes:
+    async def test_sync_indexes_builds_missing(self):
+        await Transaction.get_motor_collection().drop_indexes()
+
+        assert len((await plan_indexes(Transaction)).missing) == len(
+            get_declared_indexes(Transaction)
+        )
+
+        await sync_indexes([Transaction])
+
+        assert not (await plan_indexes(Transaction)).missing
+
+    async def test_sync_indexes_twice(self):
+        await sync_indexes(drop_extra=True)
+
+        for plan in await sync_indexes(drop_extra=True):
+            assert not plan.missing, plan
+            assert not plan.extra, plan
+
+    async def test_sync_indexes_keeps_beanie_indexes(self):
+        collection = Transaction.get_motor_collection()
+        name = Transaction.get_settings().indexes[0].index.document["name"]
+
+        await sync_indexes([Transaction], drop_extra=True)
+
+        assert name in await collection.index_information()
+
+    async def test_sync_indexes_drops_extra(self):
+        collection = Transaction.get_motor_collection()
+        await collection.create_indexes([IndexModel([("bank", ASCENDING)])])
+
+        assert (await plan_indexes(Transaction)).extra == ["bank_1"]
+
+        await sync_indexes([Transaction], drop_extra=True)
+
+        assert "bank_1" not in await collection.index_information()
+
+    async def test_sync_indexes_dry_run(self):
+        await Transaction.get_motor_collection().drop_indexes()
+
+        await sync_indexes([Transaction], dry_run=True)
+
+        assert (await plan_indexes(Transaction)).missing
+
+
+def test_signature_of_existing_partial_index():
+    declared = IndexModel(
+        [("fingerprint", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"fingerprint": {"$type": "string"}},
+    ).document
+    # Options of existing indexes are decoded as SON
+    existing = {
+        "key": SON([("fingerprint", ASCENDING)]),
+        "unique": True,
+        "partialFilterExpression": SON([("fingerprint", SON([("$type", "string")]))]),
+    }
+
+    assert _signature(existing) == _signature(declared)
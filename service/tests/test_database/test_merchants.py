@@ -0,0 +1,25 @@
+import pytest
+
+from database.merchants import migrate
+from database.models import Transaction
+from database.models.transaction import stored_name
+
+
+@pytest.mark.asyncio
+class TestMerchants:
+    async def test_migrate(self, parsed_transaction_factory):
+        rows = [
+            parsed_transaction_factory.build(tg_id=1, description=description)
+            for description in ("Wolt 12.50", None)
+        ]
+        await Transaction.insert_parsed(rows)
+        await Transaction.get_motor_collection().update_many(
+            {}, {"$unset": {stored_name("merchant"): ""}}
+        )
+
+        assert await migrate(batch_size=1) == 2
+        assert await migrate() == 0
+        assert sorted(map(str, await Transaction.distinct(Transaction.merchant))) == [
+            "None",
+            "wolt",
+        ]
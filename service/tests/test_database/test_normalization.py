@@ -0,0 +1,21 @@
+import pytest
+
+from database.normalization import normalize_merchant
+
+
+class TestNormalizeMerchant:
+    @pytest.mark.parametrize(
+        "description, expected",
+        [
+            ("WOLT LT 2024-01-10 12:30 **1234", "wolt lt"),
+            ("Wolt lt, 12.50", "wolt lt"),
+            ("IKEA Restaurant 01.02.2024", "ikea restaurant"),
+            ("Mokestis: grynieji", "mokestis grynieji"),
+            ("H&M", "h&m"),
+            ("Transfer 218137", "transfer 218137"),
+            ("  ", None),
+            (None, None),
+        ],
+    )
+    def test_normalize_merchant(self, description, expected):
+        assert normalize_merchant(description) == expected
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+import pytest
+
+from database.prefix_sums import PrefixSums
+
+
+@pytest.fixture
+def prefix_sums() -> PrefixSums:
+    return PrefixSums.build(
+        {
+            "day": day,
+            "type": "D",
+            "currency": "EUR",
+            "category": category,
+            "amount": amount,
+        }
+        for day, category, amount in (
+            (datetime(2024, 1, 1), "Food", 1.0),
+            (datetime(2024, 1, 1), "Games", 2.0),
+            (datetime(2024, 1, 5), "Food", 4.0),
+            (datetime(2024, 2, 1), "Food", 8.0),
+        )
+    )
+
+
+class TestPrefixSums:
+    def test_build(self, prefix_sums):
+        assert len(prefix_sums.days) == 3
+        assert list(prefix_sums.sums["D", "EUR", "Food"]) == [0.0, 1.0, 5.0, 13.0]
+        assert list(prefix_sums.sums["D", "EUR", "Games"]) == [0.0, 2.0, 2.0, 2.0]
+
+    @pytest.mark.parametrize(
+        "start_date, end_date, expected",
+        [
+            (date(2024, 1, 1), date(2024, 2, 1), {"Food": 13.0, "Games": 2.0}),
+            (date(2024, 1, 2), date(2024, 1, 31), {"Food": 4.0}),
+            (date(2024, 1, 5), date(2024, 1, 5), {"Food": 4.0}),
+            (date(2023, 1, 1), date(2023, 12, 31), {}),
+            (date(2024, 1, 2), date(2024, 1, 4), {}),
+        ],
+    )
+    def test_totals(self, prefix_sums, start_date, end_date, expected):
+        assert {
+            category: amount
+            for _, _, category, amount in prefix_sums.totals(start_date, end_date)
+        } == expected
@@ -0,0 +1,67 @@
+from array import array
+from datetime import datetime
+
+from database.models import Transaction
+from database.models.transaction import Granularity, Trend
+from handlers.analytics import TrendCallbackHandler
+
+
+class TestTrendCallbackHandler:
+    def test_format_trend(self):
+        trend = Trend(
+            granularity=Granularity.MONTH,
+            buckets=[datetime(2024, 1, 1), datetime(2024, 2, 1)],
+            series={
+                (
+                    Transaction.Type.debit,
+                    Transaction.Currency.eur,
+                    Transaction.Category.FOOD,
+                ): array("d", [1.5, 0.0]),
+                (
+                    Transaction.Type.credit,
+                    Transaction.Currency.eur,
+                    Transaction.Category.INCOME,
+                ): array("d", [0.0, 10.0]),
+            },
+        )
+
+        text = TrendCallbackHandler._format_trend(trend)
+
+        january, february = text.split("\n")[-2:]
+
+        assert "2024\\-01" in january and "⬆️ 0\\.0 ⬇️ 1\\.5" in january
+        assert "2024\\-02" in february and "⬆️ 10\\.0 ⬇️ 0\\.0" in february
+
+    def test_format_trend_in_currencies(self):
+        trend = Trend(
+            granularity=Granularity.MONTH,
+            buckets=[datetime(2024, 1, 1)],
+            series={
+                (
+                    Transaction.Type.debit,
+                    Transaction.Currency.usd,
+                    Transaction.Category.FOOD,
+                ): array("d", [2.0]),
+                (
+                    Transaction.Type.debit,
+                    Transaction.Currency.eur,
+                    Transaction.Category.FOOD,
+                ): array("d", [1.0]),
+            },
+        )
+
+        text = TrendCallbackHandler._format_trend(trend)
+
+        assert trend.currencies() == [
+            Transaction.Currency.eur,
+            Transaction.Currency.usd,
+        ]
+        assert text.index("EUR") < text.index("USD")
+        assert "⬇️ 1\\.0" in text and "⬇️ 2\\.0" in text
+
+    def test_format_empty_trend(self):
+        trend = Trend(
+            granularity=Granularity.DAY, buckets=[datetime(2024, 1, 1)], series={}
+        )
+
+        assert "no transactions" in TrendCallbackHandler._format_trend(trend)
@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+import pytest
+
+from database.models import Transaction
+from handlers.report import CustomReport, CustomReportHandler, router
+
+
+class State:
+    def __init__(self):
+        self.cleared = False
+
+    async def clear(self):
+        self.cleared = True
+
+
+class TestCustomReportHandler:
+    @pytest.mark.asyncio
+    async def test_handler_send_report(self, message, parsed_transaction_factory):
+        await Transaction.insert_parsed(
+            [
+                parsed_transaction_factory.build(
+                    tg_id=message.from_user.id,
+                    timestamp=datetime(2024, 3, 20, 12),
+                    amount=12.5,
+                    type=Transaction.Type.credit,
+                    currency=Transaction.Currency.eur,
+                    category=Transaction.Category.INCOME,
+                )
+            ]
+        )
+        message.text = "from 2024-03-17 to 2024-08-02"
+        state = State()
+
+        await CustomReportHandler(message, state=state).handle()
+
+        assert state.cleared
+        assert "12\\.50 EUR" in message.answers[0]
+
+    @pytest.mark.asyncio
+    async def test_handler_with_invalid_range(self, message):
+        message.text = "2024-08-02 2024-03-17"
+        state = State()
+
+        await CustomReportHandler(message, state=state).handle()
+
+        assert not state.cleared
+        assert "YYYY-MM-DD" in message.answers[0]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "text, expected",
+        [("2024-03-17 2024-08-02", True), ("/help", False), ("/start", False)],
+    )
+    async def test_handler_filters(self, message, text, expected):
+        handler = next(
+            handler
+            for handler in router.message.handlers
+            if handler.callback is CustomReportHandler
+        )
+        message.text = text
+
+        matched, _ = await handler.check(
+            message, raw_state=CustomReport.selected_range.state
+        )
+
+        assert matched is expected
+
+    @pytest.mark.parametrize(
+        "text", ["2024-03-17", "2024-03-17 2024-13-01", "from March to August"]
+    )
+    def test_parse_invalid_range(self, text):
+        with pytest.raises(ValueError):
+            CustomReportHandler._parse_range(text)
+
+    def test_parse_range(self):
+        assert CustomReportHandler._parse_range("2024-03-17 - 2024-08-02") == (
+            date(2024, 3, 17),
+            date(2024, 8, 2),
+        )
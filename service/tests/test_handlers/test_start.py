@@ -3,6 +3,7 @@ from typing import Optional
 
 import pytest
 
+from database.household import household_cache
 from database.models import User
 from handlers.start import StartCommandHandler, StartCommandHandlerWithDeepLink
 
@@ -50,3 +51,31 @@ class TestStartCommandHandlerWithDeepLink:
 
         assert len(message.answers) == 2
         assert await User.find_one(User.tg_id == message.from_user.id)
+
+    async def test_handler_accepts_invite(self, message, user, invite):
+        user.tg_id = invite.tg_id
+        await user.insert()
+        await invite.insert()
+
+        assert await household_cache.get_members(invite.tg_id) == (invite.tg_id,)
+
+        await StartCommandHandlerWithDeepLink(
+            message, command=Command(args=invite.code)
+        ).handle()
+
+        member = await User.find_one(User.tg_id == message.from_user.id)
+
+        assert member.accepted_invite_code == invite.code
+        assert await household_cache.get_members(invite.tg_id) == tuple(
+            sorted((invite.tg_id, message.from_user.id))
+        )
+
+    async def test_handler_ignores_unknown_invite(self, message):
+        await StartCommandHandlerWithDeepLink(
+            message, command=Command(args="unknown")
+        ).handle()
+
+        member = await User.find_one(User.tg_id == message.from_user.id)
+
+        assert len(message.answers) == 1
+        assert member.accepted_invite_code is None
@@ -0,0 +1,136 @@
+import io
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from bank_providers import Swedbank
+from database.models import ImportedStatement, Transaction
+from handlers.upload import UploadBankStatementDocumentHandler
+from ingestion import IngestionPipeline, ParserPool
+
+
+@dataclass
+class Document:
+    file_id: str
+    file_unique_id: str
+    file_name: str = "statement.csv"
+    file_size: Optional[int] = None
+
+
+@dataclass
+class Chat:
+    id: int
+
+
+class Bot:
+    id = 1
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.downloads = 0
+
+    async def send_chat_action(self, *args, **kwargs):
+        pass
+
+    async def download(self, file_id: str, destination=None) -> io.BytesIO:
+        self.downloads += 1
+
+        return io.BytesIO(self.content)
+
+
+class State:
+    def __init__(self):
+        self.data = {"selected_bank": Swedbank.name}
+        self.cleared = False
+
+    async def get_data(self) -> dict:
+        return self.data
+
+    async def update_data(self, **kwargs):
+        self.data.update(kwargs)
+
+    async def clear(self):
+        self.cleared = True
+
+
+@pytest.fixture
+def upload(message, monkeypatch):
+    pool = ParserPool(executor="thread", max_workers=1, queue_size=1)
+    scheduled = []
+
+    monkeypatch.setattr(
+        "handlers.upload.IngestionPipeline", lambda: IngestionPipeline(pool)
+    )
+    monkeypatch.setattr(
+        "handlers.upload.schedule_classification",
+        lambda *args: scheduled.append(args),
+    )
+
+    async def upload(content: bytes, file_unique_id: str = "file") -> Bot:
+        bot = Bot(content)
+        message.chat = Chat(id=message.from_user.id)
+        message.document = Document(
+            file_id=file_unique_id,
+            file_unique_id=file_unique_id,
+            file_size=len(content),
+        )
+        message.answers.clear()
+
+        await UploadBankStatementDocumentHandler(
+            message, bot=bot, state=State()
+        ).handle()
+
+        return bot
+
+    upload.scheduled = scheduled
+
+    yield upload
+
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+class TestUploadBankStatementDocumentHandler:
+    async def test_upload(self, upload, message, swedbank_statement):
+        await upload(swedbank_statement)
+
+        assert message.answers == [
+            "3 transactions were processed and 3 new of them were saved"
+        ]
+        assert await ImportedStatement.find_all().count() == 1
+        assert len(upload.scheduled) == 1
+
+    async def test_same_file_is_not_downloaded(
+        self, upload, message, swedbank_statement
+    ):
+        await upload(swedbank_statement)
+        bot = await upload(swedbank_statement)
+
+        assert bot.downloads == 0
+        assert "already been uploaded" in message.answers[0]
+        assert await Transaction.find_all().count() == 3
+
+    async def test_same_content_is_not_parsed(
+        self, upload, message, swedbank_statement
+    ):
+        await upload(swedbank_statement, file_unique_id="first")
+        bot = await upload(swedbank_statement, file_unique_id="second")
+
+        assert bot.downloads == 1
+        assert "already been uploaded" in message.answers[0]
+        assert await ImportedStatement.find_all().count() == 1
+
+    async def test_empty_statement_can_be_uploaded_again(
+        self, upload, message, swedbank_statement
+    ):
+        header, _ = swedbank_statement.split(b"\n", 1)
+
+        await upload(header)
+
+        assert message.answers == ["There are no valid transactions in the file"]
+        assert await ImportedStatement.find_all().count() == 0
+
+        await upload(header)
+
+        assert message.answers == ["There are no valid transactions in the file"]
@@ -0,0 +1,94 @@
+from contextlib import aclosing
+
+import pytest
+
+from bank_providers import Swedbank
+from bank_providers.errors import UnsupportedFileType
+from database.models import Transaction
+from database.models.transaction import ParsedTransaction
+from ingestion import ParserPool
+
+
+@pytest.fixture(scope="function")
+def parser_pool():
+    pool = ParserPool(executor="thread", max_workers=1, queue_size=1)
+
+    yield pool
+
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+class TestParserPool:
+    async def test_parse_yields_batches(self, parser_pool, swedbank_statement):
+        batches = [
+            batch
+            async for batch in parser_pool.parse(
+                Swedbank, 1, swedbank_statement, "statement.csv", batch_size=2
+            )
+        ]
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert all(
+            isinstance(transaction, ParsedTransaction)
+            for batch in batches
+            for transaction in batch
+        )
+
+    async def test_parse_classifies_rows(self, parser_pool):
+        statement = (
+            '"Account","Code","Date","Beneficiary","Details","Amount","Currency","D/K"\n'
+            '"LT01","20","2024-01-10","","WOLT LT Vilnius","12.50","EUR","D"'
+        ).encode()
+
+        (batch,) = [
+            batch
+            async for batch in parser_pool.parse(
+                Swedbank, 1, statement, "statement.csv"
+            )
+        ]
+
+        assert batch[0].category == Transaction.Category.FOOD
+
+    async def test_parse_raises_provider_error(self, parser_pool, swedbank_statement):
+        with pytest.raises(UnsupportedFileType):
+            async for _ in parser_pool.parse(
+                Swedbank, 1, swedbank_statement, "statement.pdf"
+            ):
+                pass
+
+    async def test_parse_stops_producer_on_early_exit(
+        self, parser_pool, swedbank_statement
+    ):
+        async with aclosing(
+            parser_pool.parse(
+                Swedbank, 1, swedbank_statement, "statement.csv", batch_size=1
+            )
+        ) as batches:
+            async for _ in batches:
+                break
+
+        # The single worker is free again only if the producer was stopped
+        batches = [
+            batch
+            async for batch in parser_pool.parse(
+                Swedbank, 1, swedbank_statement, "statement.csv"
+            )
+        ]
+
+        assert len(batches) == 1
+
+    async def test_parse_in_process_pool(self, swedbank_statement):
+        pool = ParserPool(executor="process", max_workers=1, queue_size=1)
+
+        try:
+            batches = [
+                batch
+                async for batch in pool.parse(
+                    Swedbank, 1, swedbank_statement, "statement.csv"
+                )
+            ]
+        finally:
+            pool.shutdown()
+
+        assert sum(len(batch) for batch in batches) == 3
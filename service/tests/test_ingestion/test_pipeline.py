@@ -0,0 +1,56 @@
+import pytest
+
+from bank_providers import Swedbank
+from bank_providers.errors import UnsupportedFileType
+from config import settings
+from database.models import Transaction
+from ingestion import IngestionPipeline, ParserPool
+
+
+@pytest.fixture(scope="function")
+def pipeline():
+    pool = ParserPool(executor="thread", max_workers=1, queue_size=1)
+
+    yield IngestionPipeline(pool, batch_size=2, writers=2)
+
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+class TestIngestionPipeline:
+    async def test_run_inserts_transactions(self, pipeline, swedbank_statement):
+        metrics = await pipeline.run(Swedbank, 1, swedbank_statement, "statement.csv")
+
+        assert metrics.rows == 3
+        assert metrics.batches == 2
+        assert len(metrics.write_latencies) == 2
+        assert await Transaction.find(Transaction.tg_id == 1).count() == 3
+
+    async def test_run_skips_already_imported(self, pipeline, swedbank_statement):
+        await pipeline.run(Swedbank, 1, swedbank_statement, "statement.csv")
+        metrics = await pipeline.run(Swedbank, 1, swedbank_statement, "statement.csv")
+
+        assert metrics.rows == 3
+        assert metrics.inserted == 0
+        assert await Transaction.find(Transaction.tg_id == 1).count() == 3
+
+    async def test_run_raises_provider_error(self, pipeline, swedbank_statement):
+        with pytest.raises(UnsupportedFileType):
+            await pipeline.run(Swedbank, 1, swedbank_statement, "statement.pdf")
+
+
+class TestIngestionPipelineTune:
+    def test_tune_without_size(self):
+        assert IngestionPipeline.tune(None) == (settings.INGESTION_MIN_BATCH_SIZE, 1)
+
+    def test_tune_small_document(self):
+        assert IngestionPipeline.tune(10 * 1024) == (
+            settings.INGESTION_MIN_BATCH_SIZE,
+            1,
+        )
+
+    def test_tune_large_document(self):
+        batch_size, writers = IngestionPipeline.tune(50 * 1024 * 1024)
+
+        assert batch_size == settings.INGESTION_MAX_BATCH_SIZE
+        assert writers == settings.INGESTION_MAX_WRITERS
@@ -0,0 +1,25 @@
+import hashlib
+import io
+
+from ingestion import calculate_sha256
+
+
+class TestCalculateSha256:
+    def test_bytes(self, swedbank_statement):
+        assert (
+            calculate_sha256(swedbank_statement)
+            == hashlib.sha256(swedbank_statement).hexdigest()
+        )
+
+    def test_path(self, tmp_path, swedbank_statement):
+        path = tmp_path / "statement.csv"
+        path.write_bytes(swedbank_statement)
+
+        assert calculate_sha256(path) == calculate_sha256(swedbank_statement)
+
+    def test_stream_is_rewound(self, swedbank_statement):
+        stream = io.BytesIO(swedbank_statement)
+        stream.seek(10)
+
+        assert calculate_sha256(stream) == calculate_sha256(swedbank_statement)
+        assert stream.tell() == 0
@@ -0,0 +1,18 @@
+import pytest
+from beanie import PydanticObjectId
+
+from database.models import Checkpoint
+
+
+@pytest.mark.asyncio
+class TestCheckpointModel:
+    async def test_get_last_id_without_checkpoint(self):
+        assert await Checkpoint.get_last_id("job") is None
+
+    async def test_advance_never_goes_back(self):
+        first_id, last_id = PydanticObjectId(), PydanticObjectId()
+
+        await Checkpoint.advance("job", last_id)
+        await Checkpoint.advance("job", first_id)
+
+        assert await Checkpoint.get_last_id("job") == last_id
@@ -0,0 +1,36 @@
+import pytest
+
+from database.models import ImportedStatement
+
+
+@pytest.mark.asyncio
+class TestImportedStatementModel:
+    async def test_find_by_file(self, imported_statement):
+        await imported_statement.insert()
+
+        assert await ImportedStatement.find_by_file(
+            imported_statement.tg_id, imported_statement.file_unique_id
+        )
+        assert not await ImportedStatement.find_by_file(
+            imported_statement.tg_id + 1, imported_statement.file_unique_id
+        )
+
+    async def test_find_by_hash(self, imported_statement):
+        await imported_statement.insert()
+
+        assert await ImportedStatement.find_by_hash(
+            imported_statement.tg_id, imported_statement.sha256
+        )
+        assert not await ImportedStatement.find_by_hash(
+            imported_statement.tg_id + 1, imported_statement.sha256
+        )
+
+    async def test_save_once(self, imported_statement_factory):
+        statement = imported_statement_factory()
+
+        await statement.save_once()
+        await imported_statement_factory(
+            tg_id=statement.tg_id, sha256=statement.sha256
+        ).save_once()
+
+        assert await ImportedStatement.find_all().count() == 1
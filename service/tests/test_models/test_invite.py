@@ -1,4 +1,5 @@
 import pytest
+from pymongo.errors import DuplicateKeyError
 
 from database.models import Invite
 
@@ -21,3 +22,20 @@ class TestInviteModel:
         invite = await invite.create()
 
         assert await invite.get_or_create_code() == invite.code
+
+    @pytest.mark.asyncio
+    async def test_code_is_unique(self, invite_factory):
+        invite = await invite_factory.build().create()
+
+        with pytest.raises(DuplicateKeyError):
+            await invite_factory.build(
+                tg_id=invite.tg_id + 1, code=invite.code
+            ).create()
+
+    @pytest.mark.asyncio
+    async def test_find_by_code(self, invite):
+        assert await Invite.find_by_code(invite.code) is None
+
+        code = await invite.get_or_create_code()
+
+        assert (await Invite.find_by_code(code)).tg_id == invite.tg_id
@@ -0,0 +1,21 @@
+import pytest
+
+from database.models import Merchant, Transaction
+
+
+@pytest.mark.asyncio
+class TestMerchantModel:
+    async def test_intern(self):
+        await Merchant.intern(["wolt", "bolt"])
+        await Merchant.intern(["wolt"])
+
+        assert await Merchant.count() == 2
+        assert await Merchant.get_categories(["wolt", "bolt"]) == {}
+
+    async def test_set_categories(self):
+        await Merchant.intern(["wolt"])
+        await Merchant.set_categories({"wolt": Transaction.Category.FOOD})
+
+        assert await Merchant.get_categories(["wolt", "bolt"]) == {
+            "wolt": Transaction.Category.FOOD
+        }
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pytest
+
+from database.models import MonthlyRollup
+
+
+def make_total(amount, transactions, category="Food"):
+    return {
+        "tg_id": 1,
+        "month": datetime(2024, 1, 1),
+        "type": "D",
+        "currency": "EUR",
+        "category": category,
+        "amount": amount,
+        "transactions": transactions,
+    }
+
+
+class TestMonthlyRollupModel:
+    @pytest.mark.asyncio
+    async def test_increment(self):
+        await MonthlyRollup.increment([make_total(10.0, 1), make_total(5.5, 2)])
+
+        rollup = await MonthlyRollup.find_one(MonthlyRollup.tg_id == 1)
+
+        assert rollup.amount == 15.5
+        assert rollup.transactions == 3
+
+    @pytest.mark.asyncio
+    async def test_increment_removes_empty_rollups(self):
+        await MonthlyRollup.increment(
+            [make_total(10.0, 1), make_total(20.0, 2, category="Games")]
+        )
+        await MonthlyRollup.increment([make_total(-10.0, -1)])
+
+        rollups = await MonthlyRollup.find(MonthlyRollup.tg_id == 1).to_list()
+
+        assert [rollup.category for rollup in rollups] == ["Games"]
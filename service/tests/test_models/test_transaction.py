@@ -1,6 +1,11 @@
+import asyncio
+from datetime import date, datetime
+
 import pytest
 
-from database.models import Transaction
+from database.cache import report_cache
+from database.models import DailyRollup, MonthlyRollup, Transaction
+from database.models.transaction import CLAIM_FIELD, Granularity, stored_name
 
 
 class TestTransactionModel:
@@ -30,3 +35,445 @@ class TestTransactionModel:
     )
     def test_transaction_currency_parse(self, value, expected):
         assert Transaction.Currency.parse(value) == expected
+
+    def test_to_documents(self, parsed_transaction):
+        (document,) = Transaction.to_documents([parsed_transaction])
+
+        assert document[Transaction.tg_id] == parsed_transaction.tg_id
+        assert document[Transaction.type] == parsed_transaction.type.value
+        assert document[Transaction.currency] == parsed_transaction.currency.value
+        assert document[Transaction.category] is None
+
+    @pytest.mark.asyncio
+    async def test_insert_parsed_round_trip(self, parsed_transaction):
+        parsed_transaction.category = Transaction.Category.FOOD
+        await Transaction.insert_parsed([parsed_transaction])
+
+        transaction = await Transaction.find_one(
+            Transaction.tg_id == parsed_transaction.tg_id
+        )
+
+        assert transaction.amount == parsed_transaction.amount
+        assert transaction.category == Transaction.Category.FOOD
+
+    def test_to_documents_with_invalid_column(self, parsed_transaction):
+        parsed_transaction.currency = "EUR"
+
+        with pytest.raises(ValueError):
+            Transaction.to_documents([parsed_transaction])
+
+    @pytest.mark.asyncio
+    async def test_insert_parsed(self, parsed_transaction_factory):
+        rows = parsed_transaction_factory.build_batch(3, tg_id=1)
+
+        assert await Transaction.insert_parsed(rows) == 3
+        assert await Transaction.find(Transaction.tg_id == 1).count() == 3
+
+    @pytest.mark.asyncio
+    async def test_insert_parsed_skips_duplicates(self, parsed_transaction_factory):
+        rows = parsed_transaction_factory.build_batch(3, tg_id=1)
+
+        for index, row in enumerate(rows):
+            row.fingerprint = row.calculate_fingerprint(row.identity(), index)
+
+        assert await Transaction.insert_parsed(rows[:2]) == 2
+        assert await Transaction.insert_parsed(rows) == 1
+        assert await Transaction.find(Transaction.tg_id == 1).count() == 3
+
+    @pytest.mark.asyncio
+    async def test_skip_imported(self, parsed_transaction_factory):
+        rows = parsed_transaction_factory.build_batch(3, tg_id=1)
+
+        for index, row in enumerate(rows):
+            row.fingerprint = row.calculate_fingerprint(row.identity(), index)
+
+        await Transaction.insert_parsed(rows[:1])
+
+        documents = Transaction.to_documents([*rows, rows[1], rows[2]])
+        documents.append(Transaction.to_documents([rows[0]])[0])
+        documents[-1][stored_name("fingerprint")] = None
+
+        result = await Transaction._skip_imported(documents)
+
+        assert [document[stored_name("fingerprint")] for document in result] == [
+            rows[1].fingerprint,
+            rows[2].fingerprint,
+            None,
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "start_date, end_date, expected",
+        [
+            (datetime(2024, 1, 1), datetime(2024, 3, 31, 23, 59, 59), 15.0),
+            (datetime(2024, 1, 15), datetime(2024, 3, 10), 14.0),
+            (datetime(2024, 2, 1), datetime(2024, 2, 29, 23, 59, 59, 999000), 6.0),
+            (datetime(2024, 2, 10), datetime(2024, 2, 25), 4.0),
+            (datetime(2024, 1, 11), datetime(2024, 1, 31), 0.0),
+        ],
+    )
+    async def test_get_report(
+        self, parsed_transaction_factory, start_date, end_date, expected
+    ):
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=1,
+                timestamp=timestamp,
+                amount=amount,
+                type=Transaction.Type.debit,
+                currency=Transaction.Currency.eur,
+            )
+            for timestamp, amount in (
+                (datetime(2024, 1, 10), 1.0),
+                (datetime(2024, 2, 5), 2.0),
+                (datetime(2024, 2, 20), 4.0),
+                (datetime(2024, 3, 3), 8.0),
+            )
+        ]
+        await Transaction.insert_parsed(rows)
+
+        report = await Transaction.get_report(1, start_date, end_date)
+
+        assert report.income == {}
+        assert sum(report.expenses.get(Transaction.Currency.eur, {}).values()) == (
+            expected
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_reports(self, parsed_transaction_factory):
+        periods = [
+            (datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59, 59)),
+            (datetime(2024, 1, 5), datetime(2024, 2, 10)),
+            (datetime(2024, 2, 1), datetime(2024, 2, 29)),
+        ]
+        rows = [
+            parsed_transaction_factory.build(tg_id=1, timestamp=timestamp)
+            for timestamp in (
+                datetime(2024, 1, 3),
+                datetime(2024, 1, 20),
+                datetime(2024, 2, 7),
+                datetime(2024, 2, 15),
+            )
+        ]
+        await Transaction.insert_parsed(rows)
+
+        reports = await Transaction.get_reports(1, periods)
+        report_cache.clear()
+
+        assert reports == [
+            await Transaction.get_report(1, start_date, end_date)
+            for start_date, end_date in periods
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_analytics(self, parsed_transaction_factory):
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=1,
+                timestamp=timestamp,
+                amount=amount,
+                type=Transaction.Type.credit,
+                currency=Transaction.Currency.eur,
+                category=Transaction.Category.INCOME,
+            )
+            for timestamp, amount in (
+                (datetime(2024, 1, 10), 1.0),
+                (datetime(2024, 2, 10), 2.0),
+            )
+        ]
+        await Transaction.insert_parsed(rows)
+
+        analytics = await Transaction.get_analytics(
+            1,
+            original=(datetime(2024, 2, 1), datetime(2024, 2, 29)),
+            compared=(datetime(2024, 1, 1), datetime(2024, 1, 31)),
+        )
+
+        assert analytics.original_period.income == {
+            Transaction.Currency.eur: {Transaction.Category.INCOME: 2.0}
+        }
+        assert analytics.compared_period.income == {
+            Transaction.Currency.eur: {Transaction.Category.INCOME: 1.0}
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_report_is_cached_until_data_changes(
+        self, parsed_transaction_factory
+    ):
+        start_date, end_date = datetime(2024, 1, 1), datetime(2024, 1, 31)
+        row = parsed_transaction_factory.build(
+            tg_id=1, timestamp=datetime(2024, 1, 10), type=Transaction.Type.credit
+        )
+
+        report = await Transaction.get_report(1, start_date, end_date)
+
+        assert await Transaction.get_report(1, start_date, end_date) is report
+
+        await Transaction.insert_parsed([row])
+
+        assert (await Transaction.get_report(1, start_date, end_date)).income
+
+    @pytest.mark.asyncio
+    async def test_household_reports(self, parsed_transaction_factory):
+        start_date, end_date = datetime(2024, 1, 1), datetime(2024, 3, 31)
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=tg_id,
+                timestamp=datetime(2024, 1, 10),
+                amount=amount,
+                type=Transaction.Type.debit,
+                currency=Transaction.Currency.eur,
+            )
+            for tg_id, amount in ((1, 1.0), (2, 2.0), (3, 4.0), (2, 8.0))
+        ]
+        await Transaction.insert_parsed(rows[:3])
+
+        def total(report):
+            return sum(report.expenses[Transaction.Currency.eur].values())
+
+        assert total(await Transaction.get_report((1, 2), start_date, end_date)) == 3.0
+        assert total(await Transaction.get_report((1,), start_date, end_date)) == 1.0
+
+        range_report = await Transaction.get_range_report(
+            (1, 2), start_date.date(), end_date.date()
+        )
+
+        assert total(range_report) == 3.0
+
+        # Reports of the household are invalidated by changes of any member
+        await Transaction.insert_parsed(rows[3:])
+
+        assert total(await Transaction.get_report((1, 2), start_date, end_date)) == 11.0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "granularity, buckets, expected",
+        [
+            (Granularity.MONTH, 3, [1.0, 6.0, 8.0]),
+            (Granularity.WEEK, 13, [0.0, 1.0, 0.0, 0.0, 0.0, 2.0]),
+            (Granularity.DAY, 91, [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0]),
+        ],
+    )
+    async def test_get_trend(
+        self, parsed_transaction_factory, granularity, buckets, expected
+    ):
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=1,
+                timestamp=timestamp,
+                amount=amount,
+                type=Transaction.Type.debit,
+                currency=Transaction.Currency.eur,
+                category=Transaction.Category.FOOD,
+            )
+            for timestamp, amount in (
+                (datetime(2024, 1, 10, 12), 1.0),
+                (datetime(2024, 2, 5, 12), 2.0),
+                (datetime(2024, 2, 20, 12), 4.0),
+                (datetime(2024, 3, 3, 12), 8.0),
+            )
+        ]
+        await Transaction.insert_parsed(rows)
+
+        trend = await Transaction.get_trend(
+            1, datetime(2024, 1, 1), datetime(2024, 3, 31, 23, 59, 59), granularity
+        )
+        series = trend.series[
+            (
+                Transaction.Type.debit,
+                Transaction.Currency.eur,
+                Transaction.Category.FOOD,
+            )
+        ]
+
+        assert len(trend.buckets) == len(series) == buckets
+        assert list(series[: len(expected)]) == expected
+        assert sum(series) == 15.0
+
+    @pytest.mark.asyncio
+    async def test_get_trend_in_currencies(self, parsed_transaction_factory):
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=1,
+                timestamp=datetime(2024, 1, 10, 12),
+                amount=amount,
+                type=Transaction.Type.debit,
+                currency=currency,
+                category=Transaction.Category.FOOD,
+            )
+            for currency, amount in (
+                (Transaction.Currency.usd, 2.0),
+                (Transaction.Currency.eur, 1.0),
+            )
+        ]
+        await Transaction.insert_parsed(rows)
+
+        trend = await Transaction.get_trend(
+            1,
+            datetime(2024, 1, 1),
+            datetime(2024, 1, 31, 23, 59, 59),
+            Granularity.MONTH,
+        )
+
+        assert trend.currencies() == [
+            Transaction.Currency.eur,
+            Transaction.Currency.usd,
+        ]
+        assert list(trend.total(Transaction.Type.debit, Transaction.Currency.usd)) == [
+            2.0
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_range_report(self, parsed_transaction_factory):
+        rows = [
+            parsed_transaction_factory.build(
+                tg_id=1,
+                timestamp=timestamp,
+                amount=amount,
+                type=Transaction.Type.debit,
+                currency=Transaction.Currency.eur,
+            )
+            for timestamp, amount in (
+                (datetime(2024, 3, 16, 23), 1.0),
+                (datetime(2024, 3, 17, 8), 2.0),
+                (datetime(2024, 8, 2, 20), 4.0),
+            )
+        ]
+        await Transaction.insert_parsed(rows[:2])
+
+        report = await Transaction.get_range_report(
+            1, date(2024, 3, 17), date(2024, 8, 2)
+        )
+
+        assert sum(report.expenses[Transaction.Currency.eur].values()) == 2.0
+
+        # Prefix sums are rebuilt after new transactions
+        await Transaction.insert_parsed(rows[2:])
+
+        report = await Transaction.get_range_report(
+            1, date(2024, 3, 17), date(2024, 8, 2)
+        )
+
+        assert sum(report.expenses[Transaction.Currency.eur].values()) == 6.0
+
+    @pytest.mark.asyncio
+    async def test_set_category_moves_rollups(self, parsed_transaction_factory):
+        rows = parsed_transaction_factory.build_batch(
+            3, tg_id=1, timestamp=datetime(2024, 1, 10), amount=1.0
+        )
+        await Transaction.insert_parsed(rows)
+
+        modified = await Transaction.set_category(
+            {Transaction.tg_id: 1}, Transaction.Category.FOOD
+        )
+        rollups = await MonthlyRollup.find(MonthlyRollup.tg_id == 1).to_list()
+
+        assert modified == 3
+        assert {rollup.category for rollup in rollups} == {"Food"}
+        assert sum(rollup.transactions for rollup in rollups) == 3
+
+    @pytest.mark.asyncio
+    async def test_set_categories_counts_only_updated(self, parsed_transaction_factory):
+        rows = parsed_transaction_factory.build_batch(
+            2,
+            tg_id=1,
+            timestamp=datetime(2024, 1, 10),
+            amount=1.0,
+            type=Transaction.Type.debit,
+            currency=Transaction.Currency.eur,
+            category=None,
+        )
+        await Transaction.insert_parsed(rows)
+        documents = await Transaction.get_motor_collection().find().to_list(None)
+
+        # Both writers have read the same uncategorized transactions
+        modified = await asyncio.gather(
+            Transaction.set_categories(
+                [(document, Transaction.Category.FOOD) for document in documents]
+            ),
+            Transaction.set_categories(
+                [(document, Transaction.Category.TRAVEL) for document in documents]
+            ),
+        )
+        rollups = await MonthlyRollup.find(MonthlyRollup.tg_id == 1).to_list()
+        stored = await Transaction.get_motor_collection().find().to_list(None)
+
+        assert sum(modified) == 2
+        assert {
+            rollup.category: rollup.transactions
+            for rollup in rollups
+            if rollup.transactions
+        } == {str(Transaction.Category.FOOD): 2}
+        assert not any(CLAIM_FIELD in document for document in stored)
+
+    @pytest.mark.asyncio
+    async def test_claims_are_indexed(self):
+        indexes = await Transaction.get_motor_collection().index_information()
+
+        assert list(indexes["claim"]["key"]) == [(CLAIM_FIELD, 1)]
+        assert indexes["claim"]["sparse"]
+
+    @pytest.mark.asyncio
+    async def test_delete_transactions_updates_rollups(
+        self, parsed_transaction_factory
+    ):
+        rows = parsed_transaction_factory.build_batch(
+            3, tg_id=1, timestamp=datetime(2024, 1, 10), amount=1.0
+        )
+        await Transaction.insert_parsed(rows)
+
+        deleted = await Transaction.delete_transactions({Transaction.tg_id: 1})
+
+        assert deleted == 3
+        assert await MonthlyRollup.find(MonthlyRollup.tg_id == 1).count() == 0
+        assert await DailyRollup.find(DailyRollup.tg_id == 1).count() == 0
+
+    @pytest.mark.asyncio
+    async def test_rebuild_rollups(self, parsed_transaction_factory):
+        rows = parsed_transaction_factory.build_batch(
+            3, tg_id=1, timestamp=datetime(2024, 1, 10), amount=1.0
+        )
+        await Transaction.insert_parsed(rows)
+        await MonthlyRollup.get_motor_collection().delete_many({})
+
+        await Transaction.rebuild_rollups(1)
+        rollups = await MonthlyRollup.find(MonthlyRollup.tg_id == 1).to_list()
+
+        assert sum(rollup.transactions for rollup in rollups) == 3
+        assert sum(rollup.amount for rollup in rollups) == 3.0
+
+    @pytest.mark.asyncio
+    async def test_backfill_rollups(self, parsed_transaction_factory):
+        for tg_id in (1, 2):
+            await Transaction.insert_parsed(
+                parsed_transaction_factory.build_batch(
+                    2, tg_id=tg_id, timestamp=datetime(2024, 1, 10), amount=1.0
+                )
+            )
+        # Transactions of the first user were stored before rollups existed
+        await MonthlyRollup.get_motor_collection().delete_many({"tg_id": 1})
+        await DailyRollup.get_motor_collection().delete_many({"tg_id": 1})
+
+        assert await Transaction.backfill_rollups() == [1]
+        assert await Transaction.backfill_rollups() == []
+
+        for tg_id in (1, 2):
+            rollups = await MonthlyRollup.find(MonthlyRollup.tg_id == tg_id).to_list()
+
+            assert sum(rollup.transactions for rollup in rollups) == 2
+
+    def test_identity_normalizes_description(self, parsed_transaction):
+        identity = parsed_transaction.identity()
+        parsed_transaction.description = f"  {parsed_transaction.description.upper()}  "
+
+        assert parsed_transaction.identity() == identity
+
+    def test_calculate_fingerprint_depends_on_occurrence(self, parsed_transaction):
+        identity = parsed_transaction.identity()
+
+        assert parsed_transaction.calculate_fingerprint(
+            identity, 1
+        ) == parsed_transaction.calculate_fingerprint(identity, 1)
+        assert parsed_transaction.calculate_fingerprint(
+            identity, 1
+        ) != parsed_transaction.calculate_fingerprint(identity, 2)
@@ -18,3 +18,43 @@ class TestUserModel:
             ).first_or_none()
             is not None
         )
+
+    async def test_insert_or_update_stores_accepted_invite_code(self, user):
+        user.accepted_invite_code = "code"
+        await user.insert_or_update()
+
+        user.accepted_invite_code = None
+        await user.insert_or_update()
+
+        stored = await User.find_one(User.tg_id == user.tg_id)
+
+        assert stored.accepted_invite_code == "code"
+
+    async def test_insert_or_update_is_cached(self, user):
+        await user.insert_or_update()
+
+        assert (await User.find_by_tg_id(user.tg_id)).username == user.username
+
+        await User.find_one(User.tg_id == user.tg_id).update(
+            {"$set": {User.username: "changed"}}
+        )
+        await user.insert_or_update()
+
+        # The profile didn't change, so the upsert was skipped
+        stored = await User.find_one(User.tg_id == user.tg_id)
+
+        assert stored.username == "changed"
+
+        user.first_name = "Changed"
+        await user.insert_or_update()
+
+        stored = await User.find_one(User.tg_id == user.tg_id)
+
+        assert stored.username == user.username and stored.first_name == "Changed"
+
+    async def test_find_by_tg_id(self, user):
+        assert await User.find_by_tg_id(user.tg_id) is None
+
+        await user.insert()
+
+        assert (await User.find_by_tg_id(user.tg_id)).tg_id == user.tg_id